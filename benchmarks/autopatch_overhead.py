@@ -0,0 +1,82 @@
+"""
+Micro-benchmark of the per-sample overhead of the Weave autopatcher's `PatchedPlan`.
+
+Runs a plan of no-op solvers through the unpatched `Plan` and through `PatchedPlan`, without a Weave client, so that the
+difference is the cost of wrapping the solvers in weave ops rather than of tracing them (most of the absolute time is
+inspect's own transcript spans, which both pay). `uncached` clears the op cache before every sample, reproducing the
+previous behaviour of building a new `PatchedPlan` and every op for every sample; `cached` reuses the patched plan
+and ops built for the plan.
+
+    python benchmarks/autopatch_overhead.py --samples 2000 --solvers 5
+"""
+import argparse
+import asyncio
+import time
+import timeit
+
+from inspect_ai.model import ModelName
+from inspect_ai.solver import Generate, Plan, TaskState, solver
+
+from inspect_wandb.weave.autopatcher import _patched_plans, patched_plan
+
+
+@solver
+def noop():
+    async def solve(state: TaskState, generate: Generate) -> TaskState:
+        return state
+    return solve
+
+
+async def _generate(state: TaskState, *args, **kwargs) -> TaskState:
+    return state
+
+
+async def run(plan: Plan, samples: int, mode: str) -> float:
+    state = TaskState(model=ModelName("mockllm/model"), sample_id=0, epoch=1, input="", messages=[])
+    start = time.perf_counter()
+    for _ in range(samples):
+        if mode == "plain":
+            await plan(state, _generate)  # type: ignore[arg-type]
+            continue
+        if mode == "uncached":
+            _patched_plans.pop(plan, None)
+        await patched_plan(plan)(state, _generate)  # type: ignore[arg-type]
+    return (time.perf_counter() - start) / samples * 1e6
+
+
+def resolve_ops(plan: Plan, samples: int, cached: bool) -> float:
+    """
+    Time spent per sample just getting the patched plan and the weave op for each solver, isolated from running the plan.
+    """
+    def resolve() -> None:
+        if not cached:
+            _patched_plans.pop(plan, None)
+        patched = patched_plan(plan)
+        for step in patched.steps:
+            patched.op(step)
+    return timeit.timeit(resolve, number=samples) / samples * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--solvers", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    plan = Plan([noop() for _ in range(args.solvers)])
+    # best of `repeats`, to keep scheduler noise out of the comparison
+    results = {
+        mode: min(asyncio.run(run(plan, args.samples, mode)) for _ in range(args.repeats))
+        for mode in ["plain", "uncached", "cached"]
+    }
+    print(f"{args.solvers} solvers, {args.samples} samples, best of {args.repeats}")
+    for mode, per_sample in results.items():
+        overhead = per_sample - results["plain"]
+        print(f"{mode:>8}: {per_sample:8.1f} us/sample ({overhead:+8.1f} us autopatch overhead)")
+    for mode, cached in [("uncached", False), ("cached", True)]:
+        print(f"{mode:>8}: {resolve_ops(plan, args.samples, cached):8.1f} us/sample building the patched plan and solver ops")
+
+
+if __name__ == "__main__":
+    main()
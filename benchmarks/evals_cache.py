@@ -0,0 +1,70 @@
+"""
+Time to read the evals dataframe the viz plots are drawn from, for a directory of eval logs such as an eval set's,
+with `evals_df` and through the `EvalsCache`: cold, warm, and warm after a few more logs are added.
+
+The logs are copies of one log from a small mockllm eval, each with its own eval id.
+
+    python benchmarks/evals_cache.py --logs 2000
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+from inspect_ai import Task, eval as inspect_eval
+from inspect_ai.analysis import evals_df
+from inspect_ai.dataset import Sample
+from inspect_ai.log import EvalLog, read_eval_log, write_eval_log
+from inspect_ai.solver import generate
+from inspect_wandb.viz.evals_cache import EvalsCache
+
+
+def write_logs(template: EvalLog, log_dir: Path, start: int, count: int) -> None:
+    for index in range(start, start + count):
+        log = template.model_copy(deep=True)
+        log.eval.eval_id = f"benchmark-{index}"
+        write_eval_log(log, str(log_dir / f"2025-01-01T00-00-00+00-00_task_{index:06d}.eval"))
+
+
+def timed(label: str, read: Callable[[], pd.DataFrame]) -> None:
+    start = time.perf_counter()
+    rows = len(read())
+    print(f"{label:<28} {time.perf_counter() - start:6.2f}s  ({rows} rows)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logs", type=int, default=2000, help="Number of logs in the directory (default: 2000)")
+    parser.add_argument("--added", type=int, default=20, help="Logs added before the last read (default: 20)")
+    args = parser.parse_args()
+
+    # the integration is installed, but is not needed to write the template log
+    os.environ |= {
+        "WANDB_ENTITY": "benchmark",
+        "WANDB_PROJECT": "benchmark",
+        "INSPECT_WANDB_MODELS_ENABLED": "false",
+        "INSPECT_WANDB_WEAVE_ENABLED": "false",
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        work = Path(tmp)
+        task = Task(dataset=[Sample(input="Say hello", target="Hello World")], solver=generate())
+        [template] = inspect_eval(task, model="mockllm/model", display="none", log_dir=str(work / "template"))
+        template = read_eval_log(template.location)
+        log_dir = work / "logs"
+        log_dir.mkdir()
+        write_logs(template, log_dir, 0, args.logs)
+
+        cache = EvalsCache(work / "cache")
+        timed("evals_df", lambda: evals_df(str(log_dir), quiet=True))
+        timed("cache (cold)", lambda: cache.evals_df([str(log_dir)]))
+        timed("cache (warm)", lambda: cache.evals_df([str(log_dir)]))
+        write_logs(template, log_dir, args.logs, args.added)
+        timed(f"cache (warm, {args.added} new logs)", lambda: cache.evals_df([str(log_dir)]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Time from the start of an eval to its first sample, with both integrations enabled and client setup taking a fixed time.
+
+There is no network here, so `wandb.setup` (starting the wandb service), `wandb.init` (creating the run), the Weave trace
+server connection and `weave.init` (creating the project) are replaced by stubs that sleep for the given latencies, and the
+Weave evaluation logger by a mock. Each mode runs in its own process, so that the hooks and clients start from scratch.
+
+    python benchmarks/time_to_first_sample.py --setup 1.5 --init 0.5 --weave-connect 0.5 --weave 0.5
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from inspect_ai import Task, eval as inspect_eval
+from inspect_ai.dataset import Sample
+from inspect_ai.scorer import exact
+from inspect_ai.solver import Generate, TaskState, generate, solver
+
+first_sample: list[float] = []
+
+
+@solver
+def record_first_sample():
+    async def solve(state: TaskState, generate: Generate) -> TaskState:
+        if not first_sample:
+            first_sample.append(time.perf_counter())
+        return state
+    return solve
+
+
+class FakeWandb:
+    """
+    wandb.init starts the wandb service first, unless wandb.setup already has.
+    """
+
+    def __init__(self, setup: float, init: float):
+        self.setup_seconds = setup
+        self.init_seconds = init
+        self.service = threading.Lock()
+        self.service_started = False
+
+    def setup(self) -> None:
+        with self.service:
+            if not self.service_started:
+                time.sleep(self.setup_seconds)
+                self.service_started = True
+
+    def init(self, **kwargs) -> MagicMock:
+        self.setup()
+        time.sleep(self.init_seconds)
+        return MagicMock()
+
+
+class FakeWeave:
+    """
+    weave.init connects to the trace server first, unless the background setup already has, then creates the project.
+    """
+
+    def __init__(self, connect: float, init: float):
+        self.connect_seconds = connect
+        self.init_seconds = init
+        self.connection = threading.Lock()
+        self.connected = False
+
+    def connect(self) -> None:
+        with self.connection:
+            if not self.connected:
+                time.sleep(self.connect_seconds)
+                self.connected = True
+
+    def get_server(self, api_key: str | None = None) -> MagicMock:
+        server = MagicMock()
+        server.server_info.side_effect = self.connect
+        return server
+
+    def init(self, *args, **kwargs) -> MagicMock:
+        self.connect()
+        time.sleep(self.init_seconds)
+        return MagicMock()
+
+
+def run_once(setup: float, init: float, weave_connect: float, weave_init: float) -> float:
+    task = Task(
+        dataset=[Sample(input="Say hello", target="Hello World")],
+        solver=[record_first_sample(), generate()],
+        scorer=exact(),
+    )
+    wandb = FakeWandb(setup, init)
+    weave = FakeWeave(weave_connect, weave_init)
+    with (
+        patch("inspect_wandb.models.hooks.wandb.setup", wandb.setup),
+        patch("inspect_wandb.models.hooks.wandb.init", wandb.init),
+        patch("inspect_wandb.weave.hooks.weave_wandb_api_key", MagicMock(return_value="benchmark")),
+        patch("inspect_wandb.weave.hooks.init_weave_get_server", weave.get_server),
+        patch("inspect_wandb.weave.hooks.weave.init", weave.init),
+        patch("inspect_wandb.weave.hooks.get_weave_client", MagicMock(return_value=None)),
+        patch("inspect_wandb.weave.hooks.CustomEvaluationLogger", MagicMock()),
+    ):
+        start = time.perf_counter()
+        inspect_eval(task, model="mockllm/model", display="none")
+    return first_sample[0] - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--setup", type=float, default=1.5, help="Seconds to start the wandb service (default: 1.5)")
+    parser.add_argument("--init", type=float, default=0.5, help="Seconds to create the wandb run once the service is up (default: 0.5)")
+    parser.add_argument("--weave-connect", type=float, default=0.5, help="Seconds to connect to the Weave trace server (default: 0.5)")
+    parser.add_argument("--weave", type=float, default=0.5, help="Seconds for weave.init to create the project once connected (default: 0.5)")
+    parser.add_argument("--background-init", choices=["true", "false"], default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.background_init is not None:
+        print(run_once(args.setup, args.init, args.weave_connect, args.weave))
+        return
+
+    for background_init in ("false", "true"):
+        env = os.environ | {
+            "WANDB_ENTITY": "benchmark",
+            "WANDB_PROJECT": "benchmark",
+            "INSPECT_WANDB_MODELS_BACKGROUND_INIT": background_init,
+            "INSPECT_WANDB_WEAVE_BACKGROUND_INIT": background_init,
+        }
+        result = subprocess.run(
+            [
+                sys.executable, __file__, "--setup", str(args.setup), "--init", str(args.init),
+                "--weave-connect", str(args.weave_connect), "--weave", str(args.weave), "--background-init", background_init,
+            ],
+            env=env, capture_output=True, text=True, check=True,
+        )
+        seconds = float(result.stdout.strip().splitlines()[-1])
+        print(f"background_init={background_init:<5}  time to first sample: {seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
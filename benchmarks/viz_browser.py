@@ -0,0 +1,73 @@
+"""
+Time to render N plots to PNG, launching a browser for each plot (as `inspect_viz.plot.write_png_async` does) versus
+rendering them all in one browser kept open by `BrowserPool`.
+
+Needs the viz extra, a Chromium for playwright (`playwright install chromium`), and network access, since the rendered
+pages load their scripts from a CDN.
+
+    python benchmarks/viz_browser.py --plots 10
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+from inspect_viz import Component, Data
+from inspect_viz.plot import write_png_async
+from inspect_viz.view.beta import scores_heatmap
+from inspect_wandb.viz.browser import BrowserPool
+
+
+def heatmap(tasks: int, models: int) -> Component:
+    df = pd.DataFrame(
+        [
+            {"task_display_name": f"task_{t}", "model": f"model_{m}", "score_headline_value": ((t + 1) * (m + 2) % 10) / 10}
+            for t in range(tasks)
+            for m in range(models)
+        ]
+    )
+    return scores_heatmap(Data.from_dataframe(df), task_name="task_display_name", model_name="model", score_value="score_headline_value")
+
+
+async def cold(plot: Component, plots: int, out: Path) -> float:
+    start = time.perf_counter()
+    for i in range(plots):
+        await write_png_async(out / f"cold_{i}.png", plot)
+    return time.perf_counter() - start
+
+
+async def warm(plot: Component, plots: int, out: Path, size: int) -> tuple[float, float]:
+    pool = BrowserPool(size=size)
+    start = time.perf_counter()
+    try:
+        await pool.write_png(out / "warm_0.png", plot)
+        first = time.perf_counter() - start
+        await asyncio.gather(*(pool.write_png(out / f"warm_{i}.png", plot) for i in range(1, plots)))
+    finally:
+        await pool.close()
+    return first, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plots", type=int, default=10, help="Number of plots to render (default: 10)")
+    parser.add_argument("--pool-size", type=int, default=4, help="Pages rendered at once in the warm browser (default: 4)")
+    parser.add_argument("--tasks", type=int, default=8, help="Tasks in each heatmap (default: 8)")
+    parser.add_argument("--models", type=int, default=4, help="Models in each heatmap (default: 4)")
+    args = parser.parse_args()
+
+    plot = heatmap(args.tasks, args.models)
+    with tempfile.TemporaryDirectory() as out:
+        cold_seconds = asyncio.run(cold(plot, args.plots, Path(out)))
+        first_seconds, warm_seconds = asyncio.run(warm(plot, args.plots, Path(out), args.pool_size))
+
+    print(f"cold browser per plot:  {cold_seconds:.2f}s total, {cold_seconds / args.plots:.2f}s per plot")
+    print(f"warm browser (pool={args.pool_size}):  {warm_seconds:.2f}s total, {first_seconds:.2f}s for the first plot (including launch)")
+    if args.plots > 1:
+        print(f"                        {(warm_seconds - first_seconds) / (args.plots - 1):.2f}s per plot after the first")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import logging
+from pathlib import Path
+
+from inspect_wandb.config.extras_manager import INSTALLED_EXTRAS
+from inspect_wandb.config.settings_loader import SettingsLoader
+from inspect_wandb.models.spool import sync_models_spool
+
+logger = logging.getLogger(__name__)
+
+def _spool_dirs(args: argparse.Namespace) -> tuple[Path | None, list[Path]]:
+    """
+    Returns the Models spool directory and the Weave spool directories to sync: the directory given on the command line,
+    or otherwise the `spool_dir` configured for each integration and, if it exists, the Weave `flush_spill_dir`.
+    """
+    if args.spool_dir is not None:
+        return Path(args.spool_dir), [Path(args.spool_dir)]
+    settings = SettingsLoader.load_inspect_wandb_settings()
+    weave_dirs = [Path(settings.weave.spool_dir)] if settings.weave.spool_dir else []
+    # calls spilled by a timed out flush are written here whether or not the run was spooled
+    spill_dir = Path(settings.weave.flush_spill_dir)
+    if spill_dir.exists() and spill_dir not in weave_dirs:
+        weave_dirs.append(spill_dir)
+    return Path(settings.models.spool_dir) if settings.models.spool_dir else None, weave_dirs
+
+def sync(args: argparse.Namespace) -> int:
+    models_dir, weave_dirs = _spool_dirs(args)
+    if models_dir is None and not weave_dirs:
+        logger.error("No spool directory given and no `spool_dir` configured for either integration")
+        return 1
+
+    if models_dir is not None and args.only in (None, "models"):
+        runs = sync_models_spool(models_dir, workers=args.workers, batch_size=args.batch_size, force=args.force)
+        print(f"Synced {len(runs)} Models runs from {models_dir}")
+
+    if weave_dirs and args.only in (None, "weave"):
+        if not INSTALLED_EXTRAS["weave"]:
+            logger.error("The weave extra is not installed, skipping Weave journals")
+            return 1
+        from inspect_wandb.weave.spool import sync_weave_spool
+
+        for weave_dir in weave_dirs:
+            journals = sync_weave_spool(weave_dir, workers=args.workers, force=args.force)
+            print(f"Synced {len(journals)} Weave runs from {weave_dir}")
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="inspect-wandb", description="Inspect <-> Weights & Biases integration tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sync_parser = subparsers.add_parser("sync", help="Upload runs recorded in spool mode to W&B")
+    sync_parser.add_argument("spool_dir", nargs="?", default=None, help="Spool directory to sync (default: the configured `spool_dir`)")
+    sync_parser.add_argument("--only", choices=["models", "weave"], default=None, help="Only sync one integration")
+    sync_parser.add_argument("--workers", type=int, default=8, help="Number of runs to sync in parallel (default: 8)")
+    sync_parser.add_argument("--batch-size", type=int, default=16, help="Number of Models runs passed to each `wandb sync` call (default: 16)")
+    sync_parser.add_argument("--force", action="store_true", help="Re-sync runs which have already been synced")
+    sync_parser.set_defaults(func=sync)
+    return parser
+
+def main(argv: list[str] | None = None) -> int:
+    logging.basicConfig(level=logging.INFO)
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,4 +1,4 @@
-import importlib
+import importlib.util
 
 class ExtrasManager:
     def __init__(self):
@@ -7,6 +7,7 @@ class ExtrasManager:
     def detect_extras(self) -> dict[str, bool]:
         self._check_for_weave_extra()
         self._check_for_viz_extra()
+        self._check_for_viz_native_extra()
         return self.extras
 
     def _check_for_weave_extra(self) -> None:
@@ -21,4 +22,10 @@ class ExtrasManager:
         else:
             self.extras["viz"] = False
 
+    def _check_for_viz_native_extra(self) -> None:
+        if all(importlib.util.find_spec(module) is not None for module in ("pandas", "PIL", "pyarrow")):
+            self.extras["viz-native"] = True
+        else:
+            self.extras["viz-native"] = False
+
 INSTALLED_EXTRAS = ExtrasManager().detect_extras()
\ No newline at end of file
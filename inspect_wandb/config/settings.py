@@ -1,9 +1,21 @@
+import os
+from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import Any
+from typing import Any, Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic_settings.sources import PydanticBaseSettingsSource, PyprojectTomlConfigSettingsSource
 from inspect_wandb.config.wandb_settings_source import WandBSettingsSource
 
+VizPlotName = Literal["scores_heatmap", "scores_by_task", "token_usage", "latency"]
+DEFAULT_VIZ_PLOTS: list[VizPlotName] = ["scores_heatmap"]
+
+def default_viz_cache_dir() -> str:
+    """
+    The user's cache directory for the eval log headers read for plots, shared by the runs in every working directory.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return str(Path(cache_home) / "inspect_wandb" / "viz")
+
 class ModelsSettings(BaseSettings):
     """
     Settings model for the Models integration.
@@ -23,7 +35,25 @@ class ModelsSettings(BaseSettings):
     entity: str = Field(alias="WANDB_ENTITY", description="Entity to write to for the Models integration")
     config: dict[str, Any] | None = Field(default=None, description="Configuration to pass directly to wandb.config for the Models integration")
     files: list[str] | None = Field(default=None, description="Files to upload to the models run. Paths should be relative to the wandb directory.")
+    upload_workers: int = Field(default=8, ge=1, description="Maximum number of files fingerprinted concurrently at the end of the run")
     viz: bool = Field(default=False, description="Whether to enable the inspect_viz extra")
+    viz_backend: Literal["browser", "native"] = Field(default="browser", description="How viz plots are rendered: with inspect_viz in a headless browser (needs the viz extra and Chromium), or natively in Python with Pillow, which needs no browser")
+    viz_plots: list[VizPlotName] | None = Field(default=DEFAULT_VIZ_PLOTS, description="Plots to log to the Models run at the end of the run, or None for every plot the viz backend can draw. The token_usage and latency plots read every sample of the run's logs (default: the scores heatmap only)")
+    viz_concurrency: int = Field(default=4, ge=1, description="Maximum number of plots rendered at once")
+    viz_cache_dir: str | None = Field(default_factory=default_viz_cache_dir, description="Local directory caching the eval log headers read for plots, so that only new or changed logs are read (default: inspect_wandb/viz in the user's cache directory, $XDG_CACHE_HOME or ~/.cache). Set to None to read every log at the end of each run")
+    viz_update_interval: float | None = Field(default=None, gt=0, description="If set, plots are also updated from the logs of the tasks finished so far as each task ends, at most once every this many minutes")
+    log_batch_size: int = Field(default=1, ge=1, description="Number of per-sample metric points to buffer before writing them to the Models run")
+    log_flush_interval: float = Field(default=5.0, gt=0, description="Maximum number of seconds buffered per-sample metric points are held before being written to the Models run")
+    quantile_log_interval: int = Field(default=100, ge=1, description="Number of samples per task and model between logging live p50/p90/p99 of sample latency and token usage")
+    throughput_log_interval: float = Field(default=10.0, gt=0, description="Minimum number of seconds between throughput and concurrency points for each task")
+    log_sample_table: bool = Field(default=False, description="Whether to log a per-sample table (id, epoch, scores, tokens, time, error) to the Models run")
+    sample_table_chunk_size: int = Field(default=1000, ge=1, description="Number of sample table rows held before they are committed to the run as a new table increment")
+    sample_table_columns: list[Literal["id", "epoch", "scores", "input_tokens", "output_tokens", "total_tokens", "total_time", "working_time", "error"]] | None = Field(default=None, description="Columns to include in the per-sample table, in addition to task and model (default: all columns)")
+    background_init: bool = Field(default=True, description="Whether to start the wandb service in the background when the run starts, instead of when the first task starts")
+    background_logging: bool = Field(default=False, description="Whether to hand client calls to a background worker thread instead of making them inline in the Inspect hooks")
+    queue_size: int = Field(default=10000, ge=1, description="Maximum number of pending events held for the background worker")
+    backpressure: Literal["block", "drop_oldest", "drop_new"] = Field(default="block", description="What to do when the background worker queue is full: block the hook, drop the oldest pending event, or drop the new event. Only metric points and table rows are dropped, other events always block")
+    spool_dir: str | None = Field(default=None, description="If set, record the run to this local directory instead of sending it to W&B. Spooled runs are uploaded later with `inspect-wandb sync`")
 
     @classmethod
     def settings_customise_sources(
@@ -68,6 +98,20 @@ class WeaveSettings(BaseSettings):
 
     autopatch: bool = Field(default=False, description="Whether to automatically patch Inspect with Weave calls for tracing")
     sample_name_template: str = Field(default="{task_name}-sample-{sample_id}-epoch-{epoch}", description="Template for sample display names. Available variables: {task_name}, {sample_id}, {epoch}")
+    trace_sample_rate: float = Field(default=1.0, ge=0, le=1, description="Fraction of samples traced when autopatching. Samples are chosen by a hash of their id and epoch, so reruns trace the same samples")
+    trace_failures: bool = Field(default=True, description="Whether to always record a sample call for samples that error or are scored incorrect, even when trace sampling leaves them out")
+    stream_predictions: bool = Field(default=False, description="Whether to release each prediction as soon as it finishes and summarise scores with running aggregates, so memory does not grow with the number of samples")
+    batch_scores: bool = Field(default=False, description="Whether to submit all scores and metrics of a sample as the output of its prediction call, instead of creating one scorer call per score")
+    intern_inputs: bool = Field(default=False, description="Whether to store each distinct sample input once as a Weave object and refer to it from calls, so inputs repeated across epochs are only uploaded once. Calls are then always made by the background worker, as with background_logging")
+    max_payload_bytes: int | None = Field(default=None, ge=1, description="If set, sample inputs, outputs, scores and metadata larger than this many bytes are stored once as content-addressed Weave objects and referenced from calls, instead of being sent inline. Calls are then always made by the background worker, as with background_logging")
+    background_init: bool = Field(default=True, description="Whether to find the W&B credentials for Weave and connect to the trace server in the background when the run starts. The Weave client is always initialized when the first task starts, once its metadata is known")
+    background_logging: bool = Field(default=False, description="Whether to hand client calls to a background worker thread instead of making them inline in the Inspect hooks")
+    queue_size: int = Field(default=10000, ge=1, description="Maximum number of pending events held for the background worker")
+    backpressure: Literal["block", "drop_oldest", "drop_new"] = Field(default="block", description="What to do when the background worker queue is full: block the hook, drop the oldest pending event, or drop the new event. Only metric points and table rows are dropped, other events always block")
+    spool_dir: str | None = Field(default=None, description="If set, record the run to this local directory instead of sending it to W&B. Spooled runs are uploaded later with `inspect-wandb sync`")
+    flush_timeout: float | None = Field(default=None, ge=0, description="If set, the longest time in seconds to wait at the end of the run for pending Weave calls to be sent. Calls still queued after this are spilled to `flush_spill_dir`")
+    flush_workers: int = Field(default=8, ge=1, description="Number of threads sending batches of pending Weave calls at the end of the run")
+    flush_spill_dir: str = Field(default="wandb-spool", description="Local directory that calls left unsent by `flush_timeout` are written to. They are uploaded later with `inspect-wandb sync`")
 
     @classmethod
     def settings_customise_sources(
@@ -0,0 +1,150 @@
+import logging
+import math
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+
+from inspect_ai.scorer import CORRECT, INCORRECT, NOANSWER, PARTIAL, Value, value_to_float
+
+logger = logging.getLogger(__name__)
+
+def format_metric_segment(value: str) -> str:
+    """
+    Format a task or model name for use as one segment of a wandb metric name.
+    wandb groups metrics into panel sections by `/`, so slashes inside a segment are replaced.
+    """
+    return value.replace("/", "__")
+
+def metric_namespace(task: str, model: str, epoch: int) -> str:
+    return f"{format_metric_segment(task)}/{format_metric_segment(model)}/epoch_{epoch}"
+
+_to_float = value_to_float()
+
+def score_to_float(value: str) -> float | None:
+    """
+    The number a string score stands for: its value if it is a number (such as "-0.5" or "1e-3"), or what
+    `value_to_float` converts it to (such as 1.0 for "C" or 0.5 for "P"). None if it is neither, as `value_to_float`
+    would score it 0 with a warning.
+    """
+    try:
+        number = float(value)
+    except ValueError:
+        pass
+    else:
+        # "nan" and "inf" parse as numbers, but are categories rather than scores to average
+        return number if math.isfinite(number) else None
+    if value in (CORRECT, INCORRECT, PARTIAL, NOANSWER) or value.lower() in ("yes", "true", "no", "false"):
+        return _to_float(value)
+    return None
+
+@dataclass
+class AccuracyAggregate:
+    """
+    Streaming accuracy for a single (task, model, epoch) key, logged under its own metric namespace
+    with its own sample-count step metric.
+    """
+    namespace: str
+    correct: int = 0
+    total: int = 0
+
+    @property
+    def samples_metric(self) -> str:
+        return f"{self.namespace}/samples"
+
+    @property
+    def accuracy_metric(self) -> str:
+        return f"{self.namespace}/accuracy"
+
+    @property
+    def accuracy(self) -> float:
+        if self.total == 0:
+            return 0.0
+        return self.correct * 1.0 / self.total
+
+    def update(self, correct: bool) -> None:
+        self.total += 1
+        self.correct += int(correct)
+
+    def point(self) -> dict[str, int | float]:
+        return {self.samples_metric: self.total, self.accuracy_metric: self.accuracy}
+
+@dataclass
+class RunningStats:
+    """
+    Welford's online algorithm for the mean and variance of a stream of values.
+    """
+    count: int = 0
+    mean: float = 0.0
+    _m2: float = 0.0
+
+    def update(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self) -> float:
+        if self.count < 2:
+            return 0.0
+        return self._m2 / (self.count - 1)
+
+    @property
+    def stderr(self) -> float:
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(self.variance / self.count)
+
+@dataclass
+class ScoreAggregate:
+    """
+    Streaming aggregates for a single scorer. Numeric values (including bools, and strings such as "C" and "I"
+    which `value_to_float` converts) are tracked with Welford mean/variance, and other string values as category frequencies. Mapping values are aggregated per key, and
+    single-element sequences are unwrapped, mirroring the shapes handled by `format_score_types`.
+    """
+    namespace: str
+    max_categories: int = 20
+    numeric: dict[str | None, RunningStats] = field(default_factory=dict)
+    categories: dict[str | None, dict[str, int]] = field(default_factory=dict)
+
+    def update(self, value: Value) -> None:
+        if isinstance(value, Mapping):
+            for key, item in value.items():
+                self._update_key(str(key), item)
+        elif isinstance(value, Sequence) and not isinstance(value, str):
+            if len(value) != 1:
+                logger.debug(f"Skipping sequence score of length {len(value)} for {self.namespace}")
+                return
+            self._update_key(None, value[0])
+        else:
+            self._update_key(None, value)
+
+    def point(self) -> dict[str, int | float]:
+        point: dict[str, int | float] = {}
+        for key, stats in self.numeric.items():
+            prefix = self._prefix(key)
+            point[f"{prefix}/mean"] = stats.mean
+            point[f"{prefix}/stderr"] = stats.stderr
+            point[f"{prefix}/count"] = stats.count
+        for key, counts in self.categories.items():
+            prefix = self._prefix(key)
+            total = sum(counts.values())
+            for category, count in counts.items():
+                point[f"{prefix}/{category}_frac"] = count / total
+        return point
+
+    def _update_key(self, key: str | None, value: str | int | float | bool | None) -> None:
+        if value is None:
+            return
+        if isinstance(value, str) and (number := score_to_float(value)) is not None:
+            self.numeric.setdefault(key, RunningStats()).update(number)
+        elif isinstance(value, str):
+            counts = self.categories.setdefault(key, {})
+            category = format_metric_segment(value)
+            if category not in counts and len(counts) >= self.max_categories:
+                category = "other"
+            counts[category] = counts.get(category, 0) + 1
+        else:
+            self.numeric.setdefault(key, RunningStats()).update(float(value))
+
+    def _prefix(self, key: str | None) -> str:
+        return self.namespace if key is None else f"{self.namespace}/{format_metric_segment(key)}"
@@ -0,0 +1,117 @@
+import glob
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import wandb
+from wandb.sdk.wandb_run import Run
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_NAME = "inspect-files"
+ARTIFACT_TYPE = "inspect-files"
+_CHUNK_SIZE = 1024 * 1024
+
+@dataclass
+class UploadStats:
+    files_logged: int = 0
+    files_failed: int = 0
+    bytes_logged: int = 0
+    digests: dict[str, str] = field(default_factory=dict)
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "files/files_logged": self.files_logged,
+            "files/files_failed": self.files_failed,
+            "files/bytes_logged": self.bytes_logged,
+            "files/sha256": self.digests,
+        }
+
+def expand_files(patterns: list[str], root: Path | None = None) -> list[Path]:
+    """
+    Expand the configured `files` entries (paths, folders or glob patterns, relative to `root`) into a sorted list of files.
+    Folders are walked without following symlinks, so symlink loops cannot cause an unbounded walk, and each file is returned once.
+    """
+    root = root or Path.cwd()
+    files: set[Path] = set()
+    for pattern in patterns:
+        for match in glob.glob(str(root / pattern), recursive=True):
+            path = Path(match)
+            if path.is_dir() and not path.is_symlink():
+                for dirpath, _, filenames in os.walk(path, followlinks=False):
+                    files.update(Path(dirpath) / filename for filename in filenames)
+            elif path.is_file():
+                files.add(path)
+    return sorted(path for path in files if path.is_file())
+
+def fingerprint(path: Path) -> tuple[str, int]:
+    """
+    Returns the sha256 hex digest and size in bytes of a file.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(_CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+class FileUploader:
+    """
+    Uploads files to a Models run as a single `inspect-files` artifact logged by the run, keeping each file's path relative to `root`.
+
+    W&B stores artifact files by checksum, so files already uploaded to the project by an earlier run are not sent again, and a run
+    whose files are all unchanged reuses the latest version of the artifact. Each file is also fingerprinted with sha256, and the
+    mapping from its path to its digest is written to the run summary under `files/sha256` and to the artifact's metadata.
+    Fingerprinting runs on a pool of at most `max_workers` threads.
+    """
+
+    def __init__(self, run: Run, max_workers: int = 8):
+        self.run = run
+        self.max_workers = max_workers
+        self.stats = UploadStats()
+
+    def upload(self, patterns: list[str], root: Path | None = None) -> UploadStats:
+        root = root or Path.cwd()
+        files = expand_files(patterns, root)
+        artifact = wandb.Artifact(ARTIFACT_NAME, type=ARTIFACT_TYPE)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inspect-wandb-upload") as pool:
+            for path, fingerprinted in zip(files, pool.map(self._fingerprint, files)):
+                if fingerprinted is None:
+                    self.stats.files_failed += 1
+                    continue
+                relative_path = str(path.relative_to(root) if path.is_relative_to(root) else Path(path.name))
+                try:
+                    artifact.add_file(str(path), name=relative_path)
+                except Exception as e:
+                    logger.warning(f"Failed to add {path} to the Models run files: {e}")
+                    self.stats.files_failed += 1
+                    continue
+                digest, size = fingerprinted
+                self.stats.digests[relative_path] = digest
+                self.stats.files_logged += 1
+                self.stats.bytes_logged += size
+        if not self.stats.digests:
+            return self.stats
+        artifact.metadata = {"sha256": self.stats.digests}
+        try:
+            self.run.log_artifact(artifact)
+        except Exception as e:
+            logger.warning(f"Failed to upload files to the Models run: {e}")
+            self.stats.files_failed += self.stats.files_logged
+            self.stats.files_logged = 0
+            self.stats.bytes_logged = 0
+            return self.stats
+        logger.info(f"Logged {self.stats.files_logged} files ({self.stats.bytes_logged} bytes) to the {ARTIFACT_NAME} artifact")
+        return self.stats
+
+    def _fingerprint(self, path: Path) -> tuple[str, int] | None:
+        try:
+            return fingerprint(path)
+        except Exception as e:
+            logger.warning(f"Failed to read {path} for upload to the Models run: {e}")
+            return None
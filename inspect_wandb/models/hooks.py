@@ -1,13 +1,27 @@
+import asyncio
 import logging
+import time
+from typing import TYPE_CHECKING, Any
 from typing_extensions import override
 
 import wandb
-from inspect_ai.hooks import Hooks, RunEnd, RunStart, SampleEnd, TaskStart, TaskEnd
+from inspect_ai.hooks import Hooks, RunEnd, RunStart, SampleEnd, SampleStart, TaskStart, TaskEnd
+from inspect_ai._util.constants import DEFAULT_MAX_CONNECTIONS
 from inspect_ai.log import EvalSample
 from inspect_ai.scorer import CORRECT
 from inspect_wandb.config.settings_loader import SettingsLoader
 from inspect_wandb.config.settings import ModelsSettings
 from inspect_wandb.config.extras_manager import INSTALLED_EXTRAS
+from inspect_wandb.models.metric_buffer import MetricBuffer
+from inspect_wandb.models.aggregates import AccuracyAggregate, ScoreAggregate, format_metric_segment, metric_namespace
+from inspect_wandb.models.sketch import SampleQuantiles
+from inspect_wandb.models.throughput import ThroughputTracker
+from inspect_wandb.models.spool import models_spool_path
+from inspect_wandb.models.file_uploader import FileUploader, UploadStats
+from inspect_wandb.models.sample_table import SampleTable
+from inspect_wandb.telemetry import TelemetryDispatcher
+if TYPE_CHECKING:
+    from inspect_wandb.viz.writer import VizWriter
 if INSTALLED_EXTRAS["viz"]:
     from inspect_wandb.viz.inspect_viz_writer import InspectVizWriter
 
@@ -20,17 +34,26 @@ class Metric:
 class WandBModelHooks(Hooks):
 
     settings: ModelsSettings | None = None
+    metric_buffer: MetricBuffer | None = None
+    sample_table: SampleTable | None = None
+    dispatcher: TelemetryDispatcher | None = None
+    viz_writer: "VizWriter | None" = None
 
+    _service_init: "asyncio.Task[Any] | None" = None
     _correct_samples: int = 0
     _total_samples: int = 0
     _wandb_initialized: bool = False
     _hooks_enabled: bool | None = None
 
     def __init__(self):
-        if INSTALLED_EXTRAS["viz"]:
-            self.viz_writer = InspectVizWriter()
-        else:
-            self.viz_writer = None
+        self._task_info: dict[str, tuple[str, str]] = {}
+        self._accuracy_aggregates: dict[tuple[str, str, int], AccuracyAggregate] = {}
+        self._sample_quantiles: dict[tuple[str, str], SampleQuantiles] = {}
+        self._scored_samples: dict[tuple[str, str], int] = {}
+        self._score_aggregates: dict[tuple[str, str, str], ScoreAggregate] = {}
+        self._throughput: dict[str, ThroughputTracker] = {}
+        self._defined_throughput_metrics: set[str] = set()
+        self._upload_stats: UploadStats | None = None
 
     @override
     def enabled(self) -> bool:
@@ -41,24 +64,52 @@ class WandBModelHooks(Hooks):
     @override
     async def on_run_start(self, data: RunStart) -> None:
         self._load_settings()
-        # Note: wandb.init() moved to lazy initialization in on_task_start
+        assert self.settings is not None
+        # wandb.init() is deferred to on_task_start, where the task metadata can still disable the integration, but the wandb
+        # service process it needs is started now, while Inspect sets up the tasks (datasets, sandboxes, ...)
+        if self.settings.background_init and not self._wandb_initialized and self._service_init is None:
+            self._service_init = asyncio.create_task(asyncio.to_thread(wandb.setup))
     
     @override
     async def on_run_end(self, data: RunEnd) -> None:
+        service_init, self._service_init = self._service_init, None
         # Only proceed with cleanup if WandB was actually initialized
         if not self._wandb_initialized:
+            if service_init is not None:
+                await self._await_service_init(service_init)
             return
 
-        self._log_summary(data)
+        # flush and wait for the background worker (if any) to drain without blocking the event loop. Without one, the
+        # handlers run on this thread instead
+        await asyncio.to_thread(self._close_dispatcher, self._get_dispatcher())
 
-        if self.settings is not None and self.settings.viz and self.viz_writer is not None:
-            await self.viz_writer.log_scores_heatmap(data, self.run)
+        self._log_summary(data)
 
-        if self.settings is not None and self.settings.files:
-            for file in self.settings.files:
-                 self.run.save(str(file), policy="now")  # TODO: fix wandb Symlinked warning for folder upload
+        try:
+            viz_writer = self._get_viz_writer()
+            if viz_writer is not None:
+                try:
+                    await viz_writer.log_plots(data, self.run)
+                finally:
+                    # the browser belongs to this run's event loop
+                    await viz_writer.close()
+        except Exception as e:
+            # plots are best effort, and must not leave the run unfinished
+            logger.warning(f"Error logging plots: {e}")
+        self.viz_writer = None
 
         self.run.finish()
+        self.dispatcher = None
+        self.metric_buffer = None
+        self.sample_table = None
+        self._task_info.clear()
+        self._accuracy_aggregates.clear()
+        self._sample_quantiles.clear()
+        self._scored_samples.clear()
+        self._score_aggregates.clear()
+        self._throughput.clear()
+        self._defined_throughput_metrics.clear()
+        self._upload_stats = None
 
     @override
     async def on_task_start(self, data: TaskStart) -> None:
@@ -76,9 +127,18 @@ class WandBModelHooks(Hooks):
             logger.info(f"WandB model hooks disabled for run (task: {data.spec.task})")
             return
         
+        if self._service_init is not None and not self._wandb_initialized:
+            await self._await_service_init(self._service_init)
+
         # Lazy initialization: only init WandB when first task starts
         if not self._wandb_initialized:
-            self.run = wandb.init(id=data.run_id, entity=self.settings.entity, project=self.settings.project) 
+            if self.settings.spool_dir is not None:
+                # spool mode: let wandb journal the run locally, to be uploaded later by `inspect-wandb sync`
+                spool_path = models_spool_path(self.settings.spool_dir)
+                spool_path.mkdir(parents=True, exist_ok=True)
+                self.run = wandb.init(id=data.run_id, entity=self.settings.entity, project=self.settings.project, mode="offline", dir=spool_path)
+            else:
+                self.run = wandb.init(id=data.run_id, entity=self.settings.entity, project=self.settings.project) 
 
             if self.settings.config:
                 self.run.config.update(self.settings.config)
@@ -87,6 +147,14 @@ class WandBModelHooks(Hooks):
             self._wandb_initialized = True
             logger.info(f"WandB initialized for task {data.spec.task}")
         
+        self._task_info[data.eval_id] = (data.spec.task, data.spec.model)
+        max_concurrency = (
+            data.spec.config.max_samples
+            or data.spec.model_generate_config.max_connections
+            or DEFAULT_MAX_CONNECTIONS
+        )
+        self._get_throughput_tracker(data.eval_id, max_concurrency)
+
         inspect_tags = (
             f"inspect_task:{data.spec.task}",
             f"inspect_model:{data.spec.model}",
@@ -100,23 +168,204 @@ class WandBModelHooks(Hooks):
     
     @override
     async def on_task_end(self, data: TaskEnd) -> None:
+        if self._hooks_enabled and (tracker := self._throughput.pop(data.eval_id, None)) is not None:
+            self._log_throughput(tracker)
+        if self.dispatcher is not None:
+            await asyncio.to_thread(self.dispatcher.dispatch, "flush")
+
+        if self._hooks_enabled and self.settings is not None and self.settings.viz_update_interval is not None:
+            try:
+                if (viz_writer := self._get_viz_writer()) is not None:
+                    await viz_writer.update_plots(data, self.settings.viz_update_interval * 60)
+            except Exception as e:
+                logger.warning(f"Error updating plots: {e}")
+
         if data.log.eval.metadata is None:
             data.log.eval.metadata = {"wandb_run_url": self.run.url}
         else:
             data.log.eval.metadata["wandb_run_url"] = self.run.url
 
+    @override
+    async def on_sample_start(self, data: SampleStart) -> None:
+        if not self._hooks_enabled:
+            return
+
+        self._get_throughput_tracker(data.eval_id).sample_started()
+
     @override
     async def on_sample_end(self, data: SampleEnd) -> None:
         # Skip if hooks are disabled for this run
         if not self._hooks_enabled:
             return
             
+        correct = self._is_correct(data.sample)
         self._total_samples += 1
+        self._correct_samples += int(correct)
+        aggregate = self._get_accuracy_aggregate(data.eval_id, data.sample.epoch)
+        aggregate.update(correct)
         if data.sample.scores:
-            self._correct_samples += int(self._is_correct(data.sample))
-            self.run.log(
-                {Metric.SAMPLES: self._total_samples, Metric.ACCURACY: self._accuracy()}
+            self._get_dispatcher().dispatch(
+                "metrics",
+                point={Metric.SAMPLES: self._total_samples, Metric.ACCURACY: self._accuracy()}
+                | aggregate.point()
+                | self._update_score_aggregates(data.eval_id, data.sample)
+            )
+
+        assert self.settings is not None
+        if self.settings.log_sample_table:
+            task, model = self._task_info.get(data.eval_id, ("unknown_task", "unknown_model"))
+            self._get_dispatcher().dispatch("sample_row", task=task, model=model, sample=data.sample)
+
+        quantiles = self._get_sample_quantiles(data.eval_id)
+        quantiles.update(data.sample)
+        if quantiles.samples % self.settings.quantile_log_interval == 0:
+            self._get_dispatcher().dispatch("metrics", point=quantiles.point())
+
+        tracker = self._get_throughput_tracker(data.eval_id)
+        now = time.monotonic()
+        tracker.sample_completed(
+            tokens=sum(usage.total_tokens for usage in data.sample.model_usage.values()),
+            now=now,
+        )
+        if now - tracker.last_logged >= self.settings.throughput_log_interval:
+            tracker.last_logged = now
+            self._log_throughput(tracker)
+
+        # without background logging, a due batch of points is written off the event loop
+        if self.metric_buffer is not None and not self.metric_buffer.flush_on_add and self.metric_buffer.flush_due():
+            await asyncio.to_thread(self.metric_buffer.flush)
+
+    async def _await_service_init(self, service_init: "asyncio.Task[Any]") -> None:
+        try:
+            await service_init
+        except Exception as e:
+            # wandb.init starts the service itself if it is not running
+            logger.warning(f"Failed to start the wandb service at run start: {e}")
+
+    def _get_accuracy_aggregate(self, eval_id: str, epoch: int) -> AccuracyAggregate:
+        task, model = self._task_info.get(eval_id, ("unknown_task", "unknown_model"))
+        key = (task, model, epoch)
+        aggregate = self._accuracy_aggregates.get(key)
+        if aggregate is None:
+            aggregate = AccuracyAggregate(namespace=metric_namespace(task, model, epoch))
+            self._accuracy_aggregates[key] = aggregate
+            self._get_dispatcher().dispatch(
+                "define_metric", name=aggregate.accuracy_metric, step_metric=aggregate.samples_metric
             )
+        return aggregate
+
+    def _update_score_aggregates(self, eval_id: str, sample: EvalSample) -> dict[str, int | float]:
+        assert sample.scores is not None
+        task, model = self._task_info.get(eval_id, ("unknown_task", "unknown_model"))
+        namespace = f"{format_metric_segment(task)}/{format_metric_segment(model)}/scores"
+        if (task, model) not in self._scored_samples:
+            self._scored_samples[(task, model)] = 0
+            self._get_dispatcher().dispatch("define_metric", name=f"{namespace}/*", step_metric=f"{namespace}/samples")
+        self._scored_samples[(task, model)] += 1
+
+        point: dict[str, int | float] = {f"{namespace}/samples": self._scored_samples[(task, model)]}
+        for scorer, score in sample.scores.items():
+            aggregate = self._score_aggregates.get((task, model, scorer))
+            if aggregate is None:
+                aggregate = ScoreAggregate(namespace=f"{namespace}/{format_metric_segment(scorer)}")
+                self._score_aggregates[(task, model, scorer)] = aggregate
+            aggregate.update(score.value)
+            point.update(aggregate.point())
+        return point
+
+    def _get_sample_quantiles(self, eval_id: str) -> SampleQuantiles:
+        key = self._task_info.get(eval_id, ("unknown_task", "unknown_model"))
+        quantiles = self._sample_quantiles.get(key)
+        if quantiles is None:
+            quantiles = SampleQuantiles.for_task(*key)
+            self._sample_quantiles[key] = quantiles
+            self._get_dispatcher().dispatch(
+                "define_metric", name=f"{quantiles.namespace}/*", step_metric=quantiles.samples_metric
+            )
+        return quantiles
+
+    def _get_throughput_tracker(self, eval_id: str, max_concurrency: int | None = None) -> ThroughputTracker:
+        tracker = self._throughput.get(eval_id)
+        if tracker is None:
+            task, model = self._task_info.get(eval_id, ("unknown_task", "unknown_model"))
+            tracker = ThroughputTracker(
+                namespace=f"{format_metric_segment(task)}/{format_metric_segment(model)}/throughput",
+                max_concurrency=max_concurrency,
+            )
+            self._throughput[eval_id] = tracker
+        return tracker
+
+    def _log_throughput(self, tracker: ThroughputTracker) -> None:
+        if tracker.namespace not in self._defined_throughput_metrics:
+            self._defined_throughput_metrics.add(tracker.namespace)
+            self._get_dispatcher().dispatch("define_metric", name=f"{tracker.namespace}/*", step_metric=tracker.samples_metric)
+        self._get_dispatcher().dispatch("metrics", point=tracker.point())
+
+    def _get_dispatcher(self) -> TelemetryDispatcher:
+        if self.dispatcher is None:
+            assert self.settings is not None
+            self.dispatcher = TelemetryDispatcher(
+                handlers={
+                    "metrics": self._handle_metrics,
+                    "sample_row": self._handle_sample_row,
+                    "define_metric": self._handle_define_metric,
+                    "flush": self._handle_flush,
+                    "upload_files": self._handle_upload_files,
+                },
+                name="inspect-wandb-models",
+                background=self.settings.background_logging,
+                maxsize=self.settings.queue_size,
+                backpressure=self.settings.backpressure,
+                droppable={"metrics", "sample_row"},
+            )
+        return self.dispatcher
+
+    def _close_dispatcher(self, dispatcher: TelemetryDispatcher) -> None:
+        dispatcher.dispatch("flush")
+        if self.settings is not None and self.settings.files:
+            dispatcher.dispatch("upload_files", patterns=[str(file) for file in self.settings.files])
+        dispatcher.close()
+
+    def _handle_metrics(self, point: dict[str, Any]) -> None:
+        self._get_metric_buffer().add(point)
+
+    def _handle_define_metric(self, name: str, step_metric: str) -> None:
+        self.run.define_metric(name=name, step_metric=step_metric)
+
+    def _handle_sample_row(self, task: str, model: str, sample: EvalSample) -> None:
+        self._get_sample_table().add(task, model, sample)
+
+    def _handle_flush(self) -> None:
+        if self.metric_buffer is not None:
+            self.metric_buffer.flush()
+        if self.sample_table is not None:
+            self.sample_table.commit()
+
+    def _handle_upload_files(self, patterns: list[str]) -> None:
+        assert self.settings is not None
+        uploader = FileUploader(self.run, max_workers=self.settings.upload_workers)
+        self._upload_stats = uploader.upload(patterns)
+
+    def _get_metric_buffer(self) -> MetricBuffer:
+        if self.metric_buffer is None:
+            assert self.settings is not None
+            self.metric_buffer = MetricBuffer(
+                self.run,
+                batch_size=self.settings.log_batch_size,
+                flush_interval=self.settings.log_flush_interval,
+                flush_on_add=self.settings.background_logging,
+            )
+        return self.metric_buffer
+
+    def _get_sample_table(self) -> SampleTable:
+        if self.sample_table is None:
+            assert self.settings is not None
+            self.sample_table = SampleTable(
+                self.run,
+                chunk_size=self.settings.sample_table_chunk_size,
+                columns=self.settings.sample_table_columns,
+            )
+        return self.sample_table
 
     def _log_summary(self, data: RunEnd) -> None:
         summary = {
@@ -125,6 +374,20 @@ class WandBModelHooks(Hooks):
             "accuracy": self._accuracy(),
             "logs": [log.location for log in data.logs],
         }
+        for aggregate in self._accuracy_aggregates.values():
+            summary.update(aggregate.point())
+        for score_aggregate in self._score_aggregates.values():
+            summary.update(score_aggregate.point())
+        if self._sample_quantiles:
+            run_quantiles = SampleQuantiles(namespace="quantiles")
+            for quantiles in self._sample_quantiles.values():
+                summary.update(quantiles.point())
+                run_quantiles.merge(quantiles)
+            summary.update(run_quantiles.point())
+        if self._upload_stats is not None:
+            summary.update(self._upload_stats.summary())
+        if self.settings is not None and self.settings.background_logging and self.dispatcher is not None:
+            summary.update({f"telemetry/{k}": v for k, v in self.dispatcher.stats.items()})
         self.run.summary.update(summary)
         logger.info(f"WandB Summary: {summary}")
 
@@ -141,6 +404,23 @@ class WandBModelHooks(Hooks):
 
         return self._correct_samples * 1.0 / self._total_samples
 
+    def _get_viz_writer(self) -> "VizWriter | None":
+        if self.settings is None or not self.settings.viz:
+            return None
+        if self.viz_writer is None:
+            if self.settings.viz_backend == "native" and not INSTALLED_EXTRAS["viz-native"]:
+                logger.warning("The native viz backend needs the viz-native extra. Install it to log plots")
+            elif self.settings.viz_backend == "native":
+                # needs pandas, Pillow and pyarrow, which only the viz backends use
+                from inspect_wandb.viz.native import NativeVizWriter
+
+                self.viz_writer = NativeVizWriter(self.settings.viz_concurrency, self.settings.viz_cache_dir, self.settings.viz_plots)
+            elif INSTALLED_EXTRAS["viz"]:
+                self.viz_writer = InspectVizWriter(self.settings.viz_concurrency, self.settings.viz_cache_dir, self.settings.viz_plots)
+            else:
+                logger.warning("The browser viz backend needs the viz extra. Install it, or set viz_backend to native")
+        return self.viz_writer
+
     def _check_enable_override(self, data: TaskStart) -> bool|None:
         """
         Check TaskStart metadata to determine if hooks should be enabled
@@ -152,5 +432,5 @@ class WandBModelHooks(Hooks):
     def _load_settings(self) -> None:
         if self.settings is None:
             self.settings = SettingsLoader.load_inspect_wandb_settings(
-                {"weave": {}, "models": {"viz": self.viz_writer is not None}}
+                {"weave": {}, "models": {"viz": INSTALLED_EXTRAS["viz"]}}
             ).models
\ No newline at end of file
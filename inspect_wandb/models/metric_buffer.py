@@ -0,0 +1,74 @@
+import logging
+import time
+from threading import Lock
+from typing import Any
+
+import wandb
+
+logger = logging.getLogger(__name__)
+
+def coalesce(points: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Merge runs of consecutive points which share no metric, keeping the order of the values of each metric.
+    """
+    rows: list[dict[str, Any]] = []
+    for point in points:
+        if rows and rows[-1].keys().isdisjoint(point):
+            rows[-1].update(point)
+        else:
+            rows.append(dict(point))
+    return rows
+
+class MetricBuffer:
+    """
+    Buffers per-sample metric points for the Models run and writes them with `run.log` in batches.
+    A batch is due once `batch_size` points have been buffered, or when a point arrives more than
+    `flush_interval` seconds after the last flush. Points are always logged in the order they were added,
+    so step metrics such as `Metric.SAMPLES` stay monotonic.
+
+    Each metric is plotted against its own step metric, so consecutive points with no metric in common (such as a
+    sample's accuracy point and the throughput point logged after it) are merged into a single `run.log` call. Points
+    from different samples share their step metrics, so this still makes at least one call per sample: batching
+    bounds how often the run is written to, and lets the batch be written away from the caller.
+
+    With `flush_on_add`, a due batch is written by `add` itself, which is used on the background logging worker.
+    Otherwise the caller checks `flush_due` and calls `flush` from another thread, and points may be added while a
+    batch is being written.
+    """
+
+    def __init__(self, run: wandb.Run, batch_size: int = 1, flush_interval: float = 5.0, flush_on_add: bool = True):
+        self.run = run
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.flush_on_add = flush_on_add
+        self._points: list[dict[str, Any]] = []
+        self._last_flush = time.monotonic()
+        # guards the buffered points, and keeps batches written in order
+        self._lock = Lock()
+        self._write_lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def add(self, point: dict[str, Any]) -> None:
+        with self._lock:
+            self._points.append(point)
+        if self.flush_on_add and self.flush_due():
+            self.flush()
+
+    def flush(self) -> None:
+        with self._write_lock:
+            with self._lock:
+                points, self._points = self._points, []
+                self._last_flush = time.monotonic()
+            rows = coalesce(points)
+            for row in rows:
+                self.run.log(row)
+        if len(points) > 1:
+            logger.debug(f"Flushed {len(points)} buffered metric points to WandB in {len(rows)} calls")
+
+    def flush_due(self) -> bool:
+        return bool(self._points) and (
+            len(self._points) >= self.batch_size
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        )
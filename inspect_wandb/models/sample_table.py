@@ -0,0 +1,92 @@
+import json
+from typing import Any, Callable, Sequence
+
+import wandb
+from inspect_ai.log import EvalSample
+from wandb.sdk.wandb_run import Run
+
+SAMPLE_TABLE_KEY = "samples_table"
+# increments logged to one table before the next rows start a new one
+SEGMENT_INCREMENTS = 10
+
+def _scores(sample: EvalSample) -> str | None:
+    if not sample.scores:
+        return None
+    return json.dumps({scorer: score.value for scorer, score in sample.scores.items()}, default=str)
+
+def _tokens(field: str) -> Callable[[EvalSample], int]:
+    return lambda sample: sum(getattr(usage, field) or 0 for usage in sample.model_usage.values())
+
+SAMPLE_TABLE_COLUMNS: dict[str, Callable[[EvalSample], Any]] = {
+    "id": lambda sample: str(sample.id),
+    "epoch": lambda sample: sample.epoch,
+    "scores": _scores,
+    "input_tokens": _tokens("input_tokens"),
+    "output_tokens": _tokens("output_tokens"),
+    "total_tokens": _tokens("total_tokens"),
+    "total_time": lambda sample: sample.total_time,
+    "working_time": lambda sample: sample.working_time,
+    "error": lambda sample: sample.error.message if sample.error is not None else None,
+}
+
+class SampleTable:
+    """
+    Streams one row per sample to incremental wandb Tables.
+
+    Rows are committed to the run every `chunk_size` samples as a new increment of the current table, which only writes
+    the rows added since the previous increment. An incremental table keeps all of its rows, and the W&B workspace only
+    displays its latest 100 increments, so after `segment_increments` increments the table is released and the next rows
+    start a new one, logged under `<key>_2`, `<key>_3` and so on. At most `chunk_size * segment_increments` rows are held
+    in memory regardless of the size of the eval.
+    `task` and `model` columns are always included; the remaining columns can be restricted with `columns`.
+    """
+
+    def __init__(
+        self,
+        run: Run,
+        chunk_size: int = 1000,
+        columns: Sequence[str] | None = None,
+        key: str = SAMPLE_TABLE_KEY,
+        segment_increments: int = SEGMENT_INCREMENTS,
+    ):
+        unknown = set(columns or []) - set(SAMPLE_TABLE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown sample table columns: {sorted(unknown)}. Valid columns are {list(SAMPLE_TABLE_COLUMNS)}")
+        self.run = run
+        self.chunk_size = chunk_size
+        self.key = key
+        self.segment_increments = segment_increments
+        self.columns = [column for column in SAMPLE_TABLE_COLUMNS if columns is None or column in columns]
+        self.segment = 1
+        self.table = self._new_table()
+        self.rows_committed = 0
+        self._increments = 0
+        self._uncommitted = 0
+
+    @property
+    def segment_key(self) -> str:
+        return self.key if self.segment == 1 else f"{self.key}_{self.segment}"
+
+    def add(self, task: str, model: str, sample: EvalSample) -> None:
+        self.table.add_data(task, model, *(SAMPLE_TABLE_COLUMNS[column](sample) for column in self.columns))
+        self._uncommitted += 1
+        if self._uncommitted >= self.chunk_size:
+            self.commit()
+
+    def commit(self) -> None:
+        if not self._uncommitted:
+            return
+        self.run.log({self.segment_key: self.table})
+        self.rows_committed += self._uncommitted
+        self._uncommitted = 0
+        self._increments += 1
+        if self._increments >= self.segment_increments:
+            self.segment += 1
+            self.table = self._new_table()
+            self._increments = 0
+
+    def _new_table(self) -> wandb.Table:
+        return wandb.Table(columns=["task", "model", *self.columns], log_mode="INCREMENTAL")
+
+    def __len__(self) -> int:
+        return self._uncommitted
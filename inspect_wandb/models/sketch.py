@@ -0,0 +1,140 @@
+import math
+from dataclasses import dataclass, field
+
+from inspect_ai.log import EvalSample
+
+from inspect_wandb.models.aggregates import format_metric_segment
+
+QUANTILES: tuple[float, ...] = (0.5, 0.9, 0.99)
+
+class DDSketch:
+    """
+    A mergeable quantile sketch with relative-error guarantees (Masson et al., "DDSketch", VLDB 2019).
+
+    Positive values are counted in logarithmically sized buckets, so any quantile estimate is within
+    `relative_accuracy` of the true value. Memory is bounded by `max_buckets`: when exceeded, the lowest
+    buckets are collapsed together, which only affects accuracy for the smallest values.
+    Values <= 0 are counted in a dedicated zero bucket.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets: dict[int, int] = {}
+        self._zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def add(self, value: float) -> None:
+        if value > 0:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self._buckets[key] = self._buckets.get(key, 0) + 1
+            if len(self._buckets) > self.max_buckets:
+                self._collapse()
+        else:
+            self._zero_count += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "DDSketch") -> None:
+        if other._gamma != self._gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for key, count in other._buckets.items():
+            self._buckets[key] = self._buckets.get(key, 0) + count
+        self._zero_count += other._zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(self._buckets) > self.max_buckets:
+            self._collapse()
+
+    def quantile(self, q: float) -> float | None:
+        """
+        Estimate the q-quantile (0 <= q <= 1) of the values added so far, or None if the sketch is empty.
+        """
+        if self.count == 0:
+            return None
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        rank = q * (self.count - 1)
+        seen = self._zero_count
+        if rank < seen:
+            return 0.0 if self.min >= 0 else self.min
+        for key in sorted(self._buckets):
+            seen += self._buckets[key]
+            if rank < seen:
+                estimate = 2 * self._gamma ** key / (self._gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def _collapse(self) -> None:
+        keys = sorted(self._buckets)
+        overflow = len(keys) - self.max_buckets
+        collapsed = sum(self._buckets.pop(key) for key in keys[:overflow])
+        target = keys[overflow]
+        self._buckets[target] += collapsed
+
+SAMPLE_FIELDS: tuple[str, ...] = ("total_time", "working_time", "input_tokens", "output_tokens")
+
+@dataclass
+class SampleQuantiles:
+    """
+    Quantile sketches of wall time, working time and input/output token usage for one (task, model) key.
+    """
+    namespace: str
+    relative_accuracy: float = 0.01
+    max_buckets: int = 2048
+    samples: int = 0
+    sketches: dict[str, DDSketch] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        for name in SAMPLE_FIELDS:
+            self.sketches.setdefault(name, DDSketch(self.relative_accuracy, self.max_buckets))
+
+    @classmethod
+    def for_task(cls, task: str, model: str, relative_accuracy: float = 0.01, max_buckets: int = 2048) -> "SampleQuantiles":
+        return cls(
+            namespace=f"{format_metric_segment(task)}/{format_metric_segment(model)}/quantiles",
+            relative_accuracy=relative_accuracy,
+            max_buckets=max_buckets,
+        )
+
+    @property
+    def samples_metric(self) -> str:
+        return f"{self.namespace}/samples"
+
+    def update(self, sample: EvalSample) -> None:
+        self.samples += 1
+        if sample.total_time is not None:
+            self.sketches["total_time"].add(sample.total_time)
+        if sample.working_time is not None:
+            self.sketches["working_time"].add(sample.working_time)
+        if sample.model_usage:
+            self.sketches["input_tokens"].add(sum(usage.input_tokens for usage in sample.model_usage.values()))
+            self.sketches["output_tokens"].add(sum(usage.output_tokens for usage in sample.model_usage.values()))
+
+    def merge(self, other: "SampleQuantiles") -> None:
+        self.samples += other.samples
+        for name, sketch in other.sketches.items():
+            self.sketches[name].merge(sketch)
+
+    def point(self, quantiles: tuple[float, ...] = QUANTILES) -> dict[str, int | float]:
+        point: dict[str, int | float] = {self.samples_metric: self.samples}
+        for name, sketch in self.sketches.items():
+            for q in quantiles:
+                value = sketch.quantile(q)
+                if value is not None:
+                    point[f"{self.namespace}/{name}_p{round(q * 100)}"] = value
+        return point
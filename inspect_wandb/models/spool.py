@@ -0,0 +1,50 @@
+import logging
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+def models_spool_path(spool_dir: str | Path) -> Path:
+    """
+    Directory passed to `wandb.init(dir=...)` when the Models integration runs in spool mode.
+    wandb writes its offline runs to `offline-run-*` directories under `<dir>/wandb`.
+    """
+    return Path(spool_dir) / "models"
+
+def unsynced_offline_runs(spool_dir: str | Path, force: bool = False) -> list[Path]:
+    root = models_spool_path(spool_dir) / "wandb"
+    if not root.exists():
+        return []
+    return sorted(
+        run_dir for run_dir in root.glob("offline-run-*")
+        # `wandb sync` leaves a `run-<id>.wandb.synced` marker once a run has been uploaded
+        if run_dir.is_dir() and (force or not any(run_dir.glob("*.wandb.synced")))
+    )
+
+def sync_models_spool(spool_dir: str | Path, workers: int = 8, batch_size: int = 16, force: bool = False) -> list[Path]:
+    """
+    Upload every unsynced offline Models run under `spool_dir` with `wandb sync`, returning the runs that were synced.
+    Runs are split into batches of `batch_size`, and up to `workers` batches are synced in parallel.
+    """
+    runs = unsynced_offline_runs(spool_dir, force=force)
+    batches = [runs[i:i + batch_size] for i in range(0, len(runs), batch_size)]
+
+    def sync_batch(batch: list[Path]) -> list[Path]:
+        result = subprocess.run(
+            [sys.executable, "-m", "wandb", "sync", *(str(run_dir) for run_dir in batch)],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if result.returncode != 0:
+            logger.error(f"wandb sync failed for {len(batch)} runs: {result.stderr.strip()}")
+            return []
+        return batch
+
+    synced: list[Path] = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inspect-wandb-sync") as pool:
+        for batch in pool.map(sync_batch, batches):
+            synced.extend(batch)
+    return synced
@@ -0,0 +1,60 @@
+import time
+from collections import deque
+
+class ThroughputTracker:
+    """
+    Tracks in-flight samples and completion throughput for a single task.
+
+    The most recent `window` completions are kept in a fixed-size ring buffer of (timestamp, tokens) pairs,
+    with a running token total, so every update and every `point` is O(1). Rates are computed over the span
+    of the buffered completions, so they reflect recent throughput rather than the whole-task average.
+    """
+
+    def __init__(self, namespace: str, window: int = 256, max_concurrency: int | None = None):
+        self.namespace = namespace
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.completed = 0
+        self._completions: deque[tuple[float, int]] = deque(maxlen=window)
+        self._window_tokens = 0
+        self._last_gap: float | None = None
+        self.last_logged = time.monotonic()
+
+    @property
+    def samples_metric(self) -> str:
+        return f"{self.namespace}/samples"
+
+    def sample_started(self) -> None:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def sample_completed(self, tokens: int = 0, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        self.in_flight = max(self.in_flight - 1, 0)
+        self.completed += 1
+        if self._completions:
+            self._last_gap = now - self._completions[-1][0]
+        if len(self._completions) == self._completions.maxlen:
+            self._window_tokens -= self._completions[0][1]
+        self._completions.append((now, tokens))
+        self._window_tokens += tokens
+
+    def point(self) -> dict[str, int | float]:
+        point: dict[str, int | float] = {
+            self.samples_metric: self.completed,
+            f"{self.namespace}/in_flight": self.in_flight,
+            f"{self.namespace}/max_in_flight": self.max_in_flight,
+        }
+        if self.max_concurrency:
+            point[f"{self.namespace}/concurrency_utilisation"] = self.in_flight / self.max_concurrency
+        if len(self._completions) >= 2:
+            span = self._completions[-1][0] - self._completions[0][0]
+            if span > 0:
+                # the first completion in the window only marks the start of the span
+                point[f"{self.namespace}/samples_per_sec"] = (len(self._completions) - 1) / span
+                point[f"{self.namespace}/tokens_per_sec"] = (self._window_tokens - self._completions[0][1]) / span
+                point[f"{self.namespace}/mean_completion_gap"] = span / (len(self._completions) - 1)
+        if self._last_gap is not None:
+            point[f"{self.namespace}/last_completion_gap"] = self._last_gap
+        return point
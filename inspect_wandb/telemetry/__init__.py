@@ -0,0 +1,3 @@
+from inspect_wandb.telemetry.dispatcher import TelemetryDispatcher, TelemetryEvent, BackpressurePolicy
+
+__all__ = ["TelemetryDispatcher", "TelemetryEvent", "BackpressurePolicy"]
@@ -0,0 +1,191 @@
+import contextvars
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Collection, Literal, Mapping
+
+logger = logging.getLogger(__name__)
+
+BackpressurePolicy = Literal["block", "drop_oldest", "drop_new"]
+
+@dataclass(frozen=True)
+class TelemetryEvent:
+    """
+    An immutable record of a piece of client work (e.g. a `run.log` or a Weave prediction) to be executed by a handler.
+    The context the event was created in is captured so that context-dependent clients (e.g. Weave attributes)
+    behave the same on the worker thread as they would inline.
+    """
+    kind: str
+    payload: Mapping[str, Any]
+    context: contextvars.Context = field(default_factory=contextvars.copy_context, compare=False, repr=False)
+    created: float = field(default_factory=time.monotonic, compare=False)
+
+_STOP = object()
+
+class TelemetryDispatcher:
+    """
+    Dispatches telemetry events to registered handlers.
+
+    When `background` is False, handlers are called inline and exceptions propagate to the caller.
+    When `background` is True, events are put onto a bounded queue and drained in order by a single worker thread,
+    so hooks never block on wandb/weave client calls. If the queue is full, the `backpressure` policy decides
+    whether the caller blocks until there is room, the oldest queued event is dropped, or the new event is dropped.
+    Only events of the `droppable` kinds (data such as metric points) are ever dropped; any other event, such as
+    a flush or the end of a call, is always queued, blocking the caller until there is room if needed.
+    """
+
+    def __init__(
+        self,
+        handlers: dict[str, Callable[..., None]],
+        name: str = "inspect-wandb-telemetry",
+        background: bool = False,
+        maxsize: int = 10000,
+        backpressure: BackpressurePolicy = "block",
+        droppable: Collection[str] = (),
+    ):
+        self.handlers = handlers
+        self.name = name
+        self.background = background
+        self.backpressure = backpressure
+        self.droppable = frozenset(droppable)
+        self._queue: queue.Queue[TelemetryEvent | object] = queue.Queue(maxsize=maxsize)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._processed = 0
+        self._dropped = 0
+        self._failed = 0
+        self._max_queue_depth = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """
+        Queue-depth and throughput counters for the dispatcher.
+        """
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self._max_queue_depth,
+            "submitted": self._submitted,
+            "processed": self._processed,
+            "dropped": self._dropped,
+            "failed": self._failed,
+        }
+
+    def dispatch(self, kind: str, **payload: Any) -> bool:
+        """
+        Dispatch an event to the handler registered for `kind`.
+
+        Returns:
+            False if the event was dropped due to backpressure, True otherwise
+        """
+        if kind not in self.handlers:
+            raise KeyError(f"No telemetry handler registered for event kind '{kind}'")
+        event = TelemetryEvent(kind=kind, payload=MappingProxyType(dict(payload)))
+        self._submitted += 1
+        if not self.background:
+            self.handlers[kind](**event.payload)
+            self._processed += 1
+            return True
+        self._ensure_started()
+        return self._enqueue(event)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Block until every queued event has been handled.
+
+        Returns:
+            True if the queue was drained, False if the timeout was hit first
+        """
+        if self._thread is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout: float | None = None) -> None:
+        """
+        Drain the queue and stop the worker thread.
+        """
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"Telemetry worker {self.name} did not stop within {timeout}s; {self._queue.qsize()} events pending")
+        self._thread = None
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _enqueue(self, event: TelemetryEvent) -> bool:
+        if self.backpressure == "block":
+            self._queue.put(event)
+        elif self.backpressure == "drop_new" and event.kind in self.droppable:
+            try:
+                self._queue.put_nowait(event)
+            except queue.Full:
+                self._dropped += 1
+                logger.debug(f"Telemetry queue full, dropping new '{event.kind}' event")
+                return False
+        elif self.backpressure == "drop_new":
+            self._queue.put(event)
+        else:
+            while True:
+                try:
+                    self._queue.put_nowait(event)
+                    break
+                except queue.Full:
+                    if not self._drop_oldest():
+                        # nothing queued may be dropped, so wait for the worker to make room
+                        self._queue.put(event)
+                        break
+        self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+        return True
+
+    def _drop_oldest(self) -> bool:
+        """
+        Remove the oldest queued event of a droppable kind, returning False if there is none.
+        """
+        with self._queue.mutex:
+            dropped = next(
+                (queued for queued in self._queue.queue if isinstance(queued, TelemetryEvent) and queued.kind in self.droppable),
+                None,
+            )
+            if dropped is None:
+                return False
+            self._queue.queue.remove(dropped)
+            # as Queue.get and Queue.task_done would, for an event that is never handled
+            self._queue.unfinished_tasks -= 1
+            if self._queue.unfinished_tasks == 0:
+                self._queue.all_tasks_done.notify_all()
+            self._queue.not_full.notify()
+        self._dropped += 1
+        logger.debug(f"Telemetry queue full, dropping oldest '{dropped.kind}' event")
+        return True
+
+    def _run(self) -> None:
+        while True:
+            event = self._queue.get()
+            try:
+                if event is _STOP:
+                    return
+                assert isinstance(event, TelemetryEvent)
+                try:
+                    event.context.run(self.handlers[event.kind], **event.payload)
+                    self._processed += 1
+                except Exception as e:
+                    self._failed += 1
+                    logger.warning(f"Telemetry handler for '{event.kind}' failed: {e}", exc_info=e)
+            finally:
+                self._queue.task_done()
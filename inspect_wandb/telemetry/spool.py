@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterator
+
+from pydantic_core import to_jsonable_python
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+SYNCED_MARKER = ".synced"
+PROGRESS_FILE = ".progress"
+
+class SpoolWriter:
+    """
+    Appends telemetry events to a local, append-only journal so they can be replayed later with `inspect-wandb sync`.
+
+    The journal is a directory of numbered JSON-lines segments. A new segment is started once the current one
+    exceeds `segment_bytes`, so a single journal never becomes one unbounded file and replay can stream it.
+    Each line is a compact `{"kind": ..., "ts": ..., "payload": ...}` record.
+    """
+
+    def __init__(self, directory: str | Path, segment_bytes: int = 64 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._segment = len(list_segments(self.directory))
+        self._file = self._open_segment()
+        self.events_written = 0
+        self.bytes_written = 0
+
+    def write(self, kind: str, payload: dict[str, Any]) -> None:
+        line = json.dumps(
+            {"kind": kind, "ts": time.time(), "payload": to_jsonable_python(payload, fallback=str)},
+            separators=(",", ":"),
+        ) + "\n"
+        data = line.encode("utf-8")
+        with self._lock:
+            if self._file.tell() > 0 and self._file.tell() + len(data) > self.segment_bytes:
+                self._file.close()
+                self._file = self._open_segment()
+            self._file.write(data)
+            self._file.flush()
+            self.events_written += 1
+            self.bytes_written += len(data)
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+
+    def _open_segment(self) -> Any:
+        self._segment += 1
+        return open(self.directory / f"{SEGMENT_PREFIX}{self._segment:06d}{SEGMENT_SUFFIX}", "ab")
+
+def list_segments(directory: str | Path) -> list[Path]:
+    return sorted(Path(directory).glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"))
+
+def read_journal(directory: str | Path) -> Iterator[tuple[str, dict[str, Any]]]:
+    """
+    Stream (kind, payload) events from a journal, in the order they were written.
+    A truncated final line (e.g. from a crashed process) is skipped with a warning.
+    """
+    for segment in list_segments(directory):
+        with open(segment, "rb") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping unreadable event at {segment}:{line_number}")
+                    continue
+                yield event["kind"], event["payload"]
+
+def is_synced(directory: str | Path) -> bool:
+    return (Path(directory) / SYNCED_MARKER).exists()
+
+def mark_synced(directory: str | Path) -> None:
+    (Path(directory) / SYNCED_MARKER).touch()
+
+class JournalProgress:
+    """
+    The parts of a journal (such as its evaluations) already replayed by an earlier sync, so a sync that failed
+    part way through can be run again without sending them twice. Each key is appended to a `.progress` file in
+    the journal as soon as its part has been replayed.
+    """
+
+    def __init__(self, directory: str | Path):
+        self.path = Path(directory) / PROGRESS_FILE
+        self.done: set[str] = set()
+        if self.path.exists():
+            self.done = {line.strip() for line in self.path.read_text(encoding="utf-8").splitlines() if line.strip()}
+        self._file: Any = None
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.done
+
+    def add(self, key: str) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(key + "\n")
+        self._file.flush()
+        self.done.add(key)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def reset_progress(directory: str | Path) -> None:
+    (Path(directory) / PROGRESS_FILE).unlink(missing_ok=True)
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import tempfile
+from io import BytesIO
+from pathlib import Path
+from typing import Any
+
+from inspect_viz import Component
+from inspect_viz.plot import write_html
+from PIL import Image, ImageChops, ImageOps
+
+logger = logging.getLogger(__name__)
+
+def save_cropped(image_bytes: bytes, file: str | Path, padding: int, scale: int) -> tuple[int, int]:
+    """
+    Crop a screenshot taken on a white background to its content, with `padding` CSS pixels of white around it, as
+    `inspect_viz.plot.write_png` does, and save it to `file`. Returns the (width, height) of the saved image.
+    """
+    with Image.open(BytesIO(image_bytes)) as screenshot:
+        bbox = ImageChops.difference(screenshot, Image.new(screenshot.mode, screenshot.size, "white")).getbbox()
+        image = ImageOps.expand(screenshot.crop(bbox), border=padding * scale, fill="white") if bbox else screenshot.copy()
+    try:
+        image.save(file, dpi=(scale * 96, scale * 96))
+        return image.size
+    finally:
+        image.close()
+
+class BrowserPool:
+    """
+    A headless Chromium browser which is started on first use and shared by every plot rendered to PNG until `close`.
+
+    `inspect_viz.plot.write_png_async` launches a new browser for each image, and launching dominates the time to render
+    one. Here, the browser is launched once, and each render only opens a browser context for its page, with at most
+    `size` pages rendered at once. The browser belongs to the event loop it was started on, so it must be closed before
+    that loop ends (at the end of the Inspect run), and is started again on the next use.
+    """
+
+    def __init__(self, size: int = 4):
+        self.size = size
+        self.launches = 0
+        self._playwright: Any = None
+        self._browser: Any = None
+        self._lock: asyncio.Lock | None = None
+        self._pages: asyncio.Semaphore | None = None
+
+    @property
+    def started(self) -> bool:
+        return self._browser is not None
+
+    async def write_png(self, file: str | Path, component: Component, scale: int = 2, padding: int = 8) -> tuple[int, int] | None:
+        """
+        Equivalent of `inspect_viz.plot.write_png_async`, rendering in the shared browser. Returns the (width, height) of the image.
+        """
+        browser = await self._get_browser()
+        assert self._pages is not None
+        with tempfile.NamedTemporaryFile("w", suffix=".html") as html:
+            write_html(html.name, component=component)
+            async with self._pages:
+                context = await browser.new_context(device_scale_factor=scale)
+                try:
+                    page = await context.new_page()
+                    await page.goto(Path(html.name).resolve().as_uri(), wait_until="networkidle")
+                    await page.wait_for_function(
+                        '() => !!window.document.querySelector("svg") || !!window.document.querySelector(".inspect-viz-table")',
+                        polling=100,
+                    )
+                    # size the viewport to the whole page, so nothing is cut off by scrolling
+                    width = await page.evaluate("document.documentElement.scrollWidth")
+                    height = await page.evaluate("document.documentElement.scrollHeight")
+                    await page.set_viewport_size({"width": width, "height": height})
+                    image_bytes = await page.screenshot(scale="device", style="body { background-color: white; }")
+                finally:
+                    await context.close()
+        return await asyncio.to_thread(save_cropped, image_bytes, file, padding, scale)
+
+    async def close(self) -> None:
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+                await self._playwright.stop()
+            except Exception as e:
+                logger.warning(f"Error shutting down the browser used to render plots: {e}")
+        self._playwright = None
+        self._browser = None
+        self._lock = None
+        self._pages = None
+
+    async def _get_browser(self) -> Any:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+            self._pages = asyncio.Semaphore(self.size)
+        async with self._lock:
+            if self._browser is None:
+                from playwright.async_api import async_playwright
+
+                self._playwright = await async_playwright().start()
+                try:
+                    self._browser = await self._playwright.chromium.launch(headless=True)
+                except Exception:
+                    await self._playwright.stop()
+                    self._playwright = None
+                    raise
+                self.launches += 1
+            return self._browser
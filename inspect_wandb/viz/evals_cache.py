@@ -0,0 +1,156 @@
+import datetime
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Sequence
+
+import pandas as pd
+from fsspec.core import url_to_fs  # type: ignore[import-untyped]
+from inspect_ai.analysis import evals_df
+
+logger = logging.getLogger(__name__)
+
+EVALS_CACHE_PARTS = "evals"
+# parts are merged into one when the cache is loaded with more than this many
+MAX_CACHE_PARTS = 32
+
+# as inspect_ai's log listing: .eval logs, and .json logs named by the time they were started
+_JSON_LOG_NAME = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}[:-]\d{2}[:-]\d{2}.*\.json$")
+
+# columns added to the cached rows to tell whether the log they were read from has changed
+_SIZE = "_cache_size"
+_MTIME = "_cache_mtime"
+_ETAG = "_cache_etag"
+_VERSION_COLUMNS = [_SIZE, _MTIME, _ETAG]
+
+@dataclass(frozen=True)
+class LogVersion:
+    size: int
+    mtime: float | None
+    etag: str | None
+
+def _mtime(entry: dict[str, Any]) -> float | None:
+    # local and most remote filesystems use "mtime", S3 uses "LastModified"
+    mtime = entry.get("mtime", entry.get("LastModified"))
+    if isinstance(mtime, datetime.datetime):
+        return mtime.timestamp()
+    if isinstance(mtime, int | float):
+        return float(mtime)
+    return None
+
+def _is_log_file(location: str) -> bool:
+    name = location.rsplit("/", 1)[-1]
+    return name.endswith(".eval") or _JSON_LOG_NAME.match(name) is not None
+
+def list_log_versions(logs: Sequence[str]) -> dict[str, LogVersion]:
+    """
+    The version of each log file in `logs` (expanding directories), by its location as `evals_df` reports it.
+    Directories are listed in one call, so remote logs are not fetched one at a time.
+    """
+    versions: dict[str, LogVersion] = {}
+    for log in logs:
+        fs, path = url_to_fs(str(log))
+        info = fs.info(path)
+        entries = fs.find(path, detail=True).values() if info["type"] == "directory" else [info]
+        for entry in entries:
+            # local logs are reported by their path, and remote ones by their URL
+            location = fs.unstrip_protocol(entry["name"]).removeprefix("file://")
+            if entry["type"] != "file" or not _is_log_file(location):
+                continue
+            etag = entry.get("ETag", entry.get("etag"))
+            versions[location] = LogVersion(size=int(entry.get("size") or 0), mtime=_mtime(entry), etag=str(etag) if etag is not None else None)
+    return versions
+
+class EvalsCache:
+    """
+    A local Parquet cache of the rows `evals_df` reads from the headers of eval logs, so that logs already read by
+    earlier runs (such as the other runs of an eval set) are not read again.
+
+    Rows are kept with the size, modification time and ETag (for remote logs that have one) of the log they were read
+    from, and a log is read again only if one of them changes.
+
+    The cache is read once, when it is first used. Each call that reads logs then writes only their rows, as a new part
+    file, so a run adding its logs a task at a time does not rewrite the rows already cached. When the cache is loaded
+    with more than `MAX_CACHE_PARTS` parts, they are merged into one.
+    """
+
+    def __init__(self, cache_dir: str | Path):
+        self.path = Path(cache_dir) / EVALS_CACHE_PARTS
+        self.hits = 0
+        self.misses = 0
+        self._cached: pd.DataFrame | None = None
+        self._lock = threading.Lock()
+
+    def evals_df(self, logs: Sequence[str]) -> pd.DataFrame:
+        """
+        Equivalent of `inspect_ai.analysis.evals_df(logs)`, reading only the logs that are not cached.
+        """
+        with self._lock:
+            versions = list_log_versions(logs)
+            keys = pd.DataFrame(
+                [(location, version.size, version.mtime, version.etag) for location, version in versions.items()],
+                columns=["log", *_VERSION_COLUMNS],
+            ).astype({_SIZE: "int64", _MTIME: "float64", _ETAG: "object"})
+            if self._cached is None:
+                self._cached = self._load()
+            cached = self._cached
+            # the cached rows of logs which have not changed since they were read
+            current = cached.merge(keys, on=["log", *_VERSION_COLUMNS]) if not cached.empty else cached
+            current_logs = set(current["log"]) if not current.empty else set()
+            stale = [location for location in versions if location not in current_logs]
+            self.hits += len(current_logs)
+            self.misses += len(stale)
+            fresh = evals_df(stale, quiet=True) if stale else pd.DataFrame()
+            if not fresh.empty:
+                fresh = fresh.merge(keys, on="log", how="left")
+                self._write(fresh)
+                # rows of other logs are kept for later calls, and rows of older versions of these logs are replaced
+                kept = cached[~cached["log"].isin(stale)] if not cached.empty else cached
+                self._cached = pd.concat([kept, fresh], ignore_index=True) if not kept.empty else fresh
+                current = pd.concat([current, fresh], ignore_index=True) if not current.empty else fresh
+
+        if current.empty:
+            return current.drop(columns=_VERSION_COLUMNS, errors="ignore")
+        order = {location: index for index, location in enumerate(versions)}
+        current = current.sort_values("log", key=lambda column: column.map(order), kind="stable")
+        # as evals_df, a log with the same eval_id as an earlier one is left out
+        current = current.drop_duplicates("eval_id").reset_index(drop=True)
+        return current.drop(columns=_VERSION_COLUMNS)
+
+    def _load(self) -> pd.DataFrame:
+        # part names start with the time they were written, so a log's latest rows come last
+        parts = sorted(self.path.glob("part-*.parquet")) if self.path.is_dir() else []
+        frames = []
+        for part in parts:
+            try:
+                frames.append(pd.read_parquet(part))
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable eval log cache {part}: {e}")
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame()
+        cached = pd.concat(frames, ignore_index=True).drop_duplicates("log", keep="last").reset_index(drop=True)
+        if len(parts) > MAX_CACHE_PARTS and self._write(cached):
+            # the merged part is written before the parts it replaces are removed, so no rows are lost if this fails
+            for part in parts:
+                part.unlink(missing_ok=True)
+        return cached
+
+    def _write(self, df: pd.DataFrame) -> bool:
+        part = self.path / f"part-{time.time_ns():020d}-{uuid.uuid4().hex}.parquet"
+        temp = part.with_name(f".{part.name}.tmp")
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            df.to_parquet(temp, index=False)
+            # renamed in one step, so a concurrent reader sees either the whole part or none of it
+            os.replace(temp, part)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to update eval log cache {self.path}: {e}")
+            temp.unlink(missing_ok=True)
+            return False
@@ -1,40 +1,56 @@
 from inspect_viz import Component
-from inspect_viz.plot import write_png_async
-import logging
-from inspect_viz.view.beta import scores_heatmap
+from inspect_viz.mark import rect_y
+from inspect_viz.plot import plot
+from inspect_viz.transform import bin, count
+from inspect_viz.view.beta import scores_by_task, scores_heatmap
 from inspect_viz import Data
-import os
 import pandas as pd
-import wandb
-from inspect_ai.hooks import RunEnd
-from inspect_ai.analysis import evals_df
+from typing import Sequence
+from inspect_wandb.viz.browser import BrowserPool
+from inspect_wandb.viz.writer import VizPlot, VizWriter
 
-logger = logging.getLogger(__name__)
+def _scores_heatmap(evals: pd.DataFrame) -> Component:
+    return scores_heatmap(Data.from_dataframe(evals), task_name="task_display_name", model_name="model", score_value="score_headline_value")
 
-class InspectVizWriter:
+def _scores_by_task(evals: pd.DataFrame) -> Component:
+    return scores_by_task(Data.from_dataframe(evals), task_name="task_display_name", model_name="model")
+
+def _distribution(column: str, label: str) -> VizPlot:
+    """
+    Histogram of a per-sample column, stacked by model.
+    """
+    def build(samples: pd.DataFrame) -> Component:
+        return plot(
+            rect_y(Data.from_dataframe(samples), x=bin(column), y=count(), fill="model", inset=1),
+            x_label=label,
+            y_label="Samples",
+            legend="color",
+        )
+    return VizPlot(build=build, samples=True)
+
+INSPECT_VIZ_PLOTS: dict[str, VizPlot] = {
+    "scores_heatmap": VizPlot(build=_scores_heatmap),
+    "scores_by_task": VizPlot(build=_scores_by_task),
+    "token_usage": _distribution("total_tokens", "Tokens per sample"),
+    "latency": _distribution("total_time", "Seconds per sample"),
+}
+
+class InspectVizWriter(VizWriter):
     """
     Class for managing the generation and writing of visualisations with inspect_viz.
     These visualisations are saved as images to the wandb Models run, if the extra is enabled.
+    Plots are rendered in a headless browser which is kept open for the whole run, and shut down by `close`.
     """
 
-    async def log_scores_heatmap(self, data: RunEnd, run: wandb.Run) -> None:
-        try:
-            logs = [log.location for log in data.logs]
-            run.config["logs"] = logs
-            df = evals_df(logs)
-            await self._log_scores_heatmap(data, df)
-        except Exception as e:
-            logger.warning(f"Error creating scores heatmap: {e}")
-
-    async def _log_scores_heatmap(self, data: RunEnd, df: pd.DataFrame) -> None:
-        viz_data = Data.from_dataframe(df)
-        plot = scores_heatmap(viz_data, task_name="task_display_name", model_name="model", score_value="score_headline_value")
-
-        await self._log_image(data.run_id, plot, "scores_heatmap")
-
-    async def _log_image(self, run_id: str, plot: Component, name: str) -> None:
-        path = f"./.plots/{run_id}/{name}.png"
-        if not os.path.exists(f"./.plots/{run_id}"):
-            os.makedirs(f"./.plots/{run_id}")
-        await write_png_async(path, plot)
-        wandb.log({name: wandb.Image(path)})
\ No newline at end of file
+    plots = INSPECT_VIZ_PLOTS
+
+    def __init__(self, concurrency: int = 4, cache_dir: str | None = None, names: Sequence[str] | None = None) -> None:
+        super().__init__(concurrency, cache_dir, names)
+        self.browser = BrowserPool(size=concurrency)
+
+    async def _write_image(self, figure: Component, path: str) -> None:
+        await self.browser.write_png(path, figure)
+
+    async def close(self) -> None:
+        await super().close()
+        await self.browser.close()
@@ -0,0 +1,136 @@
+import asyncio
+import math
+from typing import Any
+
+import pandas as pd
+from inspect_wandb.viz.writer import VizPlot, VizWriter
+
+# viridis, the colour scheme of inspect_viz's heatmap, sampled at ten evenly spaced points
+_VIRIDIS = [
+    (68, 1, 84), (72, 40, 120), (62, 73, 137), (49, 104, 142), (38, 130, 142),
+    (31, 158, 137), (53, 183, 121), (110, 206, 88), (181, 222, 43), (253, 231, 37),
+]
+_MISSING = (220, 220, 220)
+_CELL = 56
+_MARGIN = 12
+_FONT_SIZE = 12
+_LEGEND_HEIGHT = 10
+
+def viridis(value: float) -> tuple[int, int, int]:
+    """
+    Colour for a value between 0 and 1.
+    """
+    position = min(max(value, 0.0), 1.0) * (len(_VIRIDIS) - 1)
+    low = min(int(position), len(_VIRIDIS) - 2)
+    fraction = position - low
+    return tuple(round(a + (b - a) * fraction) for a, b in zip(_VIRIDIS[low], _VIRIDIS[low + 1]))  # type: ignore[return-value]
+
+def heatmap_cells(df: pd.DataFrame, task_name: str, model_name: str, score_value: str) -> pd.DataFrame:
+    """
+    Mean score for each model (rows) and task (columns), sorted as inspect_viz sorts the heatmap: the highest scoring
+    tasks to the right and the highest scoring models to the top.
+    """
+    if task_name == "task_display_name" and task_name not in df.columns:
+        task_name = "task_name"
+    cells = df.pivot_table(index=model_name, columns=task_name, values=score_value, aggfunc="mean", dropna=False)
+    tasks = cells.sum(axis=0).sort_values(kind="stable").index
+    models = cells.sum(axis=1).sort_values(ascending=False, kind="stable").index
+    return cells.loc[models, tasks]
+
+def _font(size: int) -> Any:
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.load_default(size=size)
+    except (TypeError, OSError):
+        # Pillow before 10.1, or without FreeType, only has a fixed size bitmap font
+        return ImageFont.load_default()
+
+def render_heatmap(cells: pd.DataFrame, path: str, scale: int = 2) -> tuple[int, int]:
+    """
+    Rasterize a heatmap of `cells` (as returned by `heatmap_cells`) to a PNG at `path`, returning its (width, height).
+    """
+    from PIL import Image, ImageDraw
+
+    values = [value for value in cells.to_numpy().flatten() if not math.isnan(value)]
+    low, high = (min(values), max(values)) if values else (0.0, 1.0)
+    if low >= 0 and high <= 1:
+        low, high = 0.0, 1.0
+    span = (high - low) or 1.0
+
+    font = _font(_FONT_SIZE * scale)
+    measure = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+
+    def text_size(text: str) -> tuple[int, int]:
+        left, top, right, bottom = measure.textbbox((0, 0), text, font=font)
+        return round(right - left), round(bottom - top)
+
+    tasks = [str(task) for task in cells.columns]
+    models = [str(model) for model in cells.index]
+    cell, margin = _CELL * scale, _MARGIN * scale
+    # task labels are drawn at 45 degrees below the columns, as inspect_viz draws them
+    task_label_extent = max((math.ceil((width + height) / math.sqrt(2)) for width, height in map(text_size, tasks)), default=0)
+    # task labels run down and to the left from their column, so the first one may reach past the model labels
+    model_label_width = max((text_size(model)[0] for model in models), default=0)
+    left = margin + max(model_label_width + margin, task_label_extent - cell // 2)
+    top = margin
+    grid_width, grid_height = cell * len(tasks), cell * len(models)
+    legend_top = top + grid_height + task_label_extent + 2 * margin
+    width = left + max(grid_width, 200 * scale) + margin
+    height = legend_top + (_LEGEND_HEIGHT * scale) + text_size("0")[1] + 2 * margin
+
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    inset = scale
+    for row, model in enumerate(models):
+        y = top + row * cell
+        _, label_height = text_size(model)
+        draw.text((left - margin - text_size(model)[0], y + (cell - label_height) // 2), model, fill="black", font=font)
+        for column in range(len(tasks)):
+            x = left + column * cell
+            value = cells.iat[row, column]
+            missing = math.isnan(value)
+            fill = _MISSING if missing else viridis((value - low) / span)
+            draw.rectangle((x + inset, y + inset, x + cell - inset, y + cell - inset), fill=fill)
+            if not missing:
+                text = f"{value:.2f}" if abs(value) < 100 else f"{value:.0f}"
+                text_width, text_height = text_size(text)
+                # white on the dark end of the scale, black on the light end
+                colour = "white" if (value - low) / span < 0.6 else "black"
+                draw.text((x + (cell - text_width) // 2, y + (cell - text_height) // 2), text, fill=colour, font=font)
+
+    for column, task in enumerate(tasks):
+        label_width, label_height = text_size(task)
+        label = Image.new("RGBA", (label_width + scale, label_height + 2 * scale), (255, 255, 255, 0))
+        ImageDraw.Draw(label).text((0, 0), task, fill="black", font=font)
+        rotated = label.rotate(45, expand=True, resample=Image.Resampling.BICUBIC)
+        # anchor the end of the label under the middle of its column
+        x = left + column * cell + cell // 2 - rotated.width
+        image.paste(rotated, (x, top + grid_height + scale), rotated)
+
+    # colour legend from the low to the high end of the scale
+    legend_width = 200 * scale
+    for offset in range(legend_width):
+        draw.line((left + offset, legend_top, left + offset, legend_top + _LEGEND_HEIGHT * scale), fill=viridis(offset / (legend_width - 1)))
+    legend_labels_top = legend_top + _LEGEND_HEIGHT * scale + scale
+    draw.text((left, legend_labels_top), f"{low:g}", fill="black", font=font)
+    high_label = f"{high:g}"
+    draw.text((left + legend_width - text_size(high_label)[0], legend_labels_top), high_label, fill="black", font=font)
+
+    image.save(path, dpi=(scale * 96, scale * 96))
+    return image.size
+
+NATIVE_PLOTS: dict[str, VizPlot] = {
+    "scores_heatmap": VizPlot(build=lambda evals: heatmap_cells(evals, task_name="task_display_name", model_name="model", score_value="score_headline_value")),
+}
+
+class NativeVizWriter(VizWriter):
+    """
+    Renders visualisations in Python with Pillow, so that no browser is needed to save them as images to the wandb Models run.
+    Selected with `viz_backend = "native"`, which draws the scores heatmap only.
+    """
+
+    plots = NATIVE_PLOTS
+
+    async def _write_image(self, figure: pd.DataFrame, path: str) -> None:
+        await asyncio.to_thread(render_heatmap, figure, path)
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Callable, ClassVar, Sequence
+
+import pandas as pd
+import wandb
+from inspect_ai.analysis import evals_df, samples_df
+from inspect_ai.hooks import RunEnd, TaskEnd
+from inspect_wandb.viz.evals_cache import EvalsCache
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class VizPlot:
+    """
+    A plot a writer can log. `build` turns the run's evals dataframe (or, if `samples` is set, its samples dataframe) into
+    whatever the writer's backend renders to an image.
+    """
+    build: Callable[[pd.DataFrame], Any]
+    samples: bool = False
+
+@dataclass
+class VizFrames:
+    """
+    The run's dataframes, loaded once and shared by every plot.
+    """
+    evals: pd.DataFrame
+    samples: pd.DataFrame | None = None
+
+    def extend(self, other: "VizFrames") -> "VizFrames":
+        """
+        These frames with the rows of `other` added, replacing the rows of any eval they both have (such as a retried task).
+        """
+        if self.evals.empty:
+            return other
+        evals = pd.concat([self.evals[~self.evals["eval_id"].isin(other.evals["eval_id"])], other.evals], ignore_index=True)
+        if self.samples is None or other.samples is None:
+            return VizFrames(evals=evals, samples=other.samples if self.samples is None else self.samples)
+        samples = pd.concat([self.samples[~self.samples["eval_id"].isin(other.evals["eval_id"])], other.samples], ignore_index=True)
+        return VizFrames(evals=evals, samples=samples)
+
+def _total_tokens(model_usage: Any) -> int:
+    if isinstance(model_usage, str):
+        model_usage = json.loads(model_usage) if model_usage else {}
+    if not isinstance(model_usage, dict):
+        return 0
+    return sum(int(usage.get("total_tokens") or 0) for usage in model_usage.values())
+
+def sample_frame(evals: pd.DataFrame, samples: pd.DataFrame) -> pd.DataFrame:
+    """
+    Samples with their total tokens across models, and the task and model of their eval.
+    """
+    frame = samples.assign(total_tokens=samples["model_usage"].map(_total_tokens))
+    eval_columns = [column for column in ("eval_id", "task_name", "task_display_name", "model") if column in evals.columns]
+    return frame.merge(evals[eval_columns], on="eval_id", how="left")
+
+class VizWriter(ABC):
+    """
+    Base class for writers which generate visualisations of the run's eval logs and save them as images to the wandb Models run.
+    Subclasses register the plots their backend can draw in `plots`, with `viz_backend` in the Models settings choosing between them.
+    The dataframes are loaded once, and plots are then built and rendered concurrently on worker threads, at most
+    `concurrency` at a time, so the event loop only schedules them. With a `cache_dir`, the evals dataframe is read
+    through an `EvalsCache` there, which only reads new or changed logs.
+
+    The dataframes grow over the run: `update_plots` adds the log of each task as it ends, and renders the plots from
+    what has been added so far, at most once every `interval` seconds and without waiting for them. `log_plots` then only
+    adds the logs which are still missing at the end of the run.
+    """
+
+    plots: ClassVar[dict[str, VizPlot]] = {}
+
+    def __init__(self, concurrency: int = 4, cache_dir: str | None = None, names: Sequence[str] | None = None) -> None:
+        self.concurrency = concurrency
+        self.evals_cache = EvalsCache(cache_dir) if cache_dir is not None else None
+        self.names = names
+        self._selected: dict[str, VizPlot] | None = None
+        self._frames: VizFrames | None = None
+        self._locations: set[str] = set()
+        # tasks ending together add their logs one at a time, so that neither extends frames the other is replacing
+        self._adding = asyncio.Lock()
+        self._update: "asyncio.Task[None] | None" = None
+        self._last_update: float | None = None
+
+    async def log_plots(self, data: RunEnd, run: wandb.Run) -> None:
+        try:
+            # a render started at the end of the last task would overwrite the final plots if it finished after them
+            await self._wait_for_update()
+            logs = [log.location for log in data.logs]
+            run.config["logs"] = logs
+            frames = await self._add_logs(logs)
+            if frames is not None:
+                await self._render_plots(data.run_id, frames)
+        except Exception as e:
+            logger.warning(f"Error creating plots: {e}")
+        finally:
+            self._frames = None
+            self._locations.clear()
+            self._last_update = None
+
+    async def update_plots(self, data: TaskEnd, interval: float) -> None:
+        try:
+            frames = await self._add_logs([data.log.location])
+        except Exception as e:
+            logger.warning(f"Error reading the log of task {data.log.eval.task} for plots: {e}")
+            return
+        now = time.monotonic()
+        throttled = self._last_update is not None and now - self._last_update < interval
+        if frames is None or throttled or (self._update is not None and not self._update.done()):
+            return
+        self._last_update = now
+        self._update = asyncio.create_task(self._render_plots(data.run_id, frames))
+
+    async def close(self) -> None:
+        await self._wait_for_update()
+
+    @abstractmethod
+    async def _write_image(self, figure: Any, path: str) -> None:
+        """
+        Render a figure built by one of the writer's `plots` to a PNG at `path`.
+        """
+
+    def _select_plots(self) -> dict[str, VizPlot]:
+        if self._selected is None:
+            names = self.names if self.names is not None else list(self.plots)
+            unsupported = [name for name in names if name not in self.plots]
+            if unsupported:
+                logger.warning(f"The {type(self).__name__} cannot draw the plots {unsupported}, skipping them")
+            self._selected = {name: self.plots[name] for name in names if name in self.plots}
+        return self._selected
+
+    async def _add_logs(self, logs: list[str]) -> VizFrames | None:
+        """
+        Add the logs not added yet to the run's dataframes, returning them (or None if there are no plots to draw).
+        """
+        plots = self._select_plots()
+        if not plots:
+            return None
+        async with self._adding:
+            new_logs = [log for log in logs if log not in self._locations]
+            if new_logs or self._frames is None:
+                frames = await self._load_frames(new_logs, any(plot.samples for plot in plots.values()))
+                self._frames = frames if self._frames is None else await asyncio.to_thread(self._frames.extend, frames)
+                self._locations.update(new_logs)
+            return self._frames
+
+    async def _render_plots(self, run_id: str, frames: VizFrames) -> None:
+        plots = self._select_plots()
+        pages = asyncio.Semaphore(self.concurrency)
+        paths = await asyncio.gather(
+            *(self._render_plot(run_id, name, plot, frames, pages) for name, plot in plots.items())
+        )
+        await asyncio.to_thread(self._log_images, {name: path for name, path in zip(plots, paths) if path is not None})
+
+    def _log_images(self, paths: dict[str, str]) -> None:
+        if paths:
+            wandb.log({name: wandb.Image(path) for name, path in paths.items()})
+
+    async def _wait_for_update(self) -> None:
+        if self._update is not None:
+            update, self._update = self._update, None
+            try:
+                await update
+            except Exception as e:
+                logger.warning(f"Error updating plots: {e}")
+
+    async def _load_frames(self, logs: list[str], with_samples: bool) -> VizFrames:
+        if not with_samples:
+            return VizFrames(evals=await asyncio.to_thread(self._evals_df, logs))
+        evals, samples = await asyncio.gather(asyncio.to_thread(self._evals_df, logs), asyncio.to_thread(samples_df, logs))
+        return VizFrames(evals=evals, samples=await asyncio.to_thread(sample_frame, evals, samples))
+
+    def _evals_df(self, logs: list[str]) -> pd.DataFrame:
+        if self.evals_cache is not None:
+            return self.evals_cache.evals_df(logs)
+        return evals_df(logs)
+
+    async def _render_plot(self, run_id: str, name: str, plot: VizPlot, frames: VizFrames, pages: asyncio.Semaphore) -> str | None:
+        async with pages:
+            try:
+                # building a figure (such as pivoting or copying the dataframe) runs off the event loop like rendering it
+                figure = await asyncio.to_thread(plot.build, frames.samples if plot.samples else frames.evals)
+                path = self._plot_path(run_id, name)
+                await self._write_image(figure, path)
+                return path
+            except Exception as e:
+                logger.warning(f"Error creating {name} plot: {e}")
+                return None
+
+    def _plot_path(self, run_id: str, name: str) -> str:
+        os.makedirs(f"./.plots/{run_id}", exist_ok=True)
+        return f"./.plots/{run_id}/{name}.png"
@@ -1,10 +1,12 @@
 import importlib
+from weakref import WeakKeyDictionary
 
 import weave
 from weave.integrations.patcher import SymbolPatcher, MultiPatcher
 from weave.trace.autopatch import AutopatchSettings, IntegrationSettings
 from pydantic import Field
-from typing import Callable
+from typing import Any, Callable
+from weave.trace.op import Op
 
 import anyio
 from inspect_ai.dataset import Sample
@@ -21,8 +23,26 @@ from inspect_ai._eval.task.run import EvalSampleSource, SampleErrorHandler
 from inspect_ai.solver._transcript import solver_transcript
 from inspect_ai.solver._plan import logger
 from inspect_ai._util.registry import registry_info
+from inspect_wandb.weave.utils import sample_traced
 
 class PatchedPlan(Plan):
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        # weave ops wrapping the plan's steps, built on first use rather than for every step of every sample.
+        # The plan holds a reference to each of its steps, so their ids are stable for as long as the plan exists
+        self._ops: dict[tuple[int, str | None], Op] = {}
+
+    def op(self, fn: Callable[..., Any], name: str | None = None) -> Op:
+        """
+        Returns the weave op wrapping `fn` (a solver, finish or cleanup step of this plan), named with its registry name unless `name` is given.
+        """
+        key = (id(fn), name)
+        op = self._ops.get(key)
+        if op is None:
+            op = weave.op(name=name or registry_info(fn).name)(fn)
+            self._ops[key] = op
+        return op
+
     async def __call__(self, state: TaskState, generate: Generate) -> TaskState:
         with weave.thread(thread_id=str(state.uuid)):
 
@@ -32,8 +52,7 @@ class PatchedPlan(Plan):
 
                     # run solver
                     async with solver_transcript(solver, state) as st:
-                        solver_name = registry_info(solver).name
-                        state = await weave.op(name=solver_name)(solver)(state, generate)
+                        state = await self.op(solver)(state, generate)
                         st.complete(state)
 
                     # check for completed
@@ -44,15 +63,14 @@ class PatchedPlan(Plan):
                 # execute finish
                 if self.finish:
                     async with solver_transcript(self.finish, state) as st:
-                        finish_name = registry_info(self.finish).name
-                        state = await weave.op(name=finish_name)(self.finish)(state, generate)
+                        state = await self.op(self.finish)(state, generate)
                         st.complete(state)
 
             finally:
                 # always do cleanup if we have one
                 if self.cleanup:
                     try:
-                        await weave.op(name="inspect_sample_cleanup")(self.cleanup)(state)
+                        await self.op(self.cleanup, "inspect_sample_cleanup")(state)
                     except Exception as ex:
                         logger.warning(
                             f"Exception occurred during plan cleanup: {ex}", exc_info=ex
@@ -60,6 +78,17 @@ class PatchedPlan(Plan):
 
             return state
 
+# The plan passed to `task_run_sample` is the same object for every sample of a task, so its patched counterpart is built
+# once and reused. Keyed weakly so that entries are dropped along with the plans inspect releases, and cleared on undo_patch.
+_patched_plans: WeakKeyDictionary[Plan, PatchedPlan] = WeakKeyDictionary()
+
+def patched_plan(plan: Plan) -> PatchedPlan:
+    patched = _patched_plans.get(plan)
+    if patched is None:
+        patched = PatchedPlan(plan.steps, plan.finish, plan.cleanup, plan.name, internal=True)
+        _patched_plans[plan] = patched
+    return patched
+
 async def patched_task_run_sample(
     *,
     task_name: str,
@@ -88,7 +117,8 @@ async def patched_task_run_sample(
     task_id: str,
 ) -> dict[str, SampleScore] | None:
 
-    patched_plan = PatchedPlan(plan.steps, plan.finish, plan.cleanup, plan.name, internal=True)
+    # samples left out by trace sampling run the original plan, with no weave ops
+    traced = sample_traced(sample.id, state.epoch, inspect_patcher.trace_sample_rate)
 
     return await task_run_sample(
         task_name=task_name,
@@ -98,7 +128,7 @@ async def patched_task_run_sample(
         sandbox=sandbox,
         max_sandboxes=max_sandboxes,
         sandbox_cleanup=sandbox_cleanup,
-        plan=patched_plan,
+        plan=patched_plan(plan) if traced else plan,
         scorers=scorers,
         generate=generate,
         progress=progress,
@@ -118,7 +148,16 @@ async def patched_task_run_sample(
     )
 
 
-inspect_patcher = MultiPatcher(
+class InspectPatcher(MultiPatcher):
+    # fraction of samples whose plans are traced, see `sample_traced`
+    trace_sample_rate: float = 1.0
+
+    def undo_patch(self) -> bool:
+        # patched plans are only valid while task_run_sample is patched
+        _patched_plans.clear()
+        return super().undo_patch()
+
+inspect_patcher = InspectPatcher(
     [
         SymbolPatcher(
             lambda: importlib.import_module("inspect_ai._eval.task.run"),
@@ -128,7 +167,7 @@ inspect_patcher = MultiPatcher(
     ]
 )
 
-def get_inspect_patcher(settings: IntegrationSettings | None = None) -> MultiPatcher:
+def get_inspect_patcher(settings: IntegrationSettings | None = None) -> InspectPatcher:
     return inspect_patcher
 
 class CustomAutopatchSettings(AutopatchSettings):
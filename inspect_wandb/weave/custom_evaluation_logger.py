@@ -6,7 +6,9 @@ import weave
 from weave.trace.context import call_context
 from weave.trace.weave_client import Call
 from weave.evaluation.eval_imperative import  EvaluationLogger, current_predict_call, IMPERATIVE_EVAL_MARKER
-from weave.evaluation.eval_imperative import ScoreLogger, _set_current_output
+from weave.evaluation.eval_imperative import ScoreLogger, _set_current_output, _set_current_summary
+from pydantic import PrivateAttr
+from inspect_wandb.weave.streaming_summary import StreamingSummary
 
 
 
@@ -16,12 +18,31 @@ ScoreType = Union[float, bool, dict]
 
 logger = logging.getLogger(__name__)
 
+class StreamingScoreLogger(ScoreLogger):
+    """
+    A ScoreLogger which hands its scores to the evaluation logger when it finishes, so it can be released immediately.
+    """
+
+    _evaluation_logger: CustomEvaluationLogger | None = PrivateAttr(default=None)
+
+    def finish(self) -> None:
+        already_finished = self._has_finished
+        super().finish()
+        if not already_finished and self._evaluation_logger is not None:
+            self._evaluation_logger._prediction_finished(self)
+
 class CustomEvaluationLogger(EvaluationLogger):
     """
     This class is a modified version of the EvaluationLogger class which allows for the parent call to be specified.
     This allows us to specify an Inspect specific call as the parent when autopatching Inspect.
+
+    With `streaming=True`, predictions are only kept until they finish: their scores are folded into a running
+    summary and the prediction is dropped, so memory does not grow with the number of predictions in the evaluation.
     """
 
+    streaming: bool = False
+    _streaming_summary: StreamingSummary = PrivateAttr(default_factory=StreamingSummary)
+
     def log_prediction(self, inputs: dict, output: Any, parent_call: Call | None = None) -> ScoreLogger:
         """Log a prediction to the Evaluation, and return a reference.
 
@@ -49,10 +70,122 @@ class CustomEvaluationLogger(EvaluationLogger):
             if predict_call is None:
                 raise ValueError("predict_call should not be None")
 
-            pred = ScoreLogger(
+            pred = (StreamingScoreLogger if self.streaming else ScoreLogger)(
                 predict_and_score_call=predict_and_score_call,
                 evaluate_call=parent_call if parent_call is not None else self._evaluate_call,
                 predict_call=predict_call,
             )
+            if isinstance(pred, StreamingScoreLogger):
+                pred._evaluation_logger = self
+            # in streaming mode this only holds the predictions which have not finished yet
             self._accumulated_predictions.append(pred)
             return pred
+
+    def _prediction_finished(self, pred: ScoreLogger) -> None:
+        self._streaming_summary.update(pred._captured_scores)
+        self._accumulated_predictions.remove(pred)
+
+    def log_summary(self, summary: dict | None = None, auto_summarize: bool = True) -> None:
+        if not self.streaming:
+            return super().log_summary(summary, auto_summarize)
+
+        if self._is_finalized:
+            logger.warning("(NO-OP): Evaluation already finalized, cannot log summary.")
+            return
+
+        if summary is None:
+            summary = {}
+
+        # Same as EvaluationLogger.log_summary, except that the auto summary comes from the running aggregates
+        # (including any predictions that have not finished yet) rather than from every accumulated prediction
+        if auto_summarize:
+            for pred in list(self._accumulated_predictions):
+                pred.finish()
+            summary_data = self._streaming_summary.summary()
+        else:
+            summary_data = summary
+
+        final_summary = {}
+        if summary_data:
+            final_summary = summary_data
+        if summary is not None:
+            final_summary = {**final_summary, "output": summary}
+
+        assert self._evaluate_call is not None, (
+            "Evaluation call should exist for summary"
+        )
+
+        with call_context.set_call_stack([self._evaluate_call]):
+            try:
+                with _set_current_summary(final_summary):
+                    with weave.attributes(IMPERATIVE_EVAL_MARKER):
+                        self._pseudo_evaluation.summarize()
+            except Exception:
+                logger.error("Error during execution of summarize op.", exc_info=True)
+
+        self._finalize_evaluation(output=final_summary)
+
+    def log_scored_prediction(
+        self,
+        inputs: dict,
+        output: Any,
+        scores: dict[str, Any],
+        score_attributes: dict[str, dict[str, Any]] | None = None,
+        parent_call: Call | None = None,
+    ) -> ScoreLogger:
+        """Log a prediction together with all of its scores, and finish it.
+
+        Unlike calling `log_score` for each scorer, which creates a scorer call and a feedback entry per score,
+        the scores are written once as the output of the prediction's `predict_and_score` call. Any per-score
+        attributes are recorded as the `score_attributes` attribute of that call."""
+        with weave.attributes({"score_attributes": score_attributes} if score_attributes else {}):
+            pred = self.log_prediction(inputs=inputs, output=output, parent_call=parent_call)
+        pred._captured_scores.update(scores)
+        pred.finish()
+        return pred
+
+def log_sample_prediction(
+    weave_eval_logger: CustomEvaluationLogger,
+    inputs: dict,
+    output: Any,
+    scores: list[tuple[str, Any, dict[str, Any]]],
+    metrics: dict[str, int | float],
+    attributes: dict[str, Any],
+    parent_call: Call | None = None,
+    batch_scores: bool = False,
+) -> None:
+    """
+    Log a scored prediction for a single sample, then finish it.
+    This is shared by the live hooks and by spool replay, so both produce the same calls.
+    With `batch_scores`, all scores and metrics are submitted in one operation (see `log_scored_prediction`).
+    """
+    if batch_scores:
+        with weave.attributes(attributes):
+            weave_eval_logger.log_scored_prediction(
+                inputs=inputs,
+                output=output,
+                scores={scorer: score for scorer, score, _ in scores} | metrics,
+                score_attributes={scorer: score_metadata for scorer, _, score_metadata in scores if score_metadata},
+                parent_call=parent_call,
+            )
+        return
+
+    with weave.attributes(attributes):
+        sample_score_logger = weave_eval_logger.log_prediction(
+            inputs=inputs,
+            output=output,
+            parent_call=parent_call
+        )
+    for scorer, score, score_metadata in scores:
+        with weave.attributes(score_metadata):
+            sample_score_logger.log_score(scorer=scorer, score=score)
+
+    # Log various metrics to Weave
+    try:
+        for name, value in metrics.items():
+            sample_score_logger.log_score(scorer=name, score=value)
+    except Exception as e:
+        logger.error(f"Failed to log metrics to Weave: {e}")
+        raise e
+
+    sample_score_logger.finish()
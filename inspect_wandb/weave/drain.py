@@ -0,0 +1,269 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from logging import getLogger
+from pathlib import Path
+from queue import Full, Queue
+from typing import Any
+
+from pydantic import BaseModel
+from weave.trace.weave_client import WeaveClient
+from weave.trace_server import trace_server_interface as tsi
+from weave.trace_server.trace_server_interface import TraceServerInterface
+from weave.trace_server_bindings.async_batch_processor import AsyncBatchProcessor
+from weave.trace_server_bindings.models import EndBatchItem, StartBatchItem
+from inspect_wandb.telemetry.spool import JournalProgress, SpoolWriter, read_journal
+
+logger = getLogger(__name__)
+
+WEAVE_SPILL = "weave-spill"
+
+# how often the drain checks for new work and for the deadline while batches are in flight
+_POLL_INTERVAL = 0.05
+
+# the internals of the client and its batch processors (as of the pinned weave 0.52.1) the drain relies on
+_CLIENT_ATTRIBUTES = ("_server_call_processor", "_server_feedback_processor", "future_executor", "future_executor_fastlane")
+_PROCESSOR_ATTRIBUTES = (
+    "_get_next_batch", "processor_fn", "_process_batch_individually", "queue", "lock", "num_outstanding_jobs", "max_batch_size",
+    "stop_accepting_work_event", "processing_thread", "health_check_thread", "accept_new_work",
+)
+
+def weave_spill_path(spill_dir: str | Path, run_id: str) -> Path:
+    return Path(spill_dir) / WEAVE_SPILL / run_id
+
+@dataclass
+class DrainStats:
+    calls_flushed: int = 0
+    bytes_flushed: int = 0
+    calls_spilled: int = 0
+    jobs_outstanding: int = 0
+    elapsed_seconds: float = 0.0
+    timed_out: bool = False
+
+def _spill_kind(item: Any) -> tuple[str, BaseModel] | None:
+    if isinstance(item, StartBatchItem):
+        return "call_start", item.req
+    if isinstance(item, EndBatchItem):
+        return "call_end", item.req
+    if isinstance(item, tsi.FeedbackCreateReq):
+        return "feedback_create", item
+    return None
+
+def _item_bytes(item: Any) -> int:
+    return len(item.model_dump_json()) if isinstance(item, BaseModel) else 0
+
+class WeaveClientDrain:
+    """
+    Sends the Weave client's pending calls at the end of a run, in parallel and within an optional deadline.
+
+    The client batches call starts, call ends and feedback in processors that send one batch at a time. Here, the
+    processors' own threads are stopped, and batches are taken off their queues and sent on a pool of `workers` threads,
+    while the client's own executors finish the jobs (such as saving objects) that add to them. A call's end is held back while its start is still being sent in another
+    batch, since the trace server drops the end of a call it has not started. If the queues are not empty by `timeout`
+    seconds, the remaining items are written to a journal at `spill_path`, which `inspect-wandb sync` uploads later,
+    instead of holding up the process. Requests already in flight at the deadline are left to complete, and jobs still
+    running in the client's executors, which cannot be spilled, are counted in `jobs_outstanding`.
+
+    This relies on the internals of the client's batch processors in the pinned version of weave. If they are missing,
+    the client is flushed as it would be without a deadline.
+    """
+
+    def __init__(self, client: WeaveClient, timeout: float | None = None, workers: int = 8, spill_path: str | Path | None = None):
+        self.client = client
+        self.timeout = timeout
+        self.workers = workers
+        self.spill_path = Path(spill_path) if spill_path is not None else None
+        self.stats = DrainStats()
+        self._lock = threading.Lock()
+        # ids of the calls whose start is in a batch still being sent, and the ends held back until it has been
+        self._starting: set[str] = set()
+        self._held: list[tuple[AsyncBatchProcessor, EndBatchItem]] = []
+
+    @property
+    def processors(self) -> list[AsyncBatchProcessor]:
+        processors = (getattr(self.client, "_server_call_processor", None), getattr(self.client, "_server_feedback_processor", None))
+        return [p for p in processors if p is not None]
+
+    def supported(self) -> bool:
+        """
+        Whether the client has the batch processor internals the drain uses.
+        """
+        return all(hasattr(self.client, attr) for attr in _CLIENT_ATTRIBUTES) and all(
+            hasattr(processor, attr) for processor in self.processors for attr in _PROCESSOR_ATTRIBUTES
+        )
+
+    def drain(self) -> DrainStats:
+        start = time.monotonic()
+        if not self.supported():
+            logger.warning("This version of weave does not support sending pending calls within flush_timeout, flushing them without a deadline")
+            self.client.finish(use_progress_bar=False)
+            self.stats.elapsed_seconds = time.monotonic() - start
+            return self.stats
+        deadline = start + self.timeout if self.timeout is not None else None
+        for processor in self.processors:
+            self._stop_processing(processor)
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inspect-wandb-drain")
+        # batches being sent, with the ids of the calls they start
+        in_flight: dict[Future[None], set[str]] = {}
+        try:
+            while True:
+                self._release_held(pool, in_flight)
+                # keep every worker busy while there are batches waiting
+                for processor in self.processors:
+                    while len(in_flight) < self.workers and (batch := processor._get_next_batch()):
+                        self._submit(pool, in_flight, processor, batch)
+                if not in_flight and self._pending_jobs() == 0:
+                    break
+                if deadline is not None and time.monotonic() >= deadline:
+                    self.stats.timed_out = True
+                    break
+                if in_flight:
+                    done, _ = wait(in_flight, timeout=_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._starting.difference_update(in_flight.pop(future))
+                else:
+                    time.sleep(_POLL_INTERVAL)
+        finally:
+            # batches already sent are left to finish without waiting for them
+            pool.shutdown(wait=not self.stats.timed_out)
+
+        if self.stats.timed_out:
+            self._spill()
+            self.stats.jobs_outstanding = self._executor_jobs()
+            # calls added by the jobs still running are left to the processors' threads, once the batches in flight
+            # (which may start those calls) have been sent
+            threading.Thread(target=self._resume_processing, args=(list(in_flight),), daemon=True).start()
+        else:
+            # nothing is left queued, so this only restarts the processors' threads
+            self.client.finish(use_progress_bar=False)
+        self.stats.elapsed_seconds = time.monotonic() - start
+        return self.stats
+
+    def _stop_processing(self, processor: AsyncBatchProcessor) -> None:
+        # the processor's thread takes batches off the same queue as the drain, and could send a call's end before the
+        # drain has sent its start. It only exits once the queue is empty, so it is given an empty one to wind down
+        # with, after sending any batch it has already taken.
+        with processor.lock:
+            queue, processor.queue = processor.queue, Queue(maxsize=processor.queue.maxsize)
+            processor.stop_accepting_work_event.set()
+        processor.processing_thread.join()
+        processor.health_check_thread.join()
+        with processor.lock:
+            # anything added while the thread was stopping and not sent by it
+            while not processor.queue.empty():
+                try:
+                    queue.put_nowait(processor.queue.get_nowait())
+                except Full:
+                    logger.warning("Weave call queue is full, dropping an item queued during the flush")
+            processor.queue = queue
+
+    def _resume_processing(self, in_flight: list[Future[None]]) -> None:
+        wait(in_flight)
+        for processor in self.processors:
+            processor.accept_new_work()
+
+    def _submit(self, pool: ThreadPoolExecutor, in_flight: dict[Future[None], set[str]], processor: AsyncBatchProcessor, batch: list[Any]) -> None:
+        # a batch is sent in order, so only ends whose start is in another batch still being sent are held back
+        held = [item for item in batch if isinstance(item, EndBatchItem) and item.req.end.id in self._starting]
+        if held:
+            held_items = {id(end) for end in held}
+            batch = [item for item in batch if id(item) not in held_items]
+            self._held.extend((processor, end) for end in held)
+        starts = {item.req.start.id for item in batch if isinstance(item, StartBatchItem) and item.req.start.id is not None}
+        self._starting.update(starts)
+        if batch:
+            in_flight[pool.submit(self._send, processor, batch)] = starts
+
+    def _release_held(self, pool: ThreadPoolExecutor, in_flight: dict[Future[None], set[str]]) -> None:
+        released = [(processor, end) for processor, end in self._held if end.req.end.id not in self._starting]
+        if not released:
+            return
+        self._held = [(processor, end) for processor, end in self._held if end.req.end.id in self._starting]
+        by_processor: dict[int, tuple[AsyncBatchProcessor, list[Any]]] = {}
+        for processor, end in released:
+            by_processor.setdefault(id(processor), (processor, []))[1].append(end)
+        for processor, ends in by_processor.values():
+            for offset in range(0, len(ends), processor.max_batch_size):
+                self._submit(pool, in_flight, processor, ends[offset:offset + processor.max_batch_size])
+
+    def _send(self, processor: AsyncBatchProcessor, batch: list[Any]) -> None:
+        try:
+            processor.processor_fn(batch)
+        except Exception as e:
+            logger.warning(f"Failed to send a batch of {len(batch)} Weave calls, sending them individually: {e}")
+            # drops and logs any items that cannot be sent, and marks every item done
+            processor._process_batch_individually(batch)
+        else:
+            for _ in batch:
+                processor.queue.task_done()
+        size = sum(_item_bytes(item) for item in batch)
+        with self._lock:
+            self.stats.calls_flushed += len(batch)
+            self.stats.bytes_flushed += size
+
+    def _pending_jobs(self) -> int:
+        return self._executor_jobs() + sum(processor.num_outstanding_jobs for processor in self.processors)
+
+    def _executor_jobs(self) -> int:
+        jobs = self.client.future_executor.num_outstanding_futures
+        if self.client.future_executor_fastlane is not None:
+            jobs += self.client.future_executor_fastlane.num_outstanding_futures
+        return jobs
+
+    def _spill(self) -> None:
+        writer: SpoolWriter | None = None
+        discarded = 0
+        # the held ends were taken off the queues before anything still queued
+        pending: list[tuple[AsyncBatchProcessor, list[Any]]] = [(processor, [end]) for processor, end in self._held]
+        self._held = []
+        for processor in self.processors:
+            while batch := processor._get_next_batch():
+                pending.append((processor, batch))
+        for processor, batch in pending:
+            for item in batch:
+                processor.queue.task_done()
+                spilled = _spill_kind(item)
+                if spilled is None or self.spill_path is None:
+                    discarded += 1
+                    continue
+                if writer is None:
+                    writer = SpoolWriter(self.spill_path)
+                    writer.write("run_start", {"project": self.client._project_id()})
+                kind, req = spilled
+                writer.write(kind, req.model_dump(mode="json"))
+                self.stats.calls_spilled += 1
+        if writer is not None:
+            writer.close()
+            logger.warning(
+                f"Weave flush timed out after {self.timeout}s, spilled {self.stats.calls_spilled} unsent calls to {self.spill_path}. "
+                "Upload them with `inspect-wandb sync`"
+            )
+        if discarded:
+            logger.warning(f"Weave flush timed out after {self.timeout}s, discarded {discarded} unsent items")
+
+def drain_weave_client(client: WeaveClient, timeout: float | None = None, workers: int = 8, spill_path: str | Path | None = None) -> DrainStats:
+    return WeaveClientDrain(client, timeout=timeout, workers=workers, spill_path=spill_path).drain()
+
+def replay_weave_spill(spill: str | Path, server: TraceServerInterface, progress: JournalProgress | None = None) -> int:
+    """
+    Send the calls spilled by a timed out drain to the trace server, returning the number of calls sent.
+    With `progress`, calls sent by an earlier sync are skipped, and each call is recorded there once it has been sent.
+    """
+    sent = 0
+    for index, (kind, payload) in enumerate(read_journal(spill)):
+        key = f"event/{index}"
+        if progress is not None and key in progress:
+            continue
+        if kind == "call_start":
+            server.call_start(tsi.CallStartReq.model_validate(payload))
+        elif kind == "call_end":
+            server.call_end(tsi.CallEndReq.model_validate(payload))
+        elif kind == "feedback_create":
+            server.feedback_create(tsi.FeedbackCreateReq.model_validate(payload))
+        else:
+            continue
+        if progress is not None:
+            progress.add(key)
+        sent += 1
+    return sent
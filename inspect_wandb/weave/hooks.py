@@ -1,32 +1,54 @@
+import asyncio
+from contextvars import ContextVar
 from typing import Any
 from inspect_ai.hooks import Hooks, RunEnd, RunStart, SampleEnd, SampleStart, TaskStart, TaskEnd
 import weave
+from weave.trace.env import weave_wandb_api_key
+from weave.trace.weave_init import init_weave_get_server
 from weave.trace.settings import UserSettings
-from inspect_wandb.weave.utils import format_model_name, format_score_types, format_sample_display_name
+from inspect_wandb.weave.utils import format_model_name, format_sample_display_name, sample_call_output, sample_failed, sample_metrics, sample_scores, sample_traced
 from inspect_wandb.config.settings_loader import SettingsLoader
 from inspect_wandb.config.settings import WeaveSettings
 from logging import getLogger
 from inspect_wandb.weave.autopatcher import get_inspect_patcher, CustomAutopatchSettings
-from inspect_wandb.weave.custom_evaluation_logger import CustomEvaluationLogger
+from inspect_wandb.weave.custom_evaluation_logger import CustomEvaluationLogger, log_sample_prediction
+from inspect_wandb.weave.drain import drain_weave_client, weave_spill_path
+from inspect_wandb.weave.payloads import PayloadBudget
+from inspect_wandb.weave.spool import WeaveSpoolRecorder
 from inspect_wandb.exceptions import WeaveEvaluationException
-from weave.trace.weave_client import Call
+from inspect_wandb.telemetry import TelemetryDispatcher
+from inspect_ai.log import EvalSample
+from weave.trace.weave_client import Call, WeaveClient
+from weave.trace.context.weave_client_context import get_weave_client
 from weave.trace.context import call_context
 from typing_extensions import override
 
 logger = getLogger(__name__)
 
+# The evaluate call of the task running in the current context. Inspect runs each task's hooks and samples in that task's
+# own context, but a worker running several tasks in turn (`max_tasks`) reuses its context, so the call bound by a task
+# that failed before its TaskEnd is unbound when the next task starts, rather than left on the call stack.
+_task_evaluate_call: ContextVar[Call | None] = ContextVar("inspect_wandb_task_evaluate_call", default=None)
+
 class WeaveEvaluationHooks(Hooks):
     """
     Provides Inspect hooks for writing eval scores to the Weave Evaluations API.
     """
 
-    weave_eval_loggers: dict[str, CustomEvaluationLogger] = {}
     settings: WeaveSettings | None = None
-    sample_calls: dict[str, Call] = {}
-    task_mapping: dict[str, str] = {}
+    dispatcher: TelemetryDispatcher | None = None
+    spool: WeaveSpoolRecorder | None = None
+    payload_budget: PayloadBudget | None = None
+    _client_init: "asyncio.Task[None] | None" = None
     _weave_initialized: bool = False
     _hooks_enabled: bool | None = None
 
+    def __init__(self) -> None:
+        # per-run state, keyed by eval id (loggers, task names) or sample uuid (sample calls), as tasks and samples run concurrently
+        self.weave_eval_loggers: dict[str, CustomEvaluationLogger] = {}
+        self.sample_calls: dict[str, Call] = {}
+        self.task_mapping: dict[str, str] = {}
+
     @override
     def enabled(self) -> bool:
         self.settings = self.settings or SettingsLoader.load_inspect_wandb_settings().weave
@@ -38,36 +60,84 @@ class WeaveEvaluationHooks(Hooks):
         if self.settings is None:
             logger.info("Loading settings")
             self.settings = SettingsLoader.load_inspect_wandb_settings().weave
-        # Note: weave.init() moved to lazy initialization in on_task_start
+        # Find the W&B credentials and connect to the trace server while Inspect sets up the tasks (datasets, sandboxes, ...).
+        # weave.init itself creates the project and autopatches LLM clients, so it waits for the first task, whose metadata
+        # may turn Weave off.
+        # If a client is already initialized, weave.init just returns it, and there is nothing to prepare.
+        if (
+            self.settings.background_init
+            and self.settings.spool_dir is None
+            and not self._weave_initialized
+            and self._client_init is None
+            and get_weave_client() is None
+        ):
+            self._client_init = asyncio.create_task(asyncio.to_thread(self._prepare_weave_init))
 
     @override
     async def on_run_end(self, data: RunEnd) -> None:
         # Only proceed with cleanup if Weave was actually initialized
         if not self._weave_initialized:
+            await self._await_client_init()
             return
-            
-        # Finalize all active loggers
+        self._client_init = None
+
+        # Wait for any queued sample and task events to be written before finalizing
+        dispatcher = self._get_dispatcher()
+        await asyncio.to_thread(dispatcher.close)
+        if self.settings is not None and self.settings.background_logging:
+            logger.info(f"Weave telemetry worker stats: {dispatcher.stats}")
+        self.dispatcher = None
+
+        if self.spool is not None:
+            # spool mode: record how each evaluation finished, to be applied when the journal is replayed
+            for eval_id in list(self.spool.eval_ids):
+                self.spool.finish(eval_id, exception=self._run_exception(data))
+            self.spool.close()
+            self.spool = None
+            self.payload_budget = None
+            self.task_mapping.clear()
+            self.sample_calls.clear()
+            return
+
+        # Loggers are finalized at task end, so this only finalizes tasks that did not end
         for weave_eval_logger in self.weave_eval_loggers.values():
             if not weave_eval_logger._is_finalized:
                 if data.exception is not None:
                     weave_eval_logger.finish(exception=data.exception)
-                elif errors := [eval.error for eval in data.logs]:
-                    weave_eval_logger.finish(
-                        exception=WeaveEvaluationException(
-                            message="Inspect run failed", 
-                            error="\n".join([error.message for error in errors if error is not None])
-                        )
-                    )
+                elif (exception := self._run_exception(data)) is not None:
+                    weave_eval_logger.finish(exception=exception)
                 else:
                     weave_eval_logger.finish()
         
         # Clear the loggers dict and task mapping
         self.weave_eval_loggers.clear()
         self.task_mapping.clear()
-        self.weave_client.finish(use_progress_bar=False)
+        if self.settings is not None and self.settings.flush_timeout is not None:
+            # wait at most flush_timeout for pending calls, spilling the rest, so the process is not held up on exit
+            stats = await asyncio.to_thread(
+                drain_weave_client,
+                self.weave_client,
+                timeout=self.settings.flush_timeout,
+                workers=self.settings.flush_workers,
+                spill_path=weave_spill_path(self.settings.flush_spill_dir, data.run_id),
+            )
+            logger.info(f"Weave flush stats: {stats}")
+        else:
+            self.weave_client.finish(use_progress_bar=False)
+        self.payload_budget = None
         if self.settings is not None and self.settings.autopatch:
             get_inspect_patcher().undo_patch()
 
+    def _run_exception(self, data: RunEnd) -> WeaveEvaluationException | None:
+        if data.exception is not None:
+            return WeaveEvaluationException(message="Inspect run failed", error=repr(data.exception))
+        if errors := [eval.error for eval in data.logs if eval.error is not None]:
+            return WeaveEvaluationException(
+                message="Inspect run failed", 
+                error="\n".join([error.message for error in errors])
+            )
+        return None
+
     @override
     async def on_task_start(self, data: TaskStart) -> None:
         # Ensure settings are loaded
@@ -83,18 +153,42 @@ class WeaveEvaluationHooks(Hooks):
         
         if not self._hooks_enabled:
             logger.info(f"Weave hooks disabled for run (task: {data.spec.task})")
+            await self._await_client_init()
             return
         
-        # Lazy initialization: only init Weave when first task starts
-        if not self._weave_initialized:
-            self.weave_client = weave.init(
-                project_name=f"{self.settings.entity}/{self.settings.project}",
-                settings=UserSettings(
-                    print_call_link=False
+        if self.settings.spool_dir is not None:
+            # spool mode: record the evaluation locally instead of initialising Weave
+            if self.spool is None:
+                self.spool = WeaveSpoolRecorder(
+                    self.settings.spool_dir,
+                    run_id=data.run_id,
+                    project=f"{self.settings.entity}/{self.settings.project}",
+                    batch_scores=self.settings.batch_scores,
+                    max_payload_bytes=self.settings.max_payload_bytes,
+                    intern_inputs=self.settings.intern_inputs,
                 )
+                self._weave_initialized = True
+            self.spool.evaluation_start(
+                eval_id=data.eval_id,
+                name=data.spec.task,
+                dataset=data.spec.dataset.name or "test_dataset",
+                model=format_model_name(data.spec.model),
+                eval_attributes=self._get_eval_metadata(data),
             )
+            self.task_mapping[data.eval_id] = data.spec.task
+            return
+
+        if not self._weave_initialized:
+            # wait for the setup started in on_run_start, if it has not finished yet
+            await self._await_client_init()
+
+        # Lazy initialization: only init Weave when first task starts
+        if not self._weave_initialized:
+            self.weave_client = self._init_weave_client()
             if self.settings.autopatch:
-                get_inspect_patcher(CustomAutopatchSettings().inspect).attempt_patch()
+                inspect_patcher = get_inspect_patcher(CustomAutopatchSettings().inspect)
+                inspect_patcher.trace_sample_rate = self.settings.trace_sample_rate
+                inspect_patcher.attempt_patch()
             self._weave_initialized = True
             logger.info(f"Weave initialized for task {data.spec.task}")
         
@@ -103,7 +197,8 @@ class WeaveEvaluationHooks(Hooks):
             name=data.spec.task,
             dataset=data.spec.dataset.name or "test_dataset", # TODO: set a default dataset name
             model=model_name,
-            eval_attributes=self._get_eval_metadata(data)
+            eval_attributes=self._get_eval_metadata(data),
+            streaming=self.settings.stream_predictions
         )
         
         # Store logger with task_id as key
@@ -113,7 +208,10 @@ class WeaveEvaluationHooks(Hooks):
         self.task_mapping[data.eval_id] = data.spec.task
         
         assert weave_eval_logger._evaluate_call is not None
+        if (stale_call := _task_evaluate_call.get()) is not None:
+            call_context.pop_call(stale_call.id)
         call_context.push_call(weave_eval_logger._evaluate_call)
+        _task_evaluate_call.set(weave_eval_logger._evaluate_call)
 
     @override
     async def on_task_end(self, data: TaskEnd) -> None:
@@ -121,9 +219,6 @@ class WeaveEvaluationHooks(Hooks):
         if not self._hooks_enabled:
             return
             
-        weave_eval_logger = self.weave_eval_loggers.get(data.eval_id)
-        assert weave_eval_logger is not None
-        
         summary: dict[str, dict[str, int | float]] = {}
         if data.log and data.log.results:
             for score in data.log.results.scores:
@@ -132,12 +227,21 @@ class WeaveEvaluationHooks(Hooks):
                     summary[scorer_name] = {}
                     for metric_name, metric in score.metrics.items():
                         summary[scorer_name][metric_name] = metric.value
-        weave_eval_logger.log_summary(summary)
 
-        if data.log.eval.metadata is None and weave_eval_logger._evaluate_call is not None:
-            data.log.eval.metadata = {"weave_run_url": weave_eval_logger._evaluate_call.ui_url}
-        elif data.log.eval.metadata is not None and weave_eval_logger._evaluate_call is not None:
-            data.log.eval.metadata["weave_run_url"] = weave_eval_logger._evaluate_call.ui_url
+        if self.spool is None:
+            # read the logger before dispatching, as the task_end handler finalizes and evicts it
+            weave_eval_logger = self.weave_eval_loggers.get(data.eval_id)
+            assert weave_eval_logger is not None
+            if weave_eval_logger._evaluate_call is not None:
+                if data.log.eval.metadata is None:
+                    data.log.eval.metadata = {"weave_run_url": weave_eval_logger._evaluate_call.ui_url}
+                else:
+                    data.log.eval.metadata["weave_run_url"] = weave_eval_logger._evaluate_call.ui_url
+                call_context.pop_call(weave_eval_logger._evaluate_call.id)
+            _task_evaluate_call.set(None)
+
+        self._get_dispatcher().dispatch("task_end", eval_id=data.eval_id, summary=summary)
+        self.task_mapping.pop(data.eval_id, None)
 
     @override
     async def on_sample_start(self, data: SampleStart) -> None:
@@ -146,20 +250,9 @@ class WeaveEvaluationHooks(Hooks):
             return
         
         if self.settings is not None and self.settings.autopatch:
-            task_name = self.task_mapping.get(data.eval_id, "unknown_task")
-            self.sample_calls[data.sample_id] = self.weave_client.create_call(
-                op="inspect-sample",
-                inputs={"input": data.summary.input},
-                attributes={
-                    "sample_id": data.summary.id, 
-                    "sample_uuid": data.sample_id, 
-                    "epoch": data.summary.epoch,
-                    "task_name": task_name,
-                    "task_id": data.eval_id,
-                    "metadata": data.summary.metadata,
-                },
-                display_name=format_sample_display_name(self.settings.sample_name_template, task_name, data.summary.id, data.summary.epoch)
-            )
+            if not sample_traced(data.summary.id, data.summary.epoch, self.settings.trace_sample_rate):
+                return
+            self._start_sample_call(data.eval_id, data.sample_id, data.summary.id, data.summary.epoch, data.summary.input, data.summary.metadata)
 
     @override
     async def on_sample_end(self, data: SampleEnd) -> None:
@@ -167,84 +260,138 @@ class WeaveEvaluationHooks(Hooks):
         if not self._hooks_enabled:
             return
             
-        weave_eval_logger = self.weave_eval_loggers.get(data.eval_id)
-        assert weave_eval_logger is not None
-        
-        sample_id = int(data.sample.id)
-        epoch = data.sample.epoch
-        input_value = data.sample.input
-        with weave.attributes({"sample_id": sample_id, "epoch": epoch}):
-            sample_score_logger = weave_eval_logger.log_prediction(
-                inputs={"input": input_value},
-                output=data.sample.output.completion,
-                parent_call=self.sample_calls[data.sample_id] if self.settings is not None and self.settings.autopatch else None
+        autopatch = self.settings is not None and self.settings.autopatch
+        if self.settings is not None and autopatch and not sample_traced(data.sample.id, data.sample.epoch, self.settings.trace_sample_rate):
+            if self.settings.trace_failures and sample_failed(data.sample):
+                # left out by trace sampling, so its solver steps were not traced, but failures always get a sample call
+                # The call is created in the task's context and may be finished on another thread, so it is kept off the call stack
+                self._start_sample_call(
+                    data.eval_id, data.sample_id, data.sample.id, data.sample.epoch, data.sample.input, data.sample.metadata, use_stack=False
+                )
+            else:
+                autopatch = False
+        if self.spool is not None:
+            self._get_dispatcher().dispatch(
+                "sample_end", eval_id=data.eval_id, sample=data.sample, sample_call_id=data.sample_id if autopatch else None
             )
-        if data.sample.scores is not None:
-            for k,v in data.sample.scores.items():
-                score_metadata = (v.metadata or {}) | ({"explanation": v.explanation} if v.explanation is not None else {})
-                with weave.attributes(score_metadata):
-                    sample_score_logger.log_score(
-                        scorer=k,
-                        score=format_score_types(v.value)
-                    )
+            return
+        sample_call = self.sample_calls.pop(data.sample_id) if autopatch else None
+        self._get_dispatcher().dispatch("sample_end", eval_id=data.eval_id, sample=data.sample, sample_call=sample_call)
 
-                    # Log various metrics to Weave
-        try:
-            # Total time
-            if (
-                hasattr(data.sample, "total_time")
-                and data.sample.total_time is not None
-            ):
-                sample_score_logger.log_score(
-                    scorer="total_time", score=data.sample.total_time
-                )
+    def _start_sample_call(
+        self, eval_id: str, sample_uuid: str, sample_id: int | str, epoch: int, input: Any, metadata: dict[str, Any], use_stack: bool = True
+    ) -> None:
+        assert self.settings is not None
+        task_name = self.task_mapping.get(eval_id, "unknown_task")
+        inputs = {"input": input}
+        attributes = {
+            "sample_id": sample_id, 
+            "sample_uuid": sample_uuid, 
+            "epoch": epoch,
+            "task_name": task_name,
+            "task_id": eval_id,
+            "metadata": metadata,
+        }
+        display_name = format_sample_display_name(self.settings.sample_name_template, task_name, sample_id, epoch)
+        if self.spool is not None:
+            self.spool.call_start(sample_uuid, eval_id, "inspect-sample", inputs, attributes, display_name)
+            return
+        payload_budget = self._get_payload_budget()
+        # parented explicitly to the sample's own evaluation rather than whatever call is current, and only pushed onto
+        # the call stack of the sample's context, where Inspect runs its solvers
+        weave_eval_logger = self.weave_eval_loggers.get(eval_id)
+        self.sample_calls[sample_uuid] = self.weave_client.create_call(
+            op="inspect-sample",
+            parent=weave_eval_logger._evaluate_call if weave_eval_logger is not None else None,
+            use_stack=use_stack,
+            inputs=payload_budget.limit_inputs(inputs, eval_id),
+            attributes=attributes | {"metadata": payload_budget.limit_attribute(metadata, eval_id)},
+            display_name=display_name
+        )
 
-            # Total tokens - model_usage is a dict of model_name -> ModelUsage
-            if hasattr(data.sample, "model_usage") and data.sample.model_usage:
-                # Get the first (and usually only) model's token usage
-                for model_name, usage in data.sample.model_usage.items():
-                    if usage.total_tokens is not None:
-                        sample_score_logger.log_score(
-                            scorer="total_tokens", score=usage.total_tokens
-                        )
-                        break  # Only log the first model's tokens
+    def _init_weave_client(self) -> WeaveClient:
+        assert self.settings is not None
+        return weave.init(
+            project_name=f"{self.settings.entity}/{self.settings.project}",
+            settings=UserSettings(
+                print_call_link=False
+            )
+        )
 
-            # Number of tools from metadata - metadata is a dict
-            if (
-                hasattr(data.sample, "metadata")
-                and data.sample.metadata
-                and "Annotator Metadata" in data.sample.metadata
-                and "Number of tools" in data.sample.metadata["Annotator Metadata"]
-            ):
-                sample_score_logger.log_score(
-                    scorer="num_tool_calls",
-                    score=int(
-                        data.sample.metadata["Annotator Metadata"]["Number of tools"]
-                    ),
-                )
+    def _prepare_weave_init(self) -> None:
+        """
+        The setup of weave.init which neither creates the project nor patches LLM clients: finding the W&B credentials, and
+        opening a connection to the trace server with a read-only request. The trace server client shares its connection pool
+        between instances, so the client weave.init builds reuses the connection.
+        """
+        api_key = weave_wandb_api_key()
+        if api_key is None:
+            logger.warning("No W&B API key found, Weave will ask you to log in when the first task starts")
+            return
+        init_weave_get_server(api_key).server_info()
 
+    async def _await_client_init(self) -> None:
+        """
+        Wait for the setup started in on_run_start, logging rather than raising any error, as weave.init reports it again.
+        """
+        if self._client_init is None:
+            return
+        client_init, self._client_init = self._client_init, None
+        try:
+            await client_init
         except Exception as e:
-            logger.error(f"Failed to log metrics to Weave: {e}")
-            raise e
+            logger.warning(f"Weave setup started at run start failed: {e}")
 
-        sample_score_logger.finish()
-        if self.settings is not None and self.settings.autopatch:
-            # Extract model tokens as {model_name: total_tokens} dict
-            model_tokens = {
-                format_model_name(model_name): usage.total_tokens 
-                for model_name, usage in data.sample.model_usage.items()
-            }
-            
-            self.weave_client.finish_call(
-                self.sample_calls[data.sample_id], 
-                output={
-                    "output": data.sample.output.completion, 
-                    "scores": data.sample.scores, 
-                    "total_time": data.sample.total_time, 
-                    "token_usage": model_tokens
-                }
+    def _get_dispatcher(self) -> TelemetryDispatcher:
+        if self.dispatcher is None:
+            assert self.settings is not None
+            self.dispatcher = TelemetryDispatcher(
+                handlers={
+                    "sample_end": self.spool.sample_end,
+                    "task_end": self.spool.task_end,
+                } if self.spool is not None else {
+                    "sample_end": self._log_sample_end,
+                    "task_end": self._log_task_summary,
+                },
+                name="inspect-wandb-weave",
+                # offloading payloads publishes them to Weave, which is kept off the event loop by the background worker
+                background=self.settings.background_logging or self.settings.max_payload_bytes is not None or self.settings.intern_inputs,
+                maxsize=self.settings.queue_size,
+                backpressure=self.settings.backpressure,
             )
-            self.sample_calls.pop(data.sample_id)
+        return self.dispatcher
+
+    def _get_payload_budget(self) -> PayloadBudget:
+        if self.payload_budget is None:
+            assert self.settings is not None
+            self.payload_budget = PayloadBudget(self.settings.max_payload_bytes, intern_inputs=self.settings.intern_inputs)
+        return self.payload_budget
+
+    def _log_task_summary(self, eval_id: str, summary: dict[str, dict[str, int | float]]) -> None:
+        # logging the summary finalizes the evaluation, so the task's logger is released here rather than at run end
+        weave_eval_logger = self.weave_eval_loggers.pop(eval_id, None)
+        assert weave_eval_logger is not None
+        if (payloads := self._get_payload_budget().pop_summary(eval_id)) is not None:
+            summary = summary | {"payloads": payloads}
+        weave_eval_logger.log_summary(summary)
+
+    def _log_sample_end(self, eval_id: str, sample: EvalSample, sample_call: Call | None) -> None:
+        weave_eval_logger = self.weave_eval_loggers.get(eval_id)
+        assert weave_eval_logger is not None
+        payload_budget = self._get_payload_budget()
+        
+        log_sample_prediction(
+            weave_eval_logger,
+            inputs=payload_budget.limit_inputs({"input": sample.input}, eval_id),
+            output=payload_budget.limit(sample.output.completion, eval_id),
+            scores=sample_scores(sample),
+            metrics=sample_metrics(sample),
+            attributes={"sample_id": int(sample.id), "epoch": sample.epoch},
+            parent_call=sample_call,
+            batch_scores=self.settings is not None and self.settings.batch_scores
+        )
+        if sample_call is not None:
+            self.weave_client.finish_call(sample_call, output=payload_budget.limit_fields(sample_call_output(sample), eval_id))
 
     def _check_enable_override(self, data: TaskStart) -> bool|None:
         """
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict, defaultdict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Mapping
+
+import weave
+from pydantic_core import to_jsonable_python
+from weave.trace.refs import ObjectRef
+
+PAYLOAD_OBJECT_NAME = "inspect-payload"
+# refs to the most recently offloaded values kept to deduplicate against
+MAX_CACHED_REFS = 10000
+
+@dataclass
+class PayloadStats:
+    fields_offloaded: int = 0
+    bytes_offloaded: int = 0
+    bytes_deduplicated: int = 0
+
+class PayloadBudget:
+    """
+    Keeps the fields of call payloads under a byte budget by offloading larger values to Weave objects.
+
+    A value whose JSON encoding is over `max_bytes` is published once as a version of the `inspect-payload` object, and
+    the field holds a ref to it instead. Objects are content-addressed by Weave, and values already published in this run
+    are recognised by their sha256 and not sent again. Only the refs of the `max_refs` most recently used values are kept,
+    so a long run does not hold a ref for every value it has offloaded. Offloaded volume is counted per evaluation in `stats`.
+    With `max_bytes=None`, values are passed through unchanged unless they are interned.
+
+    With `intern_inputs`, call inputs are offloaded whatever their size, so an input that is sent repeatedly, such as the
+    input of a sample run for several epochs, is serialised and uploaded once and later calls carry a ref to it.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int | None,
+        intern_inputs: bool = False,
+        publish: Callable[..., ObjectRef] = weave.publish,
+        max_refs: int = MAX_CACHED_REFS,
+    ):
+        self.max_bytes = max_bytes
+        self.intern_inputs = intern_inputs
+        self.max_refs = max_refs
+        self.stats: defaultdict[str, PayloadStats] = defaultdict(PayloadStats)
+        self._publish = publish
+        self._refs: OrderedDict[str, ObjectRef] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def limit(self, value: Any, eval_id: str, intern: bool = False) -> Any:
+        """
+        Returns `value`, or a ref to it if it is over the budget or `intern` is set.
+        """
+        if (self.max_bytes is None and not intern) or value is None or isinstance(value, int | float | bool):
+            return value
+        jsonable = to_jsonable_python(value, fallback=str)
+        encoded = json.dumps(jsonable, separators=(",", ":")).encode()
+        if not intern and self.max_bytes is not None and len(encoded) <= self.max_bytes:
+            return value
+
+        digest = hashlib.sha256(encoded).hexdigest()
+        with self._lock:
+            ref = self._refs.get(digest)
+        if ref is None:
+            ref = self._publish(jsonable, name=PAYLOAD_OBJECT_NAME)
+        with self._lock:
+            stats = self.stats[eval_id]
+            stats.fields_offloaded += 1
+            if digest in self._refs:
+                stats.bytes_deduplicated += len(encoded)
+                self._refs.move_to_end(digest)
+            else:
+                self._refs[digest] = ref
+                stats.bytes_offloaded += len(encoded)
+                if len(self._refs) > self.max_refs:
+                    self._refs.popitem(last=False)
+        return ref
+
+    def limit_fields(self, fields: Mapping[str, Any], eval_id: str, intern: bool = False) -> dict[str, Any]:
+        """
+        Applies the budget to each field of a call's inputs or output.
+        """
+        return {key: self.limit(value, eval_id, intern) for key, value in fields.items()}
+
+    def limit_inputs(self, inputs: Mapping[str, Any], eval_id: str) -> dict[str, Any]:
+        """
+        Applies the budget to a call's inputs, interning them if `intern_inputs` is set.
+        """
+        return self.limit_fields(inputs, eval_id, intern=self.intern_inputs)
+
+    def limit_attribute(self, value: Any, eval_id: str) -> Any:
+        """
+        Applies the budget to a call attribute. Attributes cannot hold refs, so an offloaded value is replaced by its ref's URI.
+        """
+        limited = self.limit(value, eval_id)
+        return limited.uri() if isinstance(limited, ObjectRef) else limited
+
+    def pop_summary(self, eval_id: str) -> dict[str, int | float] | None:
+        """
+        Offloaded payload volume for a finished evaluation, to include in its summary, or None if nothing was offloaded.
+        """
+        with self._lock:
+            stats = self.stats.pop(eval_id, None)
+        return asdict(stats) if stats is not None else None
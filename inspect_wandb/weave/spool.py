@@ -0,0 +1,278 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from logging import getLogger
+from pathlib import Path
+from typing import Any
+
+import weave
+from weave.trace.context import call_context
+from weave.trace.settings import UserSettings
+from weave.trace.weave_client import Call, WeaveClient
+from inspect_ai.log import EvalSample
+from inspect_wandb.exceptions import WeaveEvaluationException
+from inspect_wandb.telemetry.spool import JournalProgress, SpoolWriter, is_synced, mark_synced, read_journal, reset_progress
+from inspect_wandb.weave.drain import WEAVE_SPILL, replay_weave_spill
+from inspect_wandb.weave.custom_evaluation_logger import CustomEvaluationLogger, log_sample_prediction
+from inspect_wandb.weave.payloads import PayloadBudget
+from inspect_wandb.weave.utils import sample_call_output, sample_metrics, sample_scores
+
+logger = getLogger(__name__)
+
+def weave_spool_path(spool_dir: str | Path, run_id: str) -> Path:
+    return Path(spool_dir) / "weave" / run_id
+
+class WeaveSpoolRecorder:
+    """
+    Records the Weave evaluation calls made by the hooks to a local journal instead of sending them to Weave.
+    The journal is replayed into Weave by `replay_weave_journal` (see `inspect-wandb sync`).
+    """
+
+    def __init__(
+        self,
+        spool_dir: str | Path,
+        run_id: str,
+        project: str,
+        batch_scores: bool = False,
+        max_payload_bytes: int | None = None,
+        intern_inputs: bool = False,
+    ):
+        self.writer = SpoolWriter(weave_spool_path(spool_dir, run_id))
+        self.eval_ids: list[str] = []
+        self.writer.write(
+            "run_start",
+            {
+                "run_id": run_id,
+                "project": project,
+                "batch_scores": batch_scores,
+                "max_payload_bytes": max_payload_bytes,
+                "intern_inputs": intern_inputs,
+            },
+        )
+
+    def evaluation_start(self, eval_id: str, name: str, dataset: str, model: str, eval_attributes: dict[str, Any]) -> None:
+        self.eval_ids.append(eval_id)
+        self.writer.write(
+            "evaluation_start",
+            {"eval_id": eval_id, "name": name, "dataset": dataset, "model": model, "eval_attributes": eval_attributes},
+        )
+
+    def call_start(self, call_id: str, eval_id: str, op: str, inputs: dict[str, Any], attributes: dict[str, Any], display_name: str) -> None:
+        self.writer.write(
+            "call_start",
+            {"call_id": call_id, "eval_id": eval_id, "op": op, "inputs": inputs, "attributes": attributes, "display_name": display_name},
+        )
+
+    def sample_end(self, eval_id: str, sample: EvalSample, sample_call_id: str | None) -> None:
+        self.writer.write(
+            "prediction",
+            {
+                "eval_id": eval_id,
+                "parent_call_id": sample_call_id,
+                "inputs": {"input": sample.input},
+                "output": sample.output.completion,
+                "scores": sample_scores(sample),
+                "metrics": sample_metrics(sample),
+                "attributes": {"sample_id": int(sample.id), "epoch": sample.epoch},
+            },
+        )
+        if sample_call_id is not None:
+            self.writer.write("call_finish", {"call_id": sample_call_id, "output": sample_call_output(sample)})
+
+    def task_end(self, eval_id: str, summary: dict[str, dict[str, int | float]]) -> None:
+        self.writer.write("summary", {"eval_id": eval_id, "summary": summary})
+        # the summary finalizes the evaluation, so only evaluations whose task did not end are finished at run end
+        self.finish(eval_id)
+
+    def finish(self, eval_id: str, exception: WeaveEvaluationException | None = None) -> None:
+        if eval_id in self.eval_ids:
+            self.eval_ids.remove(eval_id)
+        self.writer.write(
+            "finish",
+            {
+                "eval_id": eval_id,
+                "exception": None if exception is None else {"message": exception.message, "error": exception.error},
+            },
+        )
+
+    def close(self) -> None:
+        self.writer.close()
+
+def _journal_project(journal: Path) -> str | None:
+    for kind, payload in read_journal(journal):
+        if kind == "run_start":
+            return payload["project"]
+    return None
+
+def _evaluation_key(eval_id: str) -> str:
+    return f"evaluation/{eval_id}"
+
+def replay_weave_journal(journal: str | Path, client: WeaveClient, progress: JournalProgress | None = None) -> int:
+    """
+    Replay a single run's journal into Weave, returning the number of predictions written.
+    With `progress`, evaluations replayed by an earlier sync are skipped, and each evaluation is recorded there once
+    it has been finished and sent. Progress is kept per evaluation, not per prediction: if the replay fails part way
+    through an evaluation, that evaluation is finished as failed, and the next sync replays it again from its start.
+    """
+    loggers: dict[str, CustomEvaluationLogger] = {}
+    # sample calls in progress, with the evaluation they belong to
+    calls: dict[str, tuple[Call, str]] = {}
+    # sample calls of evaluations replayed by an earlier sync
+    skipped_calls: set[str] = set()
+    predictions = 0
+    batch_scores = False
+    # payloads are journaled in full, and the budget is applied when they are sent
+    payload_budget = PayloadBudget(None)
+    try:
+        for kind, payload in read_journal(journal):
+            if progress is not None and "eval_id" in payload and _evaluation_key(payload["eval_id"]) in progress:
+                if kind == "call_start":
+                    skipped_calls.add(payload["call_id"])
+                continue
+            if kind == "run_start":
+                batch_scores = payload.get("batch_scores", False)
+                payload_budget = PayloadBudget(payload.get("max_payload_bytes"), intern_inputs=payload.get("intern_inputs", False))
+            elif kind == "evaluation_start":
+                # keep the evaluation off the global call stack so evaluations replay independently
+                with call_context.set_call_stack([]):
+                    loggers[payload["eval_id"]] = CustomEvaluationLogger(
+                        name=payload["name"],
+                        dataset=payload["dataset"],
+                        model=payload["model"],
+                        eval_attributes=payload["eval_attributes"],
+                        streaming=True,
+                    )
+            elif kind == "call_start":
+                evaluate_call = loggers[payload["eval_id"]]._evaluate_call
+                assert evaluate_call is not None
+                eval_id = payload["eval_id"]
+                attributes = payload["attributes"]
+                if "metadata" in attributes:
+                    attributes = attributes | {"metadata": payload_budget.limit_attribute(attributes["metadata"], eval_id)}
+                calls[payload["call_id"]] = (client.create_call(
+                    op=payload["op"],
+                    inputs=payload_budget.limit_inputs(payload["inputs"], eval_id),
+                    parent=evaluate_call,
+                    attributes=attributes,
+                    display_name=payload["display_name"],
+                    use_stack=False,
+                ), eval_id)
+            elif kind == "prediction":
+                parent_call_id = payload["parent_call_id"]
+                log_sample_prediction(
+                    loggers[payload["eval_id"]],
+                    inputs=payload_budget.limit_inputs(payload["inputs"], payload["eval_id"]),
+                    output=payload_budget.limit(payload["output"], payload["eval_id"]),
+                    scores=[tuple(score) for score in payload["scores"]],
+                    metrics=payload["metrics"],
+                    attributes=payload["attributes"],
+                    parent_call=calls[parent_call_id][0] if parent_call_id in calls else None,
+                    batch_scores=batch_scores,
+                )
+                predictions += 1
+            elif kind == "call_finish":
+                if payload["call_id"] in skipped_calls:
+                    continue
+                call, eval_id = calls.pop(payload["call_id"])
+                client.finish_call(call, output=payload_budget.limit_fields(payload["output"], eval_id))
+            elif kind == "summary":
+                summary = payload["summary"]
+                if (payloads := payload_budget.pop_summary(payload["eval_id"])) is not None:
+                    summary = summary | {"payloads": payloads}
+                loggers[payload["eval_id"]].log_summary(summary)
+            elif kind == "finish":
+                weave_eval_logger = loggers.pop(payload["eval_id"])
+                if not weave_eval_logger._is_finalized:
+                    exception = payload["exception"]
+                    weave_eval_logger.finish(
+                        exception=WeaveEvaluationException(**exception) if exception is not None else None
+                    )
+                _record_evaluation(client, progress, payload["eval_id"])
+    except Exception as e:
+        # left open, a partly replayed evaluation would look like it was still running next to its replay by the next sync
+        _abandon_evaluations(loggers, calls, client, e)
+        raise
+    # evaluations from a run that crashed before writing `finish` are closed as incomplete
+    for eval_id, weave_eval_logger in loggers.items():
+        if not weave_eval_logger._is_finalized:
+            weave_eval_logger.finish(
+                exception=WeaveEvaluationException(message="Inspect run did not finish", error=f"No finish event recorded for {eval_id}")
+            )
+        _record_evaluation(client, progress, eval_id)
+    return predictions
+
+def _abandon_evaluations(
+    loggers: dict[str, CustomEvaluationLogger], calls: dict[str, tuple[Call, str]], client: WeaveClient, error: Exception
+) -> None:
+    try:
+        for call, _ in calls.values():
+            client.finish_call(call, exception=error)
+        for eval_id, weave_eval_logger in loggers.items():
+            if not weave_eval_logger._is_finalized:
+                weave_eval_logger.finish(
+                    exception=WeaveEvaluationException(message="Sync failed, the evaluation is replayed again by the next sync", error=str(error))
+                )
+        client.flush()
+    except Exception as e:
+        logger.warning(f"Failed to finish the evaluations left part way through the failed sync: {e}")
+
+def _record_evaluation(client: WeaveClient, progress: JournalProgress | None, eval_id: str) -> None:
+    if progress is None:
+        return
+    # only recorded once its calls have been sent, so an evaluation lost to a failed upload is replayed again
+    client.flush()
+    progress.add(_evaluation_key(eval_id))
+
+def _replay(journal: Path, client: WeaveClient) -> tuple[Path, int | None]:
+    progress = JournalProgress(journal)
+    try:
+        if journal.parent.name == WEAVE_SPILL:
+            return journal, replay_weave_spill(journal, client.server, progress)
+        return journal, replay_weave_journal(journal, client, progress)
+    except Exception as e:
+        logger.warning(f"Failed to replay Weave journal {journal}, it will be resumed by the next sync: {e}")
+        return journal, None
+    finally:
+        progress.close()
+
+def sync_weave_spool(spool_dir: str | Path, workers: int = 8, force: bool = False) -> list[Path]:
+    """
+    Replay every unsynced Weave journal under `spool_dir`, returning the journals that were synced.
+    This includes the calls spilled by runs whose flush timed out (see `flush_timeout`).
+    Journals are grouped by project, and the journals for each project are replayed in parallel.
+    A journal that fails to replay is not marked as synced, and the next sync resumes it without sending the parts
+    already replayed again. With `force`, synced journals are replayed again from the start.
+    """
+    journals = sorted(
+        p
+        for root in (Path(spool_dir) / "weave", Path(spool_dir) / WEAVE_SPILL)
+        if root.exists()
+        for p in root.glob("*")
+        if p.is_dir() and (force or not is_synced(p))
+    )
+    by_project: dict[str, list[Path]] = {}
+    for journal in journals:
+        project = _journal_project(journal)
+        if project is None:
+            logger.warning(f"Skipping Weave journal with no run_start event: {journal}")
+            continue
+        by_project.setdefault(project, []).append(journal)
+        if force:
+            reset_progress(journal)
+
+    synced: list[Path] = []
+    for project, project_journals in by_project.items():
+        client = weave.init(project_name=project, settings=UserSettings(print_call_link=False))
+        replayed_journals: list[Path] = []
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inspect-wandb-sync") as pool:
+            results = pool.map(partial(_replay, client=client), project_journals)
+            for journal, replayed in results:
+                if replayed is None:
+                    continue
+                unit = "spilled calls" if journal.parent.name == WEAVE_SPILL else "predictions"
+                logger.info(f"Replayed {replayed} {unit} from {journal} to {project}")
+                replayed_journals.append(journal)
+        client.finish(use_progress_bar=False)
+        for journal in replayed_journals:
+            mark_synced(journal)
+        synced.extend(replayed_journals)
+    return synced
@@ -0,0 +1,79 @@
+from __future__ import annotations
+from numbers import Number
+from typing import Any
+
+from pydantic import BaseModel
+
+class StreamingSummary:
+    """
+    An online equivalent of Weave's `auto_summarize` for the scores of an evaluation.
+
+    Instead of keeping every prediction's scores until the end of the evaluation, each score is folded into a tree of
+    running aggregates as soon as it is logged: the mean of numeric values, and the true count and fraction of boolean
+    values, recursing into dict scores. As in `auto_summarize`, the type of each value is taken from the first non-None
+    value seen, and values of any other type are ignored. Memory is proportional to the number of distinct score keys,
+    not the number of predictions.
+    """
+
+    def __init__(self) -> None:
+        self.kind: str | None = None
+        self.count = 0
+        self.total = 0.0
+        self.true_count = 0
+        self.children: dict[str, StreamingSummary] = {}
+        self.updates = 0
+
+    def update(self, value: Any) -> None:
+        self.updates += 1
+        if isinstance(value, BaseModel):
+            value = value.model_dump()
+        if value is None:
+            return
+        if self.kind is None:
+            self.kind = self._kind(value)
+
+        if self.kind == "bool":
+            self.count += 1
+            self.true_count += int(bool(value))
+        elif self.kind == "number" and isinstance(value, Number):
+            self.count += 1
+            self.total += float(value)  # type: ignore[arg-type]
+        elif self.kind == "dict" and isinstance(value, dict):
+            self.count += 1
+            for key, child_value in value.items():
+                child = self.children.get(key)
+                if child is None:
+                    child = StreamingSummary()
+                    self.children[key] = child
+                child.update(child_value)
+
+    def summary(self) -> dict[str, Any] | None:
+        if self.updates == 0:
+            return {}
+        return self._summary()
+
+    def _summary(self) -> dict[str, Any] | None:
+        if self.kind == "bool":
+            return {"true_count": self.true_count, "true_fraction": self.true_count / self.count}
+        if self.kind == "number":
+            return {"mean": self.total / self.count}
+        if self.kind == "dict":
+            result: dict[str, Any] = {}
+            for key, child in self.children.items():
+                if (child_summary := child._summary()) is not None:
+                    if key in child_summary:
+                        result.update(child_summary)
+                    else:
+                        result[key] = child_summary
+            return result or None
+        return None
+
+    @staticmethod
+    def _kind(value: Any) -> str:
+        if isinstance(value, bool):
+            return "bool"
+        if isinstance(value, Number):
+            return "number"
+        if isinstance(value, dict):
+            return "dict"
+        return "other"
@@ -1,6 +1,8 @@
+import hashlib
 from weave.evaluation.eval_imperative import ScoreType
-from inspect_ai.scorer import Value
-from typing import Sequence, Mapping
+from inspect_ai.log import EvalSample
+from inspect_ai.scorer import INCORRECT, NOANSWER, Value
+from typing import Any, Sequence, Mapping
 from logging import getLogger
 
 utils_logger = getLogger(__name__)
@@ -21,7 +23,58 @@ def format_score_types(score_value: Value) -> ScoreType:
         return dict(score_value)
     else:
         return score_value
-    
+
+def sample_scores(sample: EvalSample) -> list[tuple[str, ScoreType, dict[str, Any]]]:
+    """
+    Returns (scorer, score, attributes) for each Inspect score on a sample, in the form they are logged to Weave.
+    """
+    scores: list[tuple[str, ScoreType, dict[str, Any]]] = []
+    for k, v in (sample.scores or {}).items():
+        score_metadata = (v.metadata or {}) | ({"explanation": v.explanation} if v.explanation is not None else {})
+        scores.append((k, format_score_types(v.value), score_metadata))
+    return scores
+
+def sample_metrics(sample: EvalSample) -> dict[str, int | float]:
+    """
+    Returns the per-sample metrics (total time, total tokens and number of tool calls) logged to Weave as scores.
+    """
+    metrics: dict[str, int | float] = {}
+    # Total time
+    if sample.total_time is not None:
+        metrics["total_time"] = sample.total_time
+
+    # Total tokens - model_usage is a dict of model_name -> ModelUsage
+    # Get the first (and usually only) model's token usage
+    for usage in sample.model_usage.values():
+        if usage.total_tokens is not None:
+            metrics["total_tokens"] = usage.total_tokens
+            break
+
+    # Number of tools from metadata - metadata is a dict
+    if (
+        sample.metadata
+        and "Annotator Metadata" in sample.metadata
+        and "Number of tools" in sample.metadata["Annotator Metadata"]
+    ):
+        metrics["num_tool_calls"] = int(sample.metadata["Annotator Metadata"]["Number of tools"])
+    return metrics
+
+def sample_call_output(sample: EvalSample) -> dict[str, Any]:
+    """
+    Returns the output recorded on the autopatched `inspect-sample` call when a sample finishes.
+    """
+    # Extract model tokens as {model_name: total_tokens} dict
+    model_tokens = {
+        format_model_name(model_name): usage.total_tokens
+        for model_name, usage in sample.model_usage.items()
+    }
+    return {
+        "output": sample.output.completion,
+        "scores": sample.scores,
+        "total_time": sample.total_time,
+        "token_usage": model_tokens
+    }
+
 def format_sample_display_name(template: str, task_name: str, sample_id: int | str, epoch: int) -> str:
     """
     Format sample display name using template string with safe variable substitution.
@@ -41,3 +94,31 @@ def format_sample_display_name(template: str, task_name: str, sample_id: int | s
         return template.format(task_name=task_name, sample_id=sample_id, epoch=epoch)
     except (KeyError, ValueError):
         return f"{task_name}-sample-{sample_id}-epoch-{epoch}"
+
+def sample_traced(sample_id: int | str | None, epoch: int, rate: float) -> bool:
+    """
+    Whether a sample is traced when autopatching with the given trace sample rate.
+
+    The decision is a hash of the sample id and epoch, so reruns of an eval trace the same samples, and every hook that
+    needs the decision can recompute it instead of sharing state.
+    """
+    if rate >= 1:
+        return True
+    if rate <= 0:
+        return False
+    digest = hashlib.blake2b(f"{sample_id}:{epoch}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2**64 < rate
+
+def sample_failed(sample: EvalSample) -> bool:
+    """
+    Whether a sample errored or was scored incorrect (or no answer, or zero) by any of its scorers.
+    """
+    if sample.error is not None:
+        return True
+    for score in (sample.scores or {}).values():
+        value = score.value
+        if isinstance(value, str) and value in (INCORRECT, NOANSWER):
+            return True
+        if isinstance(value, int | float) and value == 0:
+            return True
+    return False
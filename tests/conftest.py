@@ -62,6 +62,7 @@ def patch_wandb_client():
     mock_wandb_init = MagicMock()
     with (
         patch("inspect_wandb.models.hooks.wandb.init", mock_wandb_init),
+        patch("inspect_wandb.models.hooks.wandb.setup", MagicMock()),
         patch("inspect_wandb.models.hooks.wandb.save", mock_save),
         patch("inspect_wandb.models.hooks.wandb.config", mock_config),
         patch("inspect_wandb.models.hooks.wandb.summary", mock_summary),
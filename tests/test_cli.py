@@ -0,0 +1,61 @@
+from inspect_wandb.cli import main
+from pathlib import Path
+from pytest import MonkeyPatch
+from unittest.mock import MagicMock, patch
+
+
+class TestCli:
+    """
+    Tests for the `inspect-wandb` command line entry point.
+    """
+
+    def test_sync_spool_dir_argument(self, tmp_path: Path) -> None:
+        # Given
+        sync_models = MagicMock(return_value=[])
+        sync_weave = MagicMock(return_value=[])
+
+        # When
+        with (
+            patch("inspect_wandb.cli.sync_models_spool", sync_models),
+            patch("inspect_wandb.weave.spool.sync_weave_spool", sync_weave)
+        ):
+            exit_code = main(["sync", str(tmp_path), "--workers", "4"])
+
+        # Then
+        assert exit_code == 0
+        sync_models.assert_called_once_with(tmp_path, workers=4, batch_size=16, force=False)
+        sync_weave.assert_called_once_with(tmp_path, workers=4, force=False)
+
+    def test_sync_uses_configured_spool_dir(self, tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+        # Given
+        monkeypatch.setenv("INSPECT_WANDB_MODELS_SPOOL_DIR", str(tmp_path))
+        sync_models = MagicMock(return_value=[])
+
+        # When
+        with patch("inspect_wandb.cli.sync_models_spool", sync_models):
+            exit_code = main(["sync", "--only", "models"])
+
+        # Then
+        assert exit_code == 0
+        sync_models.assert_called_once_with(tmp_path, workers=8, batch_size=16, force=False)
+
+    def test_sync_includes_configured_flush_spill_dir(self, tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+        # Given
+        spill_dir = tmp_path / "spill"
+        spill_dir.mkdir()
+        monkeypatch.setenv("INSPECT_WANDB_WEAVE_SPOOL_DIR", str(tmp_path / "spool"))
+        monkeypatch.setenv("INSPECT_WANDB_WEAVE_FLUSH_SPILL_DIR", str(spill_dir))
+        sync_weave = MagicMock(return_value=[])
+
+        # When
+        with patch("inspect_wandb.weave.spool.sync_weave_spool", sync_weave):
+            exit_code = main(["sync", "--only", "weave"])
+
+        # Then
+        assert exit_code == 0
+        assert [c.args[0] for c in sync_weave.call_args_list] == [tmp_path / "spool", spill_dir]
+
+    def test_sync_fails_without_spool_dir(self, tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+        # no spool_dir is configured, and there is no spilled calls directory
+        monkeypatch.setenv("INSPECT_WANDB_WEAVE_FLUSH_SPILL_DIR", str(tmp_path / "missing"))
+        assert main(["sync"]) == 1
@@ -0,0 +1,114 @@
+from inspect_wandb.models.aggregates import RunningStats, ScoreAggregate
+from inspect_wandb.models.hooks import WandBModelHooks
+from inspect_wandb.config.settings import ModelsSettings
+from inspect_ai.hooks import SampleEnd
+from inspect_ai.log import EvalSample
+from inspect_ai.scorer import Score
+from unittest.mock import MagicMock
+from wandb.sdk.wandb_run import Run
+import math
+import statistics
+import pytest
+
+
+class TestRunningStats:
+    """
+    Tests for the Welford RunningStats aggregate.
+    """
+
+    def test_matches_batch_mean_and_stderr(self) -> None:
+        values = [3.0, 7.0, 7.0, 19.0, 0.5, 10.0]
+        stats = RunningStats()
+        for value in values:
+            stats.update(value)
+        assert stats.mean == pytest.approx(statistics.mean(values))
+        assert stats.variance == pytest.approx(statistics.variance(values))
+        assert stats.stderr == pytest.approx(statistics.stdev(values) / math.sqrt(len(values)))
+
+    def test_single_value_has_zero_stderr(self) -> None:
+        stats = RunningStats()
+        stats.update(4.0)
+        assert stats.stderr == 0.0
+
+
+class TestScoreAggregate:
+    """
+    Tests for the ScoreAggregate class.
+    """
+
+    def test_numeric_and_bool_values(self) -> None:
+        aggregate = ScoreAggregate(namespace="scores/match")
+        for value in (True, False, 1, 0.5):
+            aggregate.update(value)
+        point = aggregate.point()
+        assert point["scores/match/mean"] == pytest.approx(0.625)
+        assert point["scores/match/count"] == 4
+
+    def test_dict_values_aggregated_per_key(self) -> None:
+        aggregate = ScoreAggregate(namespace="scores/f1")
+        aggregate.update({"precision": 0.5, "recall": 1.0, "label": "positive"})
+        aggregate.update({"precision": 1.0, "recall": 0.0, "label": "negative"})
+        point = aggregate.point()
+        assert point["scores/f1/precision/mean"] == pytest.approx(0.75)
+        assert point["scores/f1/recall/mean"] == pytest.approx(0.5)
+        assert point["scores/f1/label/positive_frac"] == pytest.approx(0.5)
+
+    def test_string_categories_are_bounded(self) -> None:
+        aggregate = ScoreAggregate(namespace="scores/grade", max_categories=2)
+        for value in ("A", "B", "A", "D", "F"):
+            aggregate.update(value)
+        point = aggregate.point()
+        assert point == {
+            "scores/grade/A_frac": pytest.approx(0.4),
+            "scores/grade/B_frac": pytest.approx(0.2),
+            "scores/grade/other_frac": pytest.approx(0.4),
+        }
+
+    def test_correct_incorrect_partial_values_aggregated_as_numbers(self) -> None:
+        aggregate = ScoreAggregate(namespace="scores/match")
+        for value in ("C", "I", "P", "C", "unparseable"):
+            aggregate.update(value)
+        point = aggregate.point()
+        assert point["scores/match/mean"] == pytest.approx(0.625)
+        assert point["scores/match/count"] == 4
+        assert point["scores/match/unparseable_frac"] == pytest.approx(1.0)
+
+    def test_numeric_strings_aggregated_as_numbers(self) -> None:
+        aggregate = ScoreAggregate(namespace="scores/judge")
+        for value in ("-0.5", "1e-3", "2", " 0.25 ", "nan"):
+            aggregate.update(value)
+        point = aggregate.point()
+        assert point["scores/judge/mean"] == pytest.approx((-0.5 + 1e-3 + 2 + 0.25) / 4)
+        assert point["scores/judge/count"] == 4
+        assert point["scores/judge/nan_frac"] == pytest.approx(1.0)
+
+    def test_single_element_sequence_unwrapped_and_longer_skipped(self) -> None:
+        aggregate = ScoreAggregate(namespace="scores/seq")
+        aggregate.update([2.0])
+        aggregate.update([1.0, 2.0])
+        assert aggregate.point()["scores/seq/count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_rubric_scores_logged_as_live_mean_and_stderr(self) -> None:
+        # Given
+        hooks = WandBModelHooks()
+        hooks.run = MagicMock(spec=Run)
+        hooks.settings = ModelsSettings(enabled=True, entity="test-entity", project="test-project")
+        hooks._hooks_enabled = True
+        hooks._task_info["test-eval-id"] = ("test_task", "mockllm/model")
+
+        # When
+        for i, grade in enumerate((4, 8, 9)):
+            await hooks.on_sample_end(SampleEnd(
+                run_id="test-run-id",
+                eval_id="test-eval-id",
+                sample_id=f"sample-{i}",
+                sample=EvalSample(id=i, epoch=1, input="in", target="t", scores={"rubric": Score(value=grade)})
+            ))
+
+        # Then
+        last_point = hooks.run.log.call_args_list[-1].args[0]
+        assert last_point["test_task/mockllm__model/scores/samples"] == 3
+        assert last_point["test_task/mockllm__model/scores/rubric/mean"] == pytest.approx(7.0)
+        assert last_point["test_task/mockllm__model/scores/rubric/stderr"] == pytest.approx(statistics.stdev([4, 8, 9]) / math.sqrt(3))
+        hooks.run.define_metric.assert_any_call(name="test_task/mockllm__model/scores/*", step_metric="test_task/mockllm__model/scores/samples")
@@ -0,0 +1,88 @@
+from inspect_wandb.models.file_uploader import FileUploader, expand_files, fingerprint
+from unittest.mock import MagicMock
+from wandb.sdk.wandb_run import Run
+from pathlib import Path
+import hashlib
+import os
+
+
+def make_run() -> MagicMock:
+    run = MagicMock(spec=Run)
+    run.entity = "test-entity"
+    run.project = "test-project"
+    return run
+
+
+class TestFileUploader:
+    """
+    Tests for the FileUploader class.
+    """
+
+    def test_folders_and_globs_expanded(self, tmp_path: Path) -> None:
+        # Given
+        (tmp_path / "logs" / "nested").mkdir(parents=True)
+        (tmp_path / "logs" / "a.json").write_text("a")
+        (tmp_path / "logs" / "nested" / "b.json").write_text("b")
+        (tmp_path / "pyproject.toml").write_text("c")
+        os.symlink(tmp_path / "logs", tmp_path / "logs" / "nested" / "loop")
+
+        # When
+        files = expand_files(["logs", "*.toml", "logs/a.json", "missing/*"], root=tmp_path)
+
+        # Then
+        assert files == [tmp_path / "logs" / "a.json", tmp_path / "logs" / "nested" / "b.json", tmp_path / "pyproject.toml"]
+
+    def test_fingerprint(self, tmp_path: Path) -> None:
+        (tmp_path / "a.txt").write_bytes(b"hello")
+        assert fingerprint(tmp_path / "a.txt") == (hashlib.sha256(b"hello").hexdigest(), 5)
+
+    def test_files_logged_as_one_artifact_with_their_paths(self, tmp_path: Path) -> None:
+        # Given
+        (tmp_path / "configs").mkdir()
+        (tmp_path / "configs" / "a.txt").write_bytes(b"old")
+        (tmp_path / "b.txt").write_bytes(b"new!")
+        (tmp_path / "copy.txt").write_bytes(b"new!")
+        run = make_run()
+
+        # When
+        stats = FileUploader(run, max_workers=2).upload(["configs", "*.txt"], root=tmp_path)
+
+        # Then
+        run.log_artifact.assert_called_once()
+        artifact = run.log_artifact.call_args.args[0]
+        assert artifact.name == "inspect-files"
+        assert sorted(artifact.manifest.entries) == ["b.txt", "configs/a.txt", "copy.txt"]
+        digests = {
+            "b.txt": hashlib.sha256(b"new!").hexdigest(),
+            "configs/a.txt": hashlib.sha256(b"old").hexdigest(),
+            "copy.txt": hashlib.sha256(b"new!").hexdigest(),
+        }
+        assert artifact.metadata == {"sha256": digests}
+        assert stats.digests == digests
+        assert stats.files_logged == 3
+        assert stats.bytes_logged == 11
+        assert stats.summary()["files/sha256"] == digests
+
+    def test_nothing_logged_without_files(self, tmp_path: Path) -> None:
+        # Given
+        run = make_run()
+
+        # When
+        stats = FileUploader(run).upload(["missing/*"], root=tmp_path)
+
+        # Then
+        run.log_artifact.assert_not_called()
+        assert stats.files_logged == 0
+
+    def test_failed_upload_counted(self, tmp_path: Path) -> None:
+        # Given
+        (tmp_path / "a.txt").write_bytes(b"a")
+        run = make_run()
+        run.log_artifact.side_effect = RuntimeError("network error")
+
+        # When
+        stats = FileUploader(run).upload(["a.txt"], root=tmp_path)
+
+        # Then
+        assert stats.files_failed == 1
+        assert stats.files_logged == 0
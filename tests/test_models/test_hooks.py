@@ -1,3 +1,4 @@
+import hashlib
 from inspect_wandb.models.hooks import WandBModelHooks
 from inspect_wandb.config.settings import ModelsSettings
 from unittest.mock import patch, MagicMock
@@ -6,10 +7,14 @@ from wandb.sdk.wandb_run import Run
 from wandb.sdk.wandb_config import Config
 from wandb.sdk.wandb_summary import Summary
 from typing import Callable
-from inspect_ai.hooks import TaskStart, SampleEnd, RunEnd, TaskEnd
+from inspect_ai.hooks import RunStart, TaskStart, SampleEnd, RunEnd, TaskEnd
 from inspect_ai.log import EvalSample, EvalLog
 from inspect_ai.scorer import Score 
 from inspect_wandb.models.hooks import Metric
+from pathlib import Path
+from pytest import MonkeyPatch
+import pandas as pd
+import wandb
 
 @pytest.fixture(scope="function")
 def mock_wandb_run() -> Run:
@@ -70,6 +75,23 @@ class TestWandBModelHooks:
             hooks.run.define_metric.assert_called_once_with(step_metric=Metric.SAMPLES, name=Metric.ACCURACY)
             assert hooks.run.tags == ("inspect_task:test_task", "inspect_model:mockllm/model", "inspect_dataset:test-dataset")
 
+    @pytest.mark.asyncio
+    async def test_wandb_service_started_on_run_start(self, mock_wandb_run: Run, create_task_start: Callable[dict | None, TaskStart]) -> None:
+        """
+        Test that on_run_start starts the wandb service in the background, and on_task_start waits for it before initializing the run.
+        """
+        hooks = WandBModelHooks()
+        calls: list[str] = []
+        mock_setup = MagicMock(side_effect=lambda: calls.append("setup"))
+        mock_init = MagicMock(side_effect=lambda **kwargs: calls.append("init") or mock_wandb_run)
+        with patch('inspect_wandb.models.hooks.wandb.setup', mock_setup), patch('inspect_wandb.models.hooks.wandb.init', mock_init):
+            await hooks.on_run_start(RunStart(run_id="test_run_id", task_names=["test_task"]))
+            assert hooks._service_init is not None
+            await hooks.on_task_start(create_task_start())
+
+        assert calls == ["setup", "init"]
+        assert hooks.run is mock_wandb_run
+
     @pytest.mark.asyncio
     async def test_wandb_config_updated_on_task_start_if_settings_config_is_set(self, mock_wandb_run: Run, create_task_start: Callable[dict | None, TaskStart]) -> None:
         """
@@ -110,6 +132,7 @@ class TestWandBModelHooks:
         hooks._total_samples = 9
         hooks._correct_samples = 4
         hooks._hooks_enabled = True
+        hooks._task_info["test-eval-id"] = ("test_task", "mockllm/model")
 
         # When
         await hooks.on_sample_end(
@@ -128,7 +151,16 @@ class TestWandBModelHooks:
         )
 
         # Then
-        hooks.run.log.assert_called_once_with({Metric.SAMPLES: 10, Metric.ACCURACY: 0.5})
+        hooks.run.log.assert_called_once_with({
+            Metric.SAMPLES: 10,
+            Metric.ACCURACY: 0.5,
+            "test_task/mockllm__model/epoch_1/samples": 1,
+            "test_task/mockllm__model/epoch_1/accuracy": 1.0,
+            "test_task/mockllm__model/scores/samples": 1,
+            "test_task/mockllm__model/scores/score/mean": 1.0,
+            "test_task/mockllm__model/scores/score/stderr": 0.0,
+            "test_task/mockllm__model/scores/score/count": 1,
+        })
         assert hooks._total_samples == 10
         assert hooks._correct_samples == 5
 
@@ -165,10 +197,14 @@ class TestWandBModelHooks:
         })
 
     @pytest.mark.asyncio
-    async def test_files_saved_on_run_end(self, mock_wandb_run: Run) -> None:
+    async def test_files_uploaded_on_run_end(self, mock_wandb_run: Run, tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
         # Given
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "test-file.txt").write_text("test")
         hooks = WandBModelHooks()
         hooks.run = mock_wandb_run
+        hooks.run.entity = "test-entity"
+        hooks.run.project = "test-project"
         hooks.settings = ModelsSettings(
             enabled=True, 
             entity="test-entity", 
@@ -179,7 +215,6 @@ class TestWandBModelHooks:
         hooks._correct_samples = 5
         hooks._hooks_enabled = True
         hooks._wandb_initialized = True
-        hooks._hooks_enabled = True
 
         # When
         await hooks.on_run_end(
@@ -191,7 +226,78 @@ class TestWandBModelHooks:
         )
 
         # Then
-        hooks.run.save.assert_called_once_with("test-file.txt", policy="now")
+        hooks.run.log_artifact.assert_called_once()
+        artifact = hooks.run.log_artifact.call_args.args[0]
+        assert artifact.type == "inspect-files"
+        assert "test-file.txt" in artifact.manifest.entries
+        summary = hooks.run.summary.update.call_args.args[0]
+        assert summary["files/files_logged"] == 1
+        assert summary["files/bytes_logged"] == 4
+        assert summary["files/sha256"] == {"test-file.txt": hashlib.sha256(b"test").hexdigest()}
+
+    @pytest.mark.asyncio
+    async def test_native_scores_heatmap_logged_on_run_end(self, mock_wandb_run: Run, tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+        # Given
+        monkeypatch.chdir(tmp_path)
+        hooks = WandBModelHooks()
+        hooks.run = mock_wandb_run
+        hooks.settings = ModelsSettings(
+            enabled=True,
+            entity="test-entity",
+            project="test-project",
+            viz=True,
+            viz_backend="native",
+            viz_cache_dir=None
+        )
+        hooks._hooks_enabled = True
+        hooks._wandb_initialized = True
+        df = pd.DataFrame([
+            {"task_name": "task", "model": "mockllm/model", "score_headline_value": 0.5},
+        ])
+
+        # When
+        with (
+            patch("inspect_wandb.viz.writer.evals_df", MagicMock(return_value=df)),
+            patch("inspect_wandb.viz.writer.wandb.log") as mock_log,
+        ):
+            await hooks.on_run_end(
+                RunEnd(
+                    run_id="test-run",
+                    exception=None,
+                    logs=[]
+                )
+            )
+
+        # Then
+        assert (tmp_path / ".plots" / "test-run" / "scores_heatmap.png").exists()
+        assert isinstance(mock_log.call_args.args[0]["scores_heatmap"], wandb.Image)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("extra_installed", [False, True])
+    async def test_run_finished_when_plots_cannot_be_logged(self, mock_wandb_run: Run, extra_installed: bool) -> None:
+        # Given the viz-native extra is missing, or the writer fails
+        hooks = WandBModelHooks()
+        hooks.run = mock_wandb_run
+        hooks.settings = ModelsSettings(
+            enabled=True,
+            entity="test-entity",
+            project="test-project",
+            viz=True,
+            viz_backend="native",
+            viz_cache_dir=None
+        )
+        hooks._hooks_enabled = True
+        hooks._wandb_initialized = True
+
+        # When
+        with (
+            patch.dict("inspect_wandb.models.hooks.INSTALLED_EXTRAS", {"viz-native": extra_installed}),
+            patch("inspect_wandb.viz.native.NativeVizWriter.log_plots", side_effect=ModuleNotFoundError("No module named 'pandas'")),
+        ):
+            await hooks.on_run_end(RunEnd(run_id="test-run", exception=None, logs=[]))
+
+        # Then
+        hooks.run.finish.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_wandb_run_url_added_to_eval_metadata(self, mock_wandb_run: Run, task_end_eval_log: EvalLog) -> None:
@@ -218,4 +324,69 @@ class TestWandBModelHooks:
         )
 
         # Then
-        assert task_end_eval_log.eval.metadata["wandb_run_url"] == "test_url"
\ No newline at end of file
+        assert task_end_eval_log.eval.metadata["wandb_run_url"] == "test_url"
+
+    @pytest.mark.asyncio
+    async def test_plots_updated_on_task_end_if_update_interval_is_set(self, mock_wandb_run: Run, task_end_eval_log: EvalLog) -> None:
+        # Given
+        hooks = WandBModelHooks()
+        hooks.run = mock_wandb_run
+        hooks.settings = ModelsSettings(
+            enabled=True,
+            entity="test-entity",
+            project="test-project",
+            viz=True,
+            viz_backend="native",
+            viz_update_interval=5
+        )
+        hooks._hooks_enabled = True
+        hooks._wandb_initialized = True
+        task_end = TaskEnd(
+            run_id="test_run_id",
+            eval_id="test_eval_id",
+            log=task_end_eval_log
+        )
+
+        # When
+        with patch("inspect_wandb.viz.native.NativeVizWriter.update_plots") as mock_update_plots:
+            await hooks.on_task_end(task_end)
+
+        # Then
+        mock_update_plots.assert_awaited_once_with(task_end, 300)
+
+    @pytest.mark.asyncio
+    async def test_accuracy_tracked_per_task_model_and_epoch(self, mock_wandb_run: Run) -> None:
+        # Given
+        hooks = WandBModelHooks()
+        hooks.run = mock_wandb_run
+        hooks.settings = ModelsSettings(
+            enabled=True,
+            entity="test-entity",
+            project="test-project"
+        )
+        hooks._hooks_enabled = True
+        hooks._task_info["eval-a"] = ("task_a", "openai/gpt-4o")
+        hooks._task_info["eval-b"] = ("task_b", "openai/gpt-4o")
+
+        def sample_end(eval_id: str, epoch: int, value: bool) -> SampleEnd:
+            return SampleEnd(
+                run_id="test-run-id",
+                eval_id=eval_id,
+                sample_id="test-sample-id",
+                sample=EvalSample(id=1, epoch=epoch, scores={"score": Score(value=value)}, input="test-input", target="test-target")
+            )
+
+        # When
+        await hooks.on_sample_end(sample_end("eval-a", 1, True))
+        await hooks.on_sample_end(sample_end("eval-b", 1, False))
+        await hooks.on_sample_end(sample_end("eval-a", 1, False))
+        await hooks.on_sample_end(sample_end("eval-a", 2, True))
+
+        # Then
+        hooks.run.define_metric.assert_any_call(name="task_a/openai__gpt-4o/epoch_1/accuracy", step_metric="task_a/openai__gpt-4o/epoch_1/samples")
+        assert len([c for c in hooks.run.define_metric.call_args_list if c.kwargs["name"].endswith("/accuracy")]) == 3
+        last_point = hooks.run.log.call_args_list[2].args[0]
+        assert last_point["task_a/openai__gpt-4o/epoch_1/samples"] == 2
+        assert last_point["task_a/openai__gpt-4o/epoch_1/accuracy"] == 0.5
+        assert "task_b/openai__gpt-4o/epoch_1/accuracy" not in last_point
+        assert hooks.run.log.call_args_list[3].args[0]["task_a/openai__gpt-4o/epoch_2/accuracy"] == 1.0
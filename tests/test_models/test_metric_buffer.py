@@ -0,0 +1,158 @@
+from inspect_wandb.models.metric_buffer import MetricBuffer
+from inspect_wandb.models.hooks import WandBModelHooks, Metric
+from inspect_wandb.config.settings import ModelsSettings
+import threading
+from unittest.mock import MagicMock, call
+import pytest
+from pytest import MonkeyPatch
+from wandb.sdk.wandb_run import Run
+from inspect_ai.hooks import SampleEnd, TaskEnd
+from inspect_ai.log import EvalSample, EvalLog
+from inspect_ai.scorer import Score
+
+
+class TestMetricBuffer:
+    """
+    Tests for the MetricBuffer class.
+    """
+
+    def test_flushes_in_order_when_batch_size_reached(self) -> None:
+        # Given
+        run = MagicMock(spec=Run)
+        buffer = MetricBuffer(run, batch_size=3, flush_interval=60)
+
+        # When
+        buffer.add({Metric.SAMPLES: 1})
+        buffer.add({Metric.SAMPLES: 2})
+
+        # Then
+        run.log.assert_not_called()
+        buffer.add({Metric.SAMPLES: 3})
+        assert run.log.call_args_list == [
+            call({Metric.SAMPLES: 1}),
+            call({Metric.SAMPLES: 2}),
+            call({Metric.SAMPLES: 3}),
+        ]
+        assert len(buffer) == 0
+
+    def test_points_without_shared_metrics_coalesced(self) -> None:
+        # Given
+        run = MagicMock(spec=Run)
+        buffer = MetricBuffer(run, batch_size=6, flush_interval=60)
+
+        # When
+        for i in range(1, 4):
+            buffer.add({Metric.SAMPLES: i, Metric.ACCURACY: 1.0})
+            buffer.add({"task/model/samples": i, "task/model/score/mean": 0.5})
+
+        # Then
+        assert run.log.call_count < 6
+        assert run.log.call_args_list == [
+            call({Metric.SAMPLES: i, Metric.ACCURACY: 1.0, "task/model/samples": i, "task/model/score/mean": 0.5})
+            for i in range(1, 4)
+        ]
+
+    def test_flushes_when_interval_elapsed(self, monkeypatch: MonkeyPatch) -> None:
+        # Given
+        now = [100.0]
+        monkeypatch.setattr("inspect_wandb.models.metric_buffer.time.monotonic", lambda: now[0])
+        run = MagicMock(spec=Run)
+        buffer = MetricBuffer(run, batch_size=100, flush_interval=5.0)
+
+        # When
+        buffer.add({Metric.SAMPLES: 1})
+        now[0] += 5.0
+        buffer.add({Metric.SAMPLES: 2})
+
+        # Then
+        assert run.log.call_count == 2
+
+    def test_due_batch_left_to_caller_without_flush_on_add(self) -> None:
+        # Given
+        run = MagicMock(spec=Run)
+        buffer = MetricBuffer(run, batch_size=2, flush_interval=60, flush_on_add=False)
+
+        # When
+        buffer.add({Metric.SAMPLES: 1})
+        buffer.add({Metric.SAMPLES: 2})
+
+        # Then
+        run.log.assert_not_called()
+        assert buffer.flush_due()
+        buffer.flush()
+        assert run.log.call_count == 2
+        assert not buffer.flush_due()
+
+    @pytest.mark.asyncio
+    async def test_points_written_off_the_event_loop_without_background_logging(self) -> None:
+        # Given
+        hooks = WandBModelHooks()
+        hooks.run = MagicMock(spec=Run)
+        log_threads: list[threading.Thread] = []
+        hooks.run.log.side_effect = lambda *args, **kwargs: log_threads.append(threading.current_thread())
+        hooks.settings = ModelsSettings(
+            enabled=True,
+            entity="test-entity",
+            project="test-project",
+            log_batch_size=2,
+            background_logging=False
+        )
+        hooks._hooks_enabled = True
+
+        # When
+        for i in range(2):
+            await hooks.on_sample_end(
+                SampleEnd(
+                    run_id="test-run-id",
+                    eval_id="test-eval-id",
+                    sample_id=f"test-sample-id-{i}",
+                    sample=EvalSample(
+                        id=i,
+                        epoch=1,
+                        scores={"score": Score(value=True)},
+                        input="test-input",
+                        target="test-target"
+                    )
+                )
+            )
+
+        # Then
+        assert len(log_threads) == 2
+        assert threading.current_thread() not in log_threads
+
+    @pytest.mark.asyncio
+    async def test_buffered_points_flushed_on_task_end(self, task_end_eval_log: EvalLog) -> None:
+        # Given
+        hooks = WandBModelHooks()
+        hooks.run = MagicMock(spec=Run)
+        hooks.settings = ModelsSettings(
+            enabled=True,
+            entity="test-entity",
+            project="test-project",
+            log_batch_size=10
+        )
+        hooks._hooks_enabled = True
+        for i in range(3):
+            await hooks.on_sample_end(
+                SampleEnd(
+                    run_id="test-run-id",
+                    eval_id="test-eval-id",
+                    sample_id=f"test-sample-id-{i}",
+                    sample=EvalSample(
+                        id=i,
+                        epoch=1,
+                        scores={"score": Score(value=True)},
+                        input="test-input",
+                        target="test-target"
+                    )
+                )
+            )
+        hooks.run.log.assert_not_called()
+
+        # When
+        await hooks.on_task_end(
+            TaskEnd(run_id="test-run-id", eval_id="test-eval-id", log=task_end_eval_log)
+        )
+
+        # Then
+        assert [c.args[0][Metric.SAMPLES] for c in hooks.run.log.call_args_list if Metric.SAMPLES in c.args[0]] == [1, 2, 3]
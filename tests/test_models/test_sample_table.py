@@ -0,0 +1,133 @@
+from inspect_wandb.models.sample_table import SampleTable
+from inspect_wandb.models.hooks import WandBModelHooks
+from inspect_wandb.config.settings import ModelsSettings
+from inspect_ai.hooks import SampleEnd, TaskEnd
+from inspect_ai.log import EvalSample, EvalLog, EvalError
+from inspect_ai.model import ModelUsage
+from inspect_ai.scorer import Score
+from unittest.mock import MagicMock
+from wandb.sdk.wandb_run import Run
+import json
+from typing import Any
+import pytest
+
+
+def make_sample(i: int) -> EvalSample:
+    return EvalSample(
+        id=i,
+        epoch=1,
+        input="in",
+        target="t",
+        scores={"match": Score(value="C")},
+        model_usage={"mockllm/model": ModelUsage(input_tokens=3, output_tokens=4, total_tokens=7)},
+        total_time=1.5,
+    )
+
+
+class TestSampleTable:
+    """
+    Tests for the SampleTable class.
+    """
+
+    def test_rows_committed_in_chunks(self) -> None:
+        # Given
+        run = MagicMock(spec=Run)
+        committed: list[tuple[str, list[str]]] = []
+        run.log.side_effect = lambda data: committed.extend(
+            (key, [row[2] for row in table.data]) for key, table in data.items()
+        )
+        table = SampleTable(run, chunk_size=2)
+
+        # When
+        for i in range(5):
+            table.add("task", "model", make_sample(i))
+
+        # Then
+        # each increment of the table is logged with all of its rows, of which wandb only writes the new ones
+        assert committed == [("samples_table", ["0", "1"]), ("samples_table", ["0", "1", "2", "3"])]
+        assert len(table) == 1
+        table.commit()
+        assert committed[-1] == ("samples_table", ["0", "1", "2", "3", "4"])
+        assert table.rows_committed == 5
+        assert len(table) == 0
+
+    def test_new_table_started_after_segment_increments(self) -> None:
+        # Given
+        run = MagicMock(spec=Run)
+        committed: list[tuple[str, Any, list[str]]] = []
+        run.log.side_effect = lambda data: committed.extend(
+            (key, table, [row[2] for row in table.data]) for key, table in data.items()
+        )
+        table = SampleTable(run, chunk_size=2, segment_increments=2)
+
+        # When
+        for i in range(10):
+            table.add("task", "model", make_sample(i))
+
+        # Then
+        assert [(key, rows) for key, _, rows in committed] == [
+            ("samples_table", ["0", "1"]),
+            ("samples_table", ["0", "1", "2", "3"]),
+            ("samples_table_2", ["4", "5"]),
+            ("samples_table_2", ["4", "5", "6", "7"]),
+            ("samples_table_3", ["8", "9"]),
+        ]
+        assert len({id(logged) for _, logged, _ in committed}) == 3
+        assert all(logged.log_mode == "INCREMENTAL" for _, logged, _ in committed)
+        # the rows of the finished segments are released
+        assert table.segment_key == "samples_table_3"
+        assert [row[2] for row in table.table.data] == ["8", "9"]
+        assert table.rows_committed == 10
+
+    def test_row_contents(self) -> None:
+        # Given
+        run = MagicMock(spec=Run)
+        table = SampleTable(run)
+        sample = make_sample(1)
+        sample.error = EvalError(message="boom", traceback="", traceback_ansi="")
+
+        # When
+        table.add("task", "model", sample)
+
+        # Then
+        row = dict(zip(table.table.columns, table.table.data[0]))
+        assert row == {
+            "task": "task",
+            "model": "model",
+            "id": "1",
+            "epoch": 1,
+            "scores": json.dumps({"match": "C"}),
+            "input_tokens": 3,
+            "output_tokens": 4,
+            "total_tokens": 7,
+            "total_time": 1.5,
+            "working_time": None,
+            "error": "boom",
+        }
+
+    def test_column_allow_list(self) -> None:
+        table = SampleTable(MagicMock(spec=Run), columns=["total_tokens", "id"])
+        assert table.table.columns == ["task", "model", "id", "total_tokens"]
+
+    def test_unknown_column_rejected(self) -> None:
+        with pytest.raises(ValueError):
+            SampleTable(MagicMock(spec=Run), columns=["prompt"])
+
+    @pytest.mark.asyncio
+    async def test_hooks_commit_remaining_rows_on_task_end(self, task_end_eval_log: EvalLog) -> None:
+        # Given
+        hooks = WandBModelHooks()
+        hooks.run = MagicMock(spec=Run)
+        hooks.settings = ModelsSettings(enabled=True, entity="test-entity", project="test-project", log_sample_table=True)
+        hooks._hooks_enabled = True
+        hooks._task_info["test_eval_id"] = ("test_task", "mockllm/model")
+        await hooks.on_sample_end(SampleEnd(run_id="test_run_id", eval_id="test_eval_id", sample_id="s", sample=make_sample(1)))
+        assert not any("samples_table" in c.args[0] for c in hooks.run.log.call_args_list)
+
+        # When
+        await hooks.on_task_end(TaskEnd(run_id="test_run_id", eval_id="test_eval_id", log=task_end_eval_log))
+
+        # Then
+        assert any("samples_table" in c.args[0] for c in hooks.run.log.call_args_list)
+        assert hooks.sample_table is not None
+        assert hooks.sample_table.rows_committed == 1
@@ -0,0 +1,118 @@
+from inspect_wandb.models.sketch import DDSketch, SampleQuantiles
+from inspect_wandb.models.hooks import WandBModelHooks
+from inspect_wandb.config.settings import ModelsSettings
+from inspect_ai.hooks import SampleEnd, RunEnd
+from inspect_ai.log import EvalSample
+from inspect_ai.model import ModelUsage
+from unittest.mock import MagicMock
+from wandb.sdk.wandb_run import Run
+import random
+import pytest
+
+
+def exact_quantile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+class TestDDSketch:
+    """
+    Tests for the DDSketch quantile sketch.
+    """
+
+    @pytest.mark.parametrize("q", [0.5, 0.9, 0.99])
+    def test_quantiles_within_relative_accuracy(self, q: float) -> None:
+        # Given
+        rng = random.Random(0)
+        values = [rng.lognormvariate(0, 1.5) for _ in range(20000)]
+        sketch = DDSketch(relative_accuracy=0.01)
+
+        # When
+        for value in values:
+            sketch.add(value)
+
+        # Then
+        estimate = sketch.quantile(q)
+        expected = exact_quantile(values, q)
+        assert estimate is not None
+        assert abs(estimate - expected) / expected <= 0.01 + 1e-9
+
+    def test_merge_matches_single_sketch(self) -> None:
+        # Given
+        rng = random.Random(1)
+        values = [rng.uniform(0.1, 100) for _ in range(5000)]
+        whole, left, right = DDSketch(), DDSketch(), DDSketch()
+
+        # When
+        for i, value in enumerate(values):
+            whole.add(value)
+            (left if i % 2 else right).add(value)
+        left.merge(right)
+
+        # Then
+        assert left.count == whole.count
+        for q in (0.5, 0.9, 0.99):
+            assert left.quantile(q) == whole.quantile(q)
+
+    def test_memory_bounded_by_max_buckets(self) -> None:
+        sketch = DDSketch(relative_accuracy=0.01, max_buckets=64)
+        for i in range(1, 100000, 7):
+            sketch.add(i / 1000)
+        assert len(sketch) <= 64
+        assert sketch.quantile(1.0) == sketch.max
+
+    def test_empty_and_zero_values(self) -> None:
+        sketch = DDSketch()
+        assert sketch.quantile(0.5) is None
+        sketch.add(0)
+        sketch.add(0)
+        sketch.add(10)
+        assert sketch.quantile(0.5) == 0.0
+
+
+class TestSampleQuantiles:
+    """
+    Tests for SampleQuantiles and its use in WandBModelHooks.
+    """
+
+    def test_point_contains_quantiles_for_each_field(self) -> None:
+        quantiles = SampleQuantiles.for_task("my_task", "openai/gpt-4o")
+        quantiles.update(EvalSample(
+            id=1, epoch=1, input="in", target="t", total_time=2.0, working_time=1.5,
+            model_usage={"openai/gpt-4o": ModelUsage(input_tokens=100, output_tokens=20, total_tokens=120)}
+        ))
+        point = quantiles.point()
+        assert point["my_task/openai__gpt-4o/quantiles/samples"] == 1
+        assert point["my_task/openai__gpt-4o/quantiles/total_time_p50"] == pytest.approx(2.0, rel=0.01)
+        assert point["my_task/openai__gpt-4o/quantiles/output_tokens_p99"] == pytest.approx(20, rel=0.01)
+
+    @pytest.mark.asyncio
+    async def test_quantiles_logged_periodically_and_written_to_summary(self) -> None:
+        # Given
+        hooks = WandBModelHooks()
+        hooks.run = MagicMock(spec=Run)
+        hooks.run.summary = MagicMock()
+        hooks.settings = ModelsSettings(enabled=True, entity="test-entity", project="test-project", quantile_log_interval=2)
+        hooks._hooks_enabled = True
+        hooks._wandb_initialized = True
+        hooks._task_info["test-eval-id"] = ("test_task", "mockllm/model")
+
+        # When
+        for i in range(4):
+            await hooks.on_sample_end(SampleEnd(
+                run_id="test-run-id",
+                eval_id="test-eval-id",
+                sample_id=f"sample-{i}",
+                sample=EvalSample(id=i, epoch=1, input="in", target="t", total_time=float(i + 1))
+            ))
+        await hooks.on_run_end(RunEnd(run_id="test-run-id", exception=None, logs=[]))
+
+        # Then
+        quantile_points = [
+            c.args[0] for c in hooks.run.log.call_args_list
+            if "test_task/mockllm__model/quantiles/samples" in c.args[0]
+        ]
+        assert [p["test_task/mockllm__model/quantiles/samples"] for p in quantile_points] == [2, 4]
+        summary = hooks.run.summary.update.call_args.args[0]
+        assert summary["quantiles/total_time_p50"] == pytest.approx(2.0, rel=0.01)
+        assert "test_task/mockllm__model/quantiles/total_time_p50" in summary
@@ -0,0 +1,78 @@
+from inspect_wandb.models.hooks import WandBModelHooks
+from inspect_wandb.models.spool import sync_models_spool, unsynced_offline_runs
+from inspect_wandb.config.settings import ModelsSettings
+from inspect_ai.hooks import TaskStart
+from unittest.mock import MagicMock, patch
+from wandb.sdk.wandb_run import Run
+from pathlib import Path
+from typing import Callable
+import subprocess
+import sys
+import pytest
+
+
+def make_offline_run(spool_dir: Path, name: str, synced: bool = False) -> Path:
+    run_dir = spool_dir / "models" / "wandb" / name
+    run_dir.mkdir(parents=True)
+    (run_dir / f"run-{name}.wandb").touch()
+    if synced:
+        (run_dir / f"run-{name}.wandb.synced").touch()
+    return run_dir
+
+
+class TestModelsSpool:
+    """
+    Tests for running the Models integration in spool mode and syncing the spooled runs.
+    """
+
+    @pytest.mark.asyncio
+    async def test_wandb_initialised_offline_in_spool_mode(self, create_task_start: Callable[[dict | None], TaskStart], tmp_path: Path) -> None:
+        # Given
+        hooks = WandBModelHooks()
+        hooks.settings = ModelsSettings(enabled=True, entity="test-entity", project="test-project", spool_dir=str(tmp_path))
+        mock_init = MagicMock(return_value=MagicMock(spec=Run, tags=[]))
+
+        # When
+        with patch("inspect_wandb.models.hooks.wandb.init", mock_init):
+            await hooks.on_task_start(create_task_start(None))
+
+        # Then
+        mock_init.assert_called_once_with(
+            id="test_run_id", entity="test-entity", project="test-project", mode="offline", dir=tmp_path / "models"
+        )
+
+    def test_synced_runs_skipped(self, tmp_path: Path) -> None:
+        # Given
+        unsynced = make_offline_run(tmp_path, "offline-run-1")
+        make_offline_run(tmp_path, "offline-run-2", synced=True)
+
+        # Then
+        assert unsynced_offline_runs(tmp_path) == [unsynced]
+        assert len(unsynced_offline_runs(tmp_path, force=True)) == 2
+
+    def test_runs_synced_in_batches(self, tmp_path: Path) -> None:
+        # Given
+        runs = [make_offline_run(tmp_path, f"offline-run-{i}") for i in range(5)]
+        mock_run = MagicMock(return_value=subprocess.CompletedProcess(args=[], returncode=0))
+
+        # When
+        with patch("inspect_wandb.models.spool.subprocess.run", mock_run):
+            synced = sync_models_spool(tmp_path, workers=2, batch_size=2)
+
+        # Then
+        assert synced == runs
+        assert mock_run.call_count == 3
+        commands = sorted(call.args[0] for call in mock_run.call_args_list)
+        assert commands[0] == [sys.executable, "-m", "wandb", "sync", str(runs[0]), str(runs[1])]
+
+    def test_failed_batch_not_reported_as_synced(self, tmp_path: Path) -> None:
+        # Given
+        make_offline_run(tmp_path, "offline-run-1")
+        mock_run = MagicMock(return_value=subprocess.CompletedProcess(args=[], returncode=1, stderr="network error"))
+
+        # When
+        with patch("inspect_wandb.models.spool.subprocess.run", mock_run):
+            synced = sync_models_spool(tmp_path)
+
+        # Then
+        assert synced == []
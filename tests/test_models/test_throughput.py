@@ -0,0 +1,87 @@
+from inspect_wandb.models.throughput import ThroughputTracker
+from inspect_wandb.models.hooks import WandBModelHooks
+from inspect_wandb.config.settings import ModelsSettings
+from inspect_ai.hooks import SampleStart, SampleEnd, TaskEnd
+from inspect_ai.log import EvalSample, EvalSampleSummary, EvalLog
+from inspect_ai.model import ModelUsage
+from unittest.mock import MagicMock
+from wandb.sdk.wandb_run import Run
+import pytest
+
+
+class TestThroughputTracker:
+    """
+    Tests for the ThroughputTracker class.
+    """
+
+    def test_rates_computed_over_window(self) -> None:
+        # Given
+        tracker = ThroughputTracker(namespace="task/model/throughput", max_concurrency=4)
+        for _ in range(4):
+            tracker.sample_started()
+
+        # When
+        for i in range(3):
+            tracker.sample_completed(tokens=100, now=10.0 + i * 0.5)
+
+        # Then
+        point = tracker.point()
+        assert point["task/model/throughput/samples"] == 3
+        assert point["task/model/throughput/in_flight"] == 1
+        assert point["task/model/throughput/max_in_flight"] == 4
+        assert point["task/model/throughput/concurrency_utilisation"] == 0.25
+        assert point["task/model/throughput/samples_per_sec"] == pytest.approx(2.0)
+        assert point["task/model/throughput/tokens_per_sec"] == pytest.approx(200.0)
+        assert point["task/model/throughput/mean_completion_gap"] == pytest.approx(0.5)
+        assert point["task/model/throughput/last_completion_gap"] == pytest.approx(0.5)
+
+    def test_ring_buffer_only_keeps_recent_completions(self) -> None:
+        # Given a slow start followed by a fast burst
+        tracker = ThroughputTracker(namespace="t", window=3)
+        tracker.sample_completed(tokens=1000, now=0.0)
+        tracker.sample_completed(tokens=1000, now=100.0)
+
+        # When
+        for i in range(3):
+            tracker.sample_completed(tokens=10, now=200.0 + i)
+
+        # Then
+        point = tracker.point()
+        assert point["t/samples"] == 5
+        assert point["t/samples_per_sec"] == pytest.approx(1.0)
+        assert point["t/tokens_per_sec"] == pytest.approx(10.0)
+
+    @pytest.mark.asyncio
+    async def test_hooks_track_in_flight_and_log_on_task_end(self, task_end_eval_log: EvalLog) -> None:
+        # Given
+        hooks = WandBModelHooks()
+        hooks.run = MagicMock(spec=Run)
+        hooks.settings = ModelsSettings(enabled=True, entity="test-entity", project="test-project", throughput_log_interval=3600)
+        hooks._hooks_enabled = True
+        hooks._task_info["test_eval_id"] = ("test_task", "mockllm/model")
+
+        # When
+        for i in range(3):
+            await hooks.on_sample_start(SampleStart(
+                run_id="test_run_id",
+                eval_id="test_eval_id",
+                sample_id=f"sample-{i}",
+                summary=EvalSampleSummary(id=i, epoch=1, input="in", target="t")
+            ))
+        await hooks.on_sample_end(SampleEnd(
+            run_id="test_run_id",
+            eval_id="test_eval_id",
+            sample_id="sample-0",
+            sample=EvalSample(
+                id=0, epoch=1, input="in", target="t",
+                model_usage={"mockllm/model": ModelUsage(input_tokens=5, output_tokens=5, total_tokens=10)}
+            )
+        ))
+        await hooks.on_task_end(TaskEnd(run_id="test_run_id", eval_id="test_eval_id", log=task_end_eval_log))
+
+        # Then
+        hooks.run.define_metric.assert_any_call(name="test_task/mockllm__model/throughput/*", step_metric="test_task/mockllm__model/throughput/samples")
+        point = hooks.run.log.call_args_list[-1].args[0]
+        assert point["test_task/mockllm__model/throughput/in_flight"] == 2
+        assert point["test_task/mockllm__model/throughput/max_in_flight"] == 3
+        assert "test_eval_id" not in hooks._throughput
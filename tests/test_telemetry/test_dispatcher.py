@@ -0,0 +1,149 @@
+import contextvars
+import threading
+from typing import Callable
+from unittest.mock import MagicMock
+
+import pytest
+
+from inspect_wandb.telemetry import TelemetryDispatcher
+
+test_var: contextvars.ContextVar[str] = contextvars.ContextVar("test_var", default="unset")
+
+
+class TestTelemetryDispatcher:
+    """
+    Tests for the TelemetryDispatcher class.
+    """
+
+    def test_inline_dispatch_calls_handler_immediately(self) -> None:
+        # Given
+        handler = MagicMock()
+        dispatcher = TelemetryDispatcher({"log": handler})
+
+        # When
+        dispatcher.dispatch("log", point={"a": 1})
+
+        # Then
+        handler.assert_called_once_with(point={"a": 1})
+        assert dispatcher.stats["processed"] == 1
+
+    def test_inline_dispatch_propagates_handler_errors(self) -> None:
+        dispatcher = TelemetryDispatcher({"log": MagicMock(side_effect=RuntimeError("boom"))})
+        with pytest.raises(RuntimeError):
+            dispatcher.dispatch("log")
+
+    def test_unknown_event_kind_raises(self) -> None:
+        dispatcher = TelemetryDispatcher({})
+        with pytest.raises(KeyError):
+            dispatcher.dispatch("log")
+
+    def test_background_dispatch_preserves_order(self) -> None:
+        # Given
+        received: list[int] = []
+        dispatcher = TelemetryDispatcher({"log": lambda i: received.append(i)}, background=True)
+
+        # When
+        for i in range(100):
+            dispatcher.dispatch("log", i=i)
+        dispatcher.close()
+
+        # Then
+        assert received == list(range(100))
+        assert dispatcher.stats["processed"] == 100
+        assert dispatcher.stats["queue_depth"] == 0
+
+    def test_background_dispatch_runs_handler_in_captured_context(self) -> None:
+        # Given
+        seen: list[tuple[str, str]] = []
+        dispatcher = TelemetryDispatcher(
+            {"log": lambda: seen.append((threading.current_thread().name, test_var.get()))},
+            name="test-worker",
+            background=True,
+        )
+
+        # When
+        token = test_var.set("from-hook")
+        dispatcher.dispatch("log")
+        test_var.reset(token)
+        dispatcher.close()
+
+        # Then
+        assert seen == [("test-worker", "from-hook")]
+
+    def test_background_handler_failures_are_counted_not_raised(self) -> None:
+        dispatcher = TelemetryDispatcher({"log": MagicMock(side_effect=RuntimeError("boom"))}, background=True)
+        dispatcher.dispatch("log")
+        dispatcher.close()
+        assert dispatcher.stats["failed"] == 1
+
+    @pytest.mark.parametrize("backpressure,expected", [
+        ("drop_new", [0, 1, 2]),
+        ("drop_oldest", [0, 3, 4]),
+    ])
+    def test_backpressure_drops_when_queue_full(self, backpressure, expected) -> None:
+        # Given a worker blocked on the first event, with room for two more
+        release = threading.Event()
+        started = threading.Event()
+        received: list[int] = []
+
+        def handler(i: int) -> None:
+            started.set()
+            release.wait()
+            received.append(i)
+
+        dispatcher = TelemetryDispatcher({"log": handler}, background=True, maxsize=2, backpressure=backpressure, droppable={"log"})
+        dispatcher.dispatch("log", i=0)
+        started.wait()
+
+        # When
+        for i in range(1, 5):
+            dispatcher.dispatch("log", i=i)
+        assert dispatcher.stats["max_queue_depth"] == 2
+        release.set()
+        dispatcher.close()
+
+        # Then
+        assert received == expected
+        assert dispatcher.stats["dropped"] == 2
+
+    @pytest.mark.parametrize("backpressure", ["drop_new", "drop_oldest"])
+    def test_backpressure_never_drops_control_events(self, backpressure) -> None:
+        # Given a worker blocked on the first event, and a queue holding a control event and a data event
+        release = threading.Event()
+        started = threading.Event()
+        received: list[str] = []
+
+        def handler(kind: str) -> Callable[[], None]:
+            def handle() -> None:
+                started.set()
+                release.wait()
+                received.append(kind)
+            return handle
+
+        kinds = ["log", "upload_files", "task_end", "sample_end"]
+        dispatcher = TelemetryDispatcher(
+            {kind: handler(kind) for kind in kinds}, background=True, maxsize=2, backpressure=backpressure, droppable={"log"}
+        )
+        dispatcher.dispatch("log")
+        started.wait()
+        dispatcher.dispatch("upload_files")
+        dispatcher.dispatch("log")
+
+        # When the queue is full, control events wait for room once there is no data event left to drop
+        threading.Timer(0.1, release.set).start()
+        assert dispatcher.dispatch("task_end") is True
+        assert dispatcher.dispatch("sample_end") is True
+        dispatcher.close()
+
+        # Then
+        assert [kind for kind in received if kind != "log"] == ["upload_files", "task_end", "sample_end"]
+        assert dispatcher.stats["dropped"] == (1 if backpressure == "drop_oldest" else 0)
+
+    def test_flush_times_out_while_worker_busy(self) -> None:
+        release = threading.Event()
+        dispatcher = TelemetryDispatcher({"log": lambda: release.wait()}, background=True)
+        dispatcher.dispatch("log")
+        assert dispatcher.flush(timeout=0.05) is False
+        release.set()
+        assert dispatcher.flush(timeout=5) is True
+        dispatcher.close()
@@ -0,0 +1,82 @@
+from inspect_wandb.telemetry.spool import JournalProgress, SpoolWriter, is_synced, list_segments, mark_synced, read_journal, reset_progress
+from pathlib import Path
+
+
+class TestSpoolJournal:
+    """
+    Tests for the segmented spool journal.
+    """
+
+    def test_events_read_back_in_order_across_segments(self, tmp_path: Path) -> None:
+        # Given
+        writer = SpoolWriter(tmp_path / "journal", segment_bytes=200)
+
+        # When
+        for i in range(10):
+            writer.write("prediction", {"index": i, "output": "x" * 20})
+        writer.close()
+
+        # Then
+        assert len(list_segments(tmp_path / "journal")) > 1
+        assert [payload["index"] for _, payload in read_journal(tmp_path / "journal")] == list(range(10))
+        assert writer.events_written == 10
+
+    def test_reopened_journal_appends_new_segment(self, tmp_path: Path) -> None:
+        # Given
+        first = SpoolWriter(tmp_path)
+        first.write("a", {})
+        first.close()
+
+        # When
+        second = SpoolWriter(tmp_path)
+        second.write("b", {})
+        second.close()
+
+        # Then
+        assert len(list_segments(tmp_path)) == 2
+        assert [kind for kind, _ in read_journal(tmp_path)] == ["a", "b"]
+
+    def test_truncated_line_skipped(self, tmp_path: Path) -> None:
+        # Given
+        writer = SpoolWriter(tmp_path)
+        writer.write("a", {"value": 1})
+        writer.close()
+        with open(list_segments(tmp_path)[0], "a") as f:
+            f.write('{"kind": "b", "pay')
+
+        # When
+        events = list(read_journal(tmp_path))
+
+        # Then
+        assert events == [("a", {"value": 1})]
+
+    def test_non_json_values_serialised(self, tmp_path: Path) -> None:
+        # Given
+        writer = SpoolWriter(tmp_path)
+
+        # When
+        writer.write("a", {"path": tmp_path, "items": (1, 2)})
+        writer.close()
+
+        # Then
+        assert list(read_journal(tmp_path)) == [("a", {"path": str(tmp_path), "items": [1, 2]})]
+
+    def test_synced_marker(self, tmp_path: Path) -> None:
+        assert not is_synced(tmp_path)
+        mark_synced(tmp_path)
+        assert is_synced(tmp_path)
+
+    def test_progress_read_back_after_reopening(self, tmp_path: Path) -> None:
+        # Given
+        progress = JournalProgress(tmp_path)
+        progress.add("evaluation/a")
+        progress.close()
+
+        # When
+        reopened = JournalProgress(tmp_path)
+
+        # Then
+        assert "evaluation/a" in reopened
+        assert "evaluation/b" not in reopened
+        reset_progress(tmp_path)
+        assert "evaluation/a" not in JournalProgress(tmp_path)
@@ -0,0 +1,100 @@
+import asyncio
+from io import BytesIO
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from PIL import Image
+from inspect_wandb.viz.browser import BrowserPool, save_cropped
+
+def screenshot() -> bytes:
+    image = Image.new("RGB", (40, 20), "white")
+    image.paste((255, 0, 0), (10, 5, 30, 15))
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def fake_playwright() -> MagicMock:
+    page = MagicMock()
+    page.goto = AsyncMock()
+    page.wait_for_function = AsyncMock()
+    page.evaluate = AsyncMock(return_value=100)
+    page.set_viewport_size = AsyncMock()
+    page.screenshot = AsyncMock(return_value=screenshot())
+    context = MagicMock()
+    context.new_page = AsyncMock(return_value=page)
+    context.close = AsyncMock()
+    browser = MagicMock()
+    browser.new_context = AsyncMock(return_value=context)
+    browser.close = AsyncMock()
+    playwright = MagicMock()
+    playwright.chromium.launch = AsyncMock(return_value=browser)
+    playwright.stop = AsyncMock()
+    starter = MagicMock()
+    starter.start = AsyncMock(return_value=playwright)
+    return MagicMock(return_value=starter)
+
+class TestBrowserPool:
+    """
+    Tests for rendering plots in one browser kept open between renders.
+    """
+
+    def test_launches_browser_once_for_many_plots(self, tmp_path: Path) -> None:
+        # Given
+        async_playwright = fake_playwright()
+        pool = BrowserPool(size=2)
+
+        async def render() -> list[tuple[int, int] | None]:
+            sizes = await asyncio.gather(*(pool.write_png(tmp_path / f"plot_{i}.png", MagicMock()) for i in range(5)))
+            await pool.close()
+            return list(sizes)
+
+        # When
+        with (
+            patch("playwright.async_api.async_playwright", async_playwright),
+            patch("inspect_wandb.viz.browser.write_html"),
+        ):
+            sizes = asyncio.run(render())
+
+        # Then
+        playwright = async_playwright.return_value.start.return_value
+        browser = playwright.chromium.launch.return_value
+        assert pool.launches == 1
+        playwright.chromium.launch.assert_awaited_once_with(headless=True)
+        assert browser.new_context.await_count == 5
+        assert browser.new_context.return_value.close.await_count == 5
+        # cropped to the red box, with 8px of padding at scale 2
+        assert sizes == [(20 + 32, 10 + 32)] * 5
+        assert all((tmp_path / f"plot_{i}.png").exists() for i in range(5))
+        browser.close.assert_awaited_once()
+        playwright.stop.assert_awaited_once()
+        assert not pool.started
+
+    def test_relaunches_browser_after_close(self, tmp_path: Path) -> None:
+        # Given
+        async_playwright = fake_playwright()
+        pool = BrowserPool()
+
+        # When
+        with (
+            patch("playwright.async_api.async_playwright", async_playwright),
+            patch("inspect_wandb.viz.browser.write_html"),
+        ):
+            for run in range(2):
+                asyncio.run(pool.write_png(tmp_path / f"plot_{run}.png", MagicMock()))
+                asyncio.run(pool.close())
+
+        # Then
+        assert pool.launches == 2
+
+    def test_blank_screenshot_saved_without_cropping(self, tmp_path: Path) -> None:
+        # Given
+        buffer = BytesIO()
+        Image.new("RGB", (40, 20), "white").save(buffer, format="PNG")
+
+        # When
+        size = save_cropped(buffer.getvalue(), tmp_path / "blank.png", padding=8, scale=2)
+
+        # Then
+        assert size == (40, 20)
+        with Image.open(tmp_path / "blank.png") as image:
+            assert image.size == (40, 20)
@@ -0,0 +1,121 @@
+import os
+from pathlib import Path
+from typing import Sequence
+from unittest.mock import patch
+
+import pandas as pd
+from inspect_wandb.viz.evals_cache import MAX_CACHE_PARTS, EvalsCache
+
+class FakeEvalsDf:
+    """
+    Reads one row from each log, recording which logs were read.
+    """
+
+    def __init__(self) -> None:
+        self.read: list[str] = []
+
+    def __call__(self, logs: Sequence[str], quiet: bool | None = None) -> pd.DataFrame:
+        self.read.extend(logs)
+        return pd.DataFrame([
+            {"eval_id": Path(log).stem, "log": log, "score_headline_value": len(Path(log).read_text())}
+            for log in logs
+        ])
+
+def write_log(log_dir: Path, index: int, content: str = "x") -> Path:
+    log = log_dir / f"2025-01-01T00-00-{index:02d}+00-00_task_{index}.eval"
+    log.write_text(content)
+    return log
+
+class TestEvalsCache:
+    """
+    Tests for reading only new or changed eval logs into the evals dataframe.
+    """
+
+    def test_reads_only_new_or_changed_logs(self, tmp_path: Path) -> None:
+        # Given
+        log_dir = tmp_path / "logs"
+        log_dir.mkdir()
+        logs = [write_log(log_dir, index) for index in range(3)]
+        fake_evals_df = FakeEvalsDf()
+
+        with patch("inspect_wandb.viz.evals_cache.evals_df", fake_evals_df):
+            # When
+            first = EvalsCache(tmp_path / "cache").evals_df([str(log_dir)])
+
+            # Then
+            assert len(fake_evals_df.read) == 3
+            assert list(first["score_headline_value"]) == [1, 1, 1]
+
+            # When
+            # a later run, with one log changed and one added
+            write_log(log_dir, 1, content="xyz")
+            os.utime(logs[1], (0, 12345))
+            new_log = write_log(log_dir, 3)
+            fake_evals_df.read.clear()
+            cache = EvalsCache(tmp_path / "cache")
+            second = cache.evals_df([str(log_dir)])
+
+            # Then
+            assert sorted(fake_evals_df.read) == [str(logs[1]), str(new_log)]
+            assert (cache.hits, cache.misses) == (2, 2)
+            assert dict(zip(second["eval_id"], second["score_headline_value"])) == {
+                logs[0].stem: 1, logs[1].stem: 3, logs[2].stem: 1, new_log.stem: 1,
+            }
+            assert "_cache_size" not in second.columns
+
+            # When
+            fake_evals_df.read.clear()
+            third = cache.evals_df([str(log) for log in reversed(logs)])
+
+            # Then
+            assert fake_evals_df.read == []
+            # rows are in the order of the logs asked for
+            assert list(third["eval_id"]) == [log.stem for log in reversed(logs)]
+
+    def test_reads_logs_again_when_cache_is_unreadable(self, tmp_path: Path) -> None:
+        # Given
+        log_dir = tmp_path / "logs"
+        log_dir.mkdir()
+        log = write_log(log_dir, 0)
+        (tmp_path / "cache" / "evals").mkdir(parents=True)
+        (tmp_path / "cache" / "evals" / "part-0.parquet").write_text("not parquet")
+        fake_evals_df = FakeEvalsDf()
+
+        # When
+        with patch("inspect_wandb.viz.evals_cache.evals_df", fake_evals_df):
+            df = EvalsCache(tmp_path / "cache").evals_df([str(log)])
+
+        # Then
+        assert fake_evals_df.read == [str(log)]
+        assert list(df["eval_id"]) == [log.stem]
+        [part] = [part for part in (tmp_path / "cache" / "evals").glob("part-*.parquet") if part.name != "part-0.parquet"]
+        assert len(pd.read_parquet(part)) == 1
+
+    def test_writes_only_new_rows_and_merges_parts(self, tmp_path: Path) -> None:
+        # Given
+        log_dir = tmp_path / "logs"
+        log_dir.mkdir()
+        fake_evals_df = FakeEvalsDf()
+        cache = EvalsCache(tmp_path / "cache")
+
+        with patch("inspect_wandb.viz.evals_cache.evals_df", fake_evals_df):
+            # When
+            # a run adding its logs a task at a time
+            for index in range(MAX_CACHE_PARTS + 1):
+                cache.evals_df([str(write_log(log_dir, index))])
+
+            # Then
+            parts = sorted((tmp_path / "cache" / "evals").glob("part-*.parquet"))
+            assert len(parts) == MAX_CACHE_PARTS + 1
+            assert all(len(pd.read_parquet(part)) == 1 for part in parts)
+
+            # When
+            fake_evals_df.read.clear()
+            later = EvalsCache(tmp_path / "cache")
+            df = later.evals_df([str(log_dir)])
+
+            # Then
+            assert fake_evals_df.read == []
+            assert len(df) == MAX_CACHE_PARTS + 1
+            [merged] = list((tmp_path / "cache" / "evals").glob("part-*.parquet"))
+            assert len(pd.read_parquet(merged)) == MAX_CACHE_PARTS + 1
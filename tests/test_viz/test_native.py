@@ -0,0 +1,57 @@
+import math
+from pathlib import Path
+
+import pandas as pd
+from PIL import Image
+from inspect_wandb.viz.native import heatmap_cells, render_heatmap, viridis
+
+def evals() -> pd.DataFrame:
+    return pd.DataFrame([
+        {"task_name": "easy", "model": "model-a", "score_headline_value": 0.9},
+        {"task_name": "easy", "model": "model-a", "score_headline_value": 0.7},
+        {"task_name": "easy", "model": "model-b", "score_headline_value": 0.6},
+        {"task_name": "hard", "model": "model-a", "score_headline_value": 0.2},
+        {"task_name": "hard", "model": "model-b", "score_headline_value": 0.0},
+        {"task_name": "medium", "model": "model-a", "score_headline_value": 0.5},
+    ])
+
+class TestNativeHeatmap:
+    """
+    Tests for rendering the scores heatmap without a browser.
+    """
+
+    def test_averages_and_sorts_cells_like_inspect_viz(self) -> None:
+        # When
+        cells = heatmap_cells(evals(), task_name="task_display_name", model_name="model", score_value="score_headline_value")
+
+        # Then
+        # falls back to task_name, with the highest scoring tasks to the right and models to the top
+        assert list(cells.columns) == ["hard", "medium", "easy"]
+        assert list(cells.index) == ["model-a", "model-b"]
+        assert cells.loc["model-a", "easy"] == 0.8
+        assert math.isnan(cells.loc["model-b", "medium"])
+
+    def test_renders_cells_in_the_viridis_scale(self, tmp_path: Path) -> None:
+        # Given
+        cells = heatmap_cells(evals(), task_name="task_name", model_name="model", score_value="score_headline_value")
+        path = tmp_path / "scores_heatmap.png"
+
+        # When
+        width, height = render_heatmap(cells, str(path), scale=1)
+
+        # Then
+        with Image.open(path) as image:
+            assert image.size == (width, height)
+            pixels = image.convert("RGB")
+            # the grid is 56px cells starting 12px from the top, and is the rightmost thing drawn in its first row
+            grid_right = max(x for x in range(width) if pixels.getpixel((x, 16)) != (255, 255, 255)) + 1
+            # near the top left corner of each cell, away from its label
+            colours = {
+                (row, column): pixels.getpixel((grid_right - (3 - column) * 56 + 4, 12 + row * 56 + 4))
+                for row in range(2)
+                for column in range(3)
+            }
+        assert colours[(0, 0)] == viridis(0.2)
+        assert colours[(0, 2)] == viridis(0.8)
+        assert colours[(1, 0)] == viridis(0.0)
+        assert colours[(1, 1)] == (220, 220, 220)
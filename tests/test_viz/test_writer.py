@@ -0,0 +1,193 @@
+import asyncio
+import json
+import threading
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+from PIL import Image
+from inspect_ai.hooks import RunEnd
+from inspect_viz import Component
+from inspect_wandb.config.settings import ModelsSettings
+from inspect_wandb.viz.inspect_viz_writer import INSPECT_VIZ_PLOTS
+from inspect_wandb.viz.writer import VizPlot, VizWriter, sample_frame
+
+def evals() -> pd.DataFrame:
+    return pd.DataFrame([
+        {"eval_id": f"{task}-{model}", "task_name": task, "task_display_name": task, "model": model, "score_headline_value": 0.5, "score_headline_stderr": 0.1}
+        for task in ("task-a", "task-b")
+        for model in ("model-a", "model-b")
+    ])
+
+def samples() -> pd.DataFrame:
+    return pd.DataFrame([
+        {"eval_id": f"{task}-{model}", "model_usage": json.dumps({model: {"total_tokens": 10 * epoch}}), "total_time": 0.5 * epoch}
+        for task in ("task-a", "task-b")
+        for model in ("model-a", "model-b")
+        for epoch in range(3)
+    ])
+
+class RecordingWriter(VizWriter):
+    """
+    Writes a blank image for each plot, recording how many are rendered at once.
+    """
+
+    def __init__(self, concurrency: int, names: list[str] | None = None) -> None:
+        super().__init__(concurrency, names=names)
+        self.rendering = 0
+        self.max_rendering = 0
+        self.figures: dict[str, Any] = {}
+
+    async def _write_image(self, figure: Any, path: str) -> None:
+        self.rendering += 1
+        self.max_rendering = max(self.max_rendering, self.rendering)
+        await asyncio.sleep(0.01)
+        Image.new("RGB", (1, 1), "white").save(path)
+        self.figures[Path(path).stem] = figure
+        self.rendering -= 1
+
+class TestVizWriter:
+    """
+    Tests for rendering a run's plots concurrently from shared dataframes.
+    """
+
+    @pytest.mark.asyncio
+    async def test_renders_plots_concurrently_from_dataframes_loaded_once(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        # Given
+        monkeypatch.chdir(tmp_path)
+        writer = RecordingWriter(concurrency=2)
+        writer.plots = {
+            "evals_1": VizPlot(build=lambda df: len(df)),
+            "evals_2": VizPlot(build=lambda df: len(df)),
+            "samples_1": VizPlot(build=lambda df: int(df["total_tokens"].sum()), samples=True),
+            "samples_2": VizPlot(build=lambda df: list(df.columns), samples=True),
+            "failing": VizPlot(build=lambda df: 1 / 0),
+        }
+        mock_evals_df = MagicMock(return_value=evals())
+        mock_samples_df = MagicMock(return_value=samples())
+
+        # When
+        with (
+            patch("inspect_wandb.viz.writer.evals_df", mock_evals_df),
+            patch("inspect_wandb.viz.writer.samples_df", mock_samples_df),
+            patch("inspect_wandb.viz.writer.wandb.log") as mock_log,
+        ):
+            await writer.log_plots(RunEnd(run_id="test-run", exception=None, logs=[]), MagicMock())
+
+        # Then
+        mock_evals_df.assert_called_once()
+        mock_samples_df.assert_called_once()
+        assert writer.max_rendering == 2
+        assert writer.figures["evals_1"] == 4
+        assert writer.figures["samples_1"] == 4 * (0 + 10 + 20)
+        assert {"task_display_name", "model", "total_tokens"} <= set(writer.figures["samples_2"])
+        # every plot that rendered is logged in one step
+        mock_log.assert_called_once()
+        assert set(mock_log.call_args.args[0]) == {"evals_1", "evals_2", "samples_1", "samples_2"}
+
+    @pytest.mark.asyncio
+    async def test_plots_built_off_the_event_loop(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        # Given
+        monkeypatch.chdir(tmp_path)
+        writer = RecordingWriter(concurrency=2)
+        writer.plots = {"evals": VizPlot(build=lambda df: threading.current_thread())}
+
+        # When
+        with (
+            patch("inspect_wandb.viz.writer.evals_df", MagicMock(return_value=evals())),
+            patch("inspect_wandb.viz.writer.wandb.log"),
+        ):
+            await writer.log_plots(RunEnd(run_id="test-run", exception=None, logs=[]), MagicMock())
+
+        # Then
+        assert writer.figures["evals"] is not threading.current_thread()
+
+    @pytest.mark.asyncio
+    async def test_only_loads_samples_for_plots_that_need_them(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        # Given
+        monkeypatch.chdir(tmp_path)
+        writer = RecordingWriter(concurrency=4, names=["evals", "unknown"])
+        writer.plots = {
+            "evals": VizPlot(build=lambda df: len(df)),
+            "samples": VizPlot(build=lambda df: len(df), samples=True),
+        }
+        mock_samples_df = MagicMock(return_value=samples())
+
+        # When
+        with (
+            patch("inspect_wandb.viz.writer.evals_df", MagicMock(return_value=evals())),
+            patch("inspect_wandb.viz.writer.samples_df", mock_samples_df),
+            patch("inspect_wandb.viz.writer.wandb.log") as mock_log,
+        ):
+            await writer.log_plots(RunEnd(run_id="test-run", exception=None, logs=[]), MagicMock())
+
+        # Then
+        mock_samples_df.assert_not_called()
+        assert set(mock_log.call_args.args[0]) == {"evals"}
+
+    @pytest.mark.asyncio
+    async def test_updates_plots_as_tasks_end_at_most_once_per_interval(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        # Given
+        monkeypatch.chdir(tmp_path)
+        writer = RecordingWriter(concurrency=2)
+        writer.plots = {"evals": VizPlot(build=lambda df: list(df["eval_id"]))}
+        read: list[str] = []
+
+        def fake_evals_df(logs: list[str]) -> pd.DataFrame:
+            read.extend(logs)
+            return pd.DataFrame([{"eval_id": log, "log": log} for log in logs], columns=["eval_id", "log"])
+
+        def task_end(location: str) -> MagicMock:
+            data = MagicMock()
+            data.run_id = "test-run"
+            data.log.location = location
+            return data
+
+        with (
+            patch("inspect_wandb.viz.writer.evals_df", fake_evals_df),
+            patch("inspect_wandb.viz.writer.wandb.log") as mock_log,
+        ):
+            # When
+            await writer.update_plots(task_end("log-1"), interval=3600)
+            await writer.close()
+
+            # Then
+            assert writer.figures["evals"] == ["log-1"]
+            assert mock_log.call_count == 1
+
+            # When
+            # within the interval, the task's log is added without rendering the plots
+            await writer.update_plots(task_end("log-2"), interval=3600)
+            await writer.close()
+
+            # Then
+            assert writer.figures["evals"] == ["log-1"]
+            assert mock_log.call_count == 1
+
+            # When
+            logs = [MagicMock(location=location) for location in ("log-1", "log-2", "log-3")]
+            await writer.log_plots(RunEnd(run_id="test-run", exception=None, logs=logs), MagicMock())
+
+        # Then
+        # each log is only read once, and the final plots include every task
+        assert read == ["log-1", "log-2", "log-3"]
+        assert writer.figures["evals"] == ["log-1", "log-2", "log-3"]
+        assert mock_log.call_count == 2
+
+    def test_inspect_viz_plots_build_from_run_dataframes(self) -> None:
+        # Given
+        frames = {False: evals(), True: sample_frame(evals(), samples())}
+
+        # When
+        components = {name: plot.build(frames[plot.samples]) for name, plot in INSPECT_VIZ_PLOTS.items()}
+
+        # Then
+        assert set(components) == {"scores_heatmap", "scores_by_task", "token_usage", "latency"}
+        assert all(isinstance(component, Component) for component in components.values())
+
+    def test_default_plots_do_not_read_samples(self) -> None:
+        settings = ModelsSettings(enabled=True, entity="test-entity", project="test-project")
+        assert settings.viz_plots == ["scores_heatmap"]
+        assert not any(INSPECT_VIZ_PLOTS[name].samples for name in settings.viz_plots)
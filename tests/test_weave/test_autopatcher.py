@@ -1,13 +1,16 @@
 from inspect_ai import task, Task, eval
-from inspect_ai.solver import generate
+from inspect_ai.solver import generate, Plan
 from inspect_ai.scorer import exact
 from inspect_ai.dataset import Sample
 from weave.trace.weave_client import WeaveClient
 from typing import Generator
 from pytest import MonkeyPatch
+import gc
 import pytest
 from unittest.mock import MagicMock, patch
 from ..conftest_weave_client import TEST_ENTITY
+from inspect_wandb.weave.autopatcher import PatchedPlan, _patched_plans, get_inspect_patcher, patched_plan
+import weave
 
 @pytest.fixture(scope="function")
 def patch_weave_client_in_hooks(client: WeaveClient) -> Generator[WeaveClient, None, None]:
@@ -55,4 +58,103 @@ def test_inspect_quickstart(
     # reset the env variables
     monkeypatch.delenv("INSPECT_WANDB_MODELS_ENABLED")
     monkeypatch.delenv("INSPECT_WANDB_WEAVE_ENABLED")
-    monkeypatch.delenv("INSPECT_WANDB_WEAVE_AUTOPATCH")
\ No newline at end of file
+    monkeypatch.delenv("INSPECT_WANDB_WEAVE_AUTOPATCH")
+
+class TestPatchedPlanCache:
+    """
+    Tests that the patched plan, and the weave ops wrapping its solvers, are built once per plan rather than for every sample
+    """
+
+    def test_patched_plan_reused_for_the_same_plan(self) -> None:
+        # Given
+        plan = Plan([generate()])
+
+        # When
+        first = patched_plan(plan)
+        second = patched_plan(plan)
+
+        # Then
+        assert first is second
+        assert first.steps is plan.steps
+        assert patched_plan(Plan([generate()])) is not first
+
+    def test_ops_built_once_per_step(self) -> None:
+        # Given
+        plan = patched_plan(Plan([generate()]))
+
+        # When
+        with patch("inspect_wandb.weave.autopatcher.weave.op", wraps=weave.op) as mock_op:
+            first = plan.op(plan.steps[0])
+            second = plan.op(plan.steps[0])
+
+        # Then
+        assert first is second
+        assert first.name == "inspect_ai/generate"
+        mock_op.assert_called_once()
+
+    def test_cleanup_op_uses_explicit_name(self) -> None:
+        # Given
+        async def cleanup(state) -> None:
+            pass
+        plan = PatchedPlan([generate()], cleanup=cleanup, internal=True)
+
+        # When
+        op = plan.op(cleanup, "inspect_sample_cleanup")
+
+        # Then
+        assert op.name == "inspect_sample_cleanup"
+
+    def test_patched_plan_released_with_plan(self) -> None:
+        # Given
+        plan = Plan([generate()])
+        patched_plan(plan)
+        entries = len(_patched_plans)
+
+        # When
+        del plan
+        gc.collect()
+
+        # Then
+        assert len(_patched_plans) == entries - 1
+
+    def test_cache_cleared_on_undo_patch(self) -> None:
+        # Given
+        plan = Plan([generate()])
+        patched = patched_plan(plan)
+
+        # When
+        get_inspect_patcher().undo_patch()
+
+        # Then
+        assert plan not in _patched_plans
+        assert patched_plan(plan) is not patched
+
+
+def test_untraced_samples_run_unpatched_plan(
+    patch_weave_client_in_hooks: WeaveClient,
+    monkeypatch: MonkeyPatch,
+    reset_inspect_ai_hooks: None
+) -> None:
+    @task
+    def hello_world():
+        return Task(
+            dataset=[Sample(input="Just reply with Hello World", target="Hello World")],
+            solver=[generate()],
+            scorer=exact(),
+        )
+
+    monkeypatch.setenv("INSPECT_WANDB_MODELS_ENABLED", "false")
+    monkeypatch.setenv("INSPECT_WANDB_WEAVE_ENABLED", "true")
+    monkeypatch.setenv("INSPECT_WANDB_WEAVE_AUTOPATCH", "true")
+    monkeypatch.setenv("INSPECT_WANDB_WEAVE_TRACE_SAMPLE_RATE", "0")
+
+    try:
+        eval(hello_world, model="mockllm/model")
+    finally:
+        get_inspect_patcher().trace_sample_rate = 1.0
+
+    op_names = [call._op_name for call in patch_weave_client_in_hooks.calls()]
+    # the mockllm output is scored incorrect, so the sample still gets a sample call, but its solvers are not traced
+    assert any("inspect-sample" in op_name for op_name in op_names)
+    assert not any("inspect_ai-generate" in op_name for op_name in op_names)
+    assert any("Evaluation.evaluate" in op_name for op_name in op_names)
@@ -0,0 +1,55 @@
+from inspect_wandb.weave.custom_evaluation_logger import CustomEvaluationLogger, log_sample_prediction
+from weave.trace.weave_client import WeaveClient
+from typing import Any
+
+
+def log_sample(client: WeaveClient, batch_scores: bool) -> tuple[CustomEvaluationLogger, list[str]]:
+    weave_eval_logger = CustomEvaluationLogger(name="test_task", dataset="test_dataset", model="mockllm__model")
+    client.server.attribute_access_log.clear()
+    log_sample_prediction(
+        weave_eval_logger,
+        inputs={"input": "test_input"},
+        output="test_output",
+        scores=[("match", 1.0, {"explanation": "exact match"}), ("includes", {"score": "C"}, {}), ("judge", True, {})],
+        metrics={"total_time": 1.5, "total_tokens": 10},
+        attributes={"sample_id": 1, "epoch": 1},
+        batch_scores=batch_scores,
+    )
+    server_calls = list(client.server.attribute_access_log)
+    weave_eval_logger.finish()
+    return weave_eval_logger, server_calls
+
+
+def predict_and_score_calls(client: WeaveClient) -> list[Any]:
+    return [call for call in client.get_calls() if "predict_and_score" in call.op_name]
+
+
+class TestBatchedScores:
+    """
+    Tests for submitting all scores of a prediction in one operation, measured against the SQLite trace server.
+    """
+
+    def test_batched_scores_make_fewer_trace_server_calls(self, client: WeaveClient) -> None:
+        # Given
+        _, unbatched = log_sample(client, batch_scores=False)
+
+        # When
+        _, batched = log_sample(client, batch_scores=True)
+
+        # Then
+        # one scorer call and feedback entry per score and metric, against just the prediction calls
+        assert len(unbatched) >= 5 * 3
+        assert sorted(batched) == ["call_end", "call_end", "call_start", "call_start"]
+
+    def test_batched_scores_and_attributes_recorded_on_prediction(self, client: WeaveClient) -> None:
+        # When
+        weave_eval_logger, _ = log_sample(client, batch_scores=True)
+
+        # Then
+        [call] = predict_and_score_calls(client)
+        assert dict(call.output["scores"]) == {
+            "match": 1.0, "includes": {"score": "C"}, "judge": True, "total_time": 1.5, "total_tokens": 10
+        }
+        assert call.attributes["score_attributes"] == {"match": {"explanation": "exact match"}}
+        assert call.attributes["sample_id"] == 1
+        assert weave_eval_logger._accumulated_predictions[0]._captured_scores["match"] == 1.0
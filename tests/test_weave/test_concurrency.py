@@ -0,0 +1,80 @@
+from collections import Counter
+from unittest.mock import MagicMock, patch
+
+from inspect_ai import Task, eval as inspect_eval
+from inspect_ai.dataset import Sample
+from inspect_ai.scorer import exact
+from inspect_ai.solver import generate
+from pytest import MonkeyPatch
+from weave.trace.weave_client import WeaveClient
+from ..conftest import raise_error
+
+TASKS = 12
+SAMPLES = 6
+MAX_TASKS = 4
+
+def make_task(index: int) -> Task:
+    # every fourth task fails on its first sample error, so it never reaches TaskEnd and the worker
+    # that ran it goes on to its next task in the same context
+    failing = index % 4 == 3
+    return Task(
+        dataset=[Sample(input=f"task_{index} sample {i}", target="Hello World") for i in range(SAMPLES)],
+        solver=[raise_error()] if failing else [generate()],
+        scorer=exact(),
+        name=f"task_{index}",
+        fail_on_error=True if failing else None,
+    )
+
+def op_name(op_ref: str) -> str:
+    return op_ref.split("/")[-1].split(":")[0]
+
+class TestConcurrentTasks:
+    """
+    Stress test running many tasks at once against the SQLite trace server, checking that every call is attributed to
+    the evaluation and sample it belongs to.
+    """
+
+    def test_calls_attributed_to_their_own_task_and_sample_when_tasks_run_concurrently(
+        self,
+        client: WeaveClient,
+        reset_inspect_ai_hooks: None,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        # Given
+        monkeypatch.setenv("INSPECT_WANDB_MODELS_ENABLED", "false")
+        monkeypatch.setenv("INSPECT_WANDB_WEAVE_ENABLED", "true")
+        monkeypatch.setenv("INSPECT_WANDB_WEAVE_AUTOPATCH", "true")
+
+        # When
+        with patch("inspect_wandb.weave.hooks.weave.init", MagicMock(return_value=client)):
+            inspect_eval([make_task(i) for i in range(TASKS)], model="mockllm/model", max_tasks=MAX_TASKS)
+
+        # Then
+        calls = list(client.get_calls())
+        by_id = {call.id: call for call in calls}
+        evaluations = {
+            call.attributes["inspect"]["eval_id"]: call for call in calls if op_name(call.op_name) == "Evaluation.evaluate"
+        }
+        assert len(evaluations) == TASKS
+        assert all(evaluation.parent_id is None for evaluation in evaluations.values())
+
+        sample_calls = [call for call in calls if op_name(call.op_name) == "inspect-sample"]
+        assert len(sample_calls) == TASKS * SAMPLES
+        for sample_call in sample_calls:
+            evaluation = evaluations[sample_call.attributes["task_id"]]
+            assert sample_call.parent_id == evaluation.id
+            assert sample_call.inputs["input"].startswith(f"{sample_call.attributes['task_name']} ")
+        assert Counter(call.attributes["task_id"] for call in sample_calls) == {eval_id: SAMPLES for eval_id in evaluations}
+
+        # solver steps are traced under the sample they ran for
+        solver_calls = [call for call in calls if op_name(call.op_name) in ("inspect_ai-generate", "raise_error")]
+        assert len(solver_calls) == TASKS * SAMPLES
+        for solver_call in solver_calls:
+            sample_call = by_id[solver_call.parent_id]
+            assert op_name(sample_call.op_name) == "inspect-sample"
+            assert solver_call.thread_id == sample_call.attributes["sample_uuid"]
+
+        # and each sample's prediction is logged to its own evaluation
+        predictions = [call for call in calls if op_name(call.op_name) == "Evaluation.predict_and_score"]
+        assert len(predictions) == TASKS * SAMPLES
+        assert all(op_name(by_id[prediction.parent_id].op_name) == "inspect-sample" for prediction in predictions)
@@ -0,0 +1,184 @@
+import datetime
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable
+from unittest.mock import MagicMock, patch
+
+from weave.trace.weave_client import WeaveClient
+from weave.trace_server import trace_server_interface as tsi
+from weave.trace_server.ids import generate_id
+from weave.trace_server_bindings.async_batch_processor import AsyncBatchProcessor
+from weave.trace_server_bindings.models import EndBatchItem, StartBatchItem
+from inspect_wandb.telemetry.spool import is_synced, read_journal
+from inspect_wandb.weave.drain import drain_weave_client, weave_spill_path
+from inspect_wandb.weave.spool import sync_weave_spool
+
+def call_items(client: WeaveClient, count: int) -> list[StartBatchItem | EndBatchItem]:
+    project_id = client._project_id()
+    items: list[StartBatchItem | EndBatchItem] = []
+    for _ in range(count):
+        call_id = generate_id()
+        now = datetime.datetime.now(datetime.timezone.utc)
+        items.append(StartBatchItem(req=tsi.CallStartReq(start=tsi.StartedCallSchemaForInsert(
+            project_id=project_id, id=call_id, op_name="test-op", trace_id=generate_id(), started_at=now,
+            attributes={}, inputs={"x": "y" * 100},
+        ))))
+        items.append(EndBatchItem(req=tsi.CallEndReq(end=tsi.EndedCallSchemaForInsert(
+            project_id=project_id, id=call_id, ended_at=now, output="done", summary={},
+        ))))
+    return items
+
+def attach_call_processor(client: WeaveClient, send: Callable[[list[Any]], None], batch_size: int) -> AsyncBatchProcessor:
+    """
+    Give the SQLite test client a call processor like the one the remote trace server batches calls with.
+    Its own processing thread is stopped, and the test client's flush after every client call is turned off so that
+    it is not restarted, so only the drain sends batches.
+    """
+    client.set_autoflush(False)
+    processor: AsyncBatchProcessor = AsyncBatchProcessor(send, max_batch_size=batch_size)
+    processor.stop_accepting_new_work_and_flush_queue()
+    client._server_call_processor = processor
+    return processor
+
+def send_to(client: WeaveClient, delay: float = 0.0, release: threading.Event | None = None) -> Callable[[list[Any]], None]:
+    def send(batch: list[Any]) -> None:
+        if release is not None:
+            release.wait()
+        time.sleep(delay)
+        for item in batch:
+            if isinstance(item, StartBatchItem):
+                client.server.call_start(item.req)
+            else:
+                client.server.call_end(item.req)
+    return send
+
+class TestWeaveClientDrain:
+    """
+    Tests for sending pending Weave calls at the end of a run within a deadline.
+    """
+
+    def test_sends_batches_in_parallel(self, client: WeaveClient) -> None:
+        # Given
+        processor = attach_call_processor(client, send_to(client, delay=0.2), batch_size=10)
+        processor.enqueue(call_items(client, 40))
+
+        # When
+        stats = drain_weave_client(client, timeout=30, workers=8)
+
+        # Then
+        assert not stats.timed_out
+        assert stats.calls_flushed == 80
+        assert stats.bytes_flushed > 80 * 100
+        assert stats.calls_spilled == 0
+        # 8 batches of 0.2s each, sent on 8 threads
+        assert stats.elapsed_seconds < 1.0
+        assert len(list(client.get_calls())) == 40
+
+    def test_call_ends_sent_after_their_starts_with_small_batches(self, client: WeaveClient) -> None:
+        # Given batches which split calls across them, so a call's start and end may be sent by different workers
+        processor = attach_call_processor(client, send_to(client, delay=0.05), batch_size=3)
+        processor.enqueue(call_items(client, 30))
+
+        # When
+        stats = drain_weave_client(client, timeout=30, workers=4)
+
+        # Then
+        assert not stats.timed_out
+        assert stats.calls_flushed == 60
+        assert processor.num_outstanding_jobs == 0
+        calls = list(client.get_calls())
+        assert len(calls) == 30
+        assert all(call.ended_at is not None for call in calls)
+
+    def test_processor_thread_stopped_while_draining(self, client: WeaveClient) -> None:
+        # Given a processor whose own thread is still taking batches off its queue
+        client.set_autoflush(False)
+        sent = send_to(client, delay=0.05)
+        started: set[str] = set()
+        early_ends: list[str] = []
+
+        def send(batch: list[Any]) -> None:
+            # a batch is sent in order, so an end may follow its start in the same batch
+            starts = {item.req.start.id for item in batch if isinstance(item, StartBatchItem)}
+            early_ends.extend(
+                item.req.end.id for item in batch
+                if isinstance(item, EndBatchItem) and item.req.end.id not in started | starts
+            )
+            sent(batch)
+            started.update(starts)
+
+        processor: AsyncBatchProcessor = AsyncBatchProcessor(send, max_batch_size=3, min_batch_interval=0.01)
+        client._server_call_processor = processor
+        processor.enqueue(call_items(client, 30))
+
+        # When
+        stats = drain_weave_client(client, timeout=30, workers=4)
+
+        # Then
+        assert not stats.timed_out
+        assert early_ends == []
+        assert processor.num_outstanding_jobs == 0
+        assert processor.processing_thread.is_alive()
+        calls = list(client.get_calls())
+        assert len(calls) == 30
+        assert all(call.ended_at is not None for call in calls)
+        processor.stop_accepting_new_work_and_flush_queue()
+
+    def test_spills_unsent_calls_on_timeout_and_syncs_them_later(self, client: WeaveClient, tmp_path: Path) -> None:
+        # Given
+        release = threading.Event()
+        processor = attach_call_processor(client, send_to(client, release=release), batch_size=5)
+        processor.enqueue(call_items(client, 10))
+        spill = weave_spill_path(tmp_path, "test-run-id")
+
+        # When
+        try:
+            stats = drain_weave_client(client, timeout=0.2, workers=2, spill_path=spill)
+        finally:
+            release.set()
+
+        # Then
+        # two batches were in flight at the deadline, and the other two are spilled, with the end of the call whose
+        # start was in flight in the first batch
+        assert stats.timed_out
+        assert stats.calls_spilled == 11
+        assert processor.num_outstanding_jobs == 0
+        kinds = [kind for kind, _ in read_journal(spill)]
+        assert kinds[0] == "run_start"
+        assert sorted(kinds[1:]) == ["call_end"] * 6 + ["call_start"] * 5
+
+        # the batches in flight complete after the deadline
+        for _ in range(50):
+            if len(list(client.get_calls())) == 5:
+                break
+            time.sleep(0.1)
+        assert len(list(client.get_calls())) == 5
+
+        # When
+        client._server_call_processor = None
+        with patch("inspect_wandb.weave.spool.weave.init", MagicMock(return_value=client)) as sync_init:
+            synced = sync_weave_spool(tmp_path)
+
+        # Then
+        assert sync_init.call_args.kwargs["project_name"] == client._project_id()
+        assert synced == [spill]
+        assert is_synced(spill)
+        calls = list(client.get_calls())
+        assert len(calls) == 10
+        assert all(call.ended_at is not None for call in calls)
+
+    def test_falls_back_to_flushing_without_processor_internals(self, client: WeaveClient) -> None:
+        # Given
+        client.set_autoflush(False)
+        client._server_call_processor = SimpleNamespace(queue=None)
+
+        # When
+        with patch.object(client, "finish") as finish:
+            stats = drain_weave_client(client, timeout=0.2)
+
+        # Then
+        finish.assert_called_once_with(use_progress_bar=False)
+        assert not stats.timed_out
+        assert stats.calls_spilled == 0
@@ -83,5 +83,19 @@ class TestEndToEndInspectRuns:
                     'fail_on_error': fail_on_error, 'sandbox_cleanup': sandbox_cleanup, 
                     'log_samples': log_samples, 'log_realtime': log_realtime, 'log_images': log_images, 'score_display': score_display
                 }
-            }
-        )
\ No newline at end of file
+            },
+            streaming=False
+        )
+
+    def test_predictions_and_summary_logged_with_background_worker(self, patched_weave_evaluation_hooks: dict[str, MagicMock], hello_world_eval: Callable[[], Task], monkeypatch: MonkeyPatch) -> None:
+        # Given
+        monkeypatch.setenv("INSPECT_WANDB_WEAVE_BACKGROUND_LOGGING", "true")
+        weave_evaluation_logger = patched_weave_evaluation_hooks["weave_evaluation_logger"]
+
+        # When
+        inspect_eval(hello_world_eval, model="mockllm/model")
+
+        # Then
+        weave_evaluation_logger.log_prediction.assert_called_once()
+        weave_evaluation_logger.log_summary.assert_called_once()
+        assert patched_weave_evaluation_hooks["weave_evaluation_hooks"].dispatcher is None
@@ -1,12 +1,18 @@
 from inspect_ai.log import EvalLog
-from unittest.mock import MagicMock
-from inspect_ai.hooks import SampleEnd, TaskEnd, RunEnd, TaskStart, SampleStart
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+from inspect_ai.hooks import SampleEnd, TaskEnd, RunEnd, RunStart, TaskStart, SampleStart
 from inspect_ai.model import ChatCompletionChoice, ModelOutput, ChatMessageAssistant
 from inspect_ai.log import EvalSample,EvalSampleSummary
 from inspect_ai._eval.eval import EvalLogs
 from inspect_wandb.weave.hooks import WeaveEvaluationHooks
+from inspect_wandb.weave.custom_evaluation_logger import CustomEvaluationLogger
+from inspect_wandb.weave.drain import DrainStats
+from inspect_wandb.weave.payloads import PayloadBudget
+from weave.trace.refs import ObjectRef
 from inspect_ai.scorer import Score
 import pytest
+import threading
 from weave.evaluation.eval_imperative import ScoreLogger, EvaluationLogger
 from inspect_wandb.config.settings import WeaveSettings
 from weave.trace.weave_client import WeaveClient, Call
@@ -107,6 +113,87 @@ class TestWeaveEvaluationHooks:
         )
         mock_score_logger.finish.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_writes_batched_scores_to_weave_on_sample_end(self, test_settings: WeaveSettings) -> None:
+        # Given
+        hooks = WeaveEvaluationHooks()
+        hooks.settings = test_settings.model_copy(update={"batch_scores": True})
+        hooks._hooks_enabled = True
+        sample = SampleEnd(
+            run_id="test_run_id",
+            eval_id="test_eval_id",
+            sample_id="test_sample_id",
+            sample=EvalSample(
+                id=1,
+                epoch=1,
+                input="test_input",
+                target="test_output",
+                scores={"test_score": Score(value=1.0, explanation="test explanation"), "other_score": Score(value="C")},
+                total_time=2.0,
+                output=ModelOutput(model="mockllm/model", choices=[ChatCompletionChoice(message=ChatMessageAssistant(content="test_output"))])
+            )
+        )
+        mock_weave_eval_logger = MagicMock(spec=CustomEvaluationLogger)
+        hooks.weave_eval_loggers["test_eval_id"] = mock_weave_eval_logger
+
+        # When
+        await hooks.on_sample_end(sample)
+
+        # Then
+        mock_weave_eval_logger.log_prediction.assert_not_called()
+        mock_weave_eval_logger.log_scored_prediction.assert_called_once_with(
+            inputs={"input": "test_input"},
+            output="test_output",
+            scores={"test_score": 1.0, "other_score": {"score": "C"}, "total_time": 2.0},
+            score_attributes={"test_score": {"explanation": "test explanation"}},
+            parent_call=None
+        )
+
+    @pytest.mark.asyncio
+    async def test_offloads_sample_payloads_over_budget_on_sample_end(self, test_settings: WeaveSettings) -> None:
+        # Given
+        hooks = WeaveEvaluationHooks()
+        hooks.settings = test_settings.model_copy(update={"max_payload_bytes": 100})
+        hooks._hooks_enabled = True
+        payload_ref = MagicMock(spec=ObjectRef)
+        publish_threads: list[threading.Thread] = []
+        mock_publish = MagicMock(side_effect=lambda *args, **kwargs: publish_threads.append(threading.current_thread()) or payload_ref)
+        hooks.payload_budget = PayloadBudget(100, publish=mock_publish)
+        long_input = "x" * 1000
+        sample = SampleEnd(
+            run_id="test_run_id",
+            eval_id="test_eval_id",
+            sample_id="test_sample_id",
+            sample=EvalSample(
+                id=1,
+                epoch=1,
+                input=long_input,
+                target="test_output",
+                scores={"test_score": Score(value=1.0)},
+                output=ModelOutput(model="mockllm/model", choices=[ChatCompletionChoice(message=ChatMessageAssistant(content="test_output"))])
+            )
+        )
+        mock_weave_eval_logger = MagicMock(spec=CustomEvaluationLogger)
+        hooks.weave_eval_loggers["test_eval_id"] = mock_weave_eval_logger
+
+        # When
+        await hooks.on_sample_end(sample)
+        hooks._get_dispatcher().close()
+        hooks._log_task_summary("test_eval_id", {})
+
+        # Then
+        mock_publish.assert_called_once_with(long_input, name="inspect-payload")
+        # published by the background worker, off the event loop
+        assert publish_threads != [threading.current_thread()]
+        mock_weave_eval_logger.log_prediction.assert_called_once_with(
+            inputs={"input": payload_ref},
+            output="test_output",
+            parent_call=None
+        )
+        mock_weave_eval_logger.log_summary.assert_called_once_with(
+            {"payloads": {"fields_offloaded": 1, "bytes_offloaded": 1002, "bytes_deduplicated": 0}}
+        )
+
     @pytest.mark.asyncio
     async def test_writes_inspect_eval_summary_metrics_to_weave_on_task_end(self, task_end_eval_log: EvalLog, test_settings: WeaveSettings) -> None:
         # Given
@@ -136,6 +223,60 @@ class TestWeaveEvaluationHooks:
             expected_summary
         )
 
+    @pytest.mark.asyncio
+    async def test_releases_task_state_on_task_end(self, task_end_eval_log: EvalLog, test_settings: WeaveSettings) -> None:
+        # Given
+        hooks = WeaveEvaluationHooks()
+        hooks.settings = test_settings
+        hooks._hooks_enabled = True
+        hooks._weave_initialized = True
+        hooks.weave_client = MagicMock(spec=WeaveClient)
+        finished_logger = MagicMock(spec=CustomEvaluationLogger)
+        finished_logger._evaluate_call = MagicMock(spec=Call)
+        running_logger = MagicMock(spec=CustomEvaluationLogger)
+        running_logger._is_finalized = False
+        hooks.weave_eval_loggers.update({"test_eval_id": finished_logger, "running_eval_id": running_logger})
+        hooks.task_mapping.update({"test_eval_id": "test_task", "running_eval_id": "running_task"})
+
+        # When
+        await hooks.on_task_end(TaskEnd(run_id="test_run_id", eval_id="test_eval_id", log=task_end_eval_log))
+
+        # Then
+        finished_logger.log_summary.assert_called_once()
+        assert "test_eval_id" not in hooks.weave_eval_loggers
+        assert "test_eval_id" not in hooks.task_mapping
+
+        # When
+        await hooks.on_run_end(RunEnd(run_id="test_run_id", logs=EvalLogs([]), exception=None))
+
+        # Then
+        # only the task that did not end is finalized at run end
+        finished_logger.finish.assert_not_called()
+        running_logger.finish.assert_called_once_with()
+        assert hooks.weave_eval_loggers == {}
+
+    @pytest.mark.asyncio
+    async def test_drains_weave_client_within_flush_timeout_on_run_end(self, test_settings: WeaveSettings, tmp_path: Path) -> None:
+        # Given
+        hooks = WeaveEvaluationHooks()
+        hooks.settings = test_settings
+        hooks.settings.flush_timeout = 5.0
+        hooks.settings.flush_workers = 4
+        hooks.settings.flush_spill_dir = str(tmp_path)
+        hooks._hooks_enabled = True
+        hooks._weave_initialized = True
+        hooks.weave_client = MagicMock(spec=WeaveClient)
+
+        # When
+        with patch("inspect_wandb.weave.hooks.drain_weave_client", MagicMock(return_value=DrainStats())) as drain:
+            await hooks.on_run_end(RunEnd(run_id="test_run_id", logs=EvalLogs([]), exception=None))
+
+        # Then
+        drain.assert_called_once_with(
+            hooks.weave_client, timeout=5.0, workers=4, spill_path=tmp_path / "weave-spill" / "test_run_id"
+        )
+        hooks.weave_client.finish.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_passes_exception_to_weave_on_error_run_end(self, test_settings: WeaveSettings) -> None:
         # Given
@@ -174,8 +315,10 @@ class TestWeaveEvaluationHooks:
         hooks._weave_initialized = True  # Mark as initialized for cleanup
         hooks.weave_client = MagicMock(spec=WeaveClient)
         
-        # Set up task mapping (simulating task start)
+        # Set up task mapping and logger (simulating task start)
         hooks.task_mapping["test_eval_id"] = "test_task"
+        hooks.weave_eval_loggers["test_eval_id"] = MagicMock(spec=CustomEvaluationLogger)
+        hooks.weave_eval_loggers["test_eval_id"]._evaluate_call = MagicMock(spec=Call)
         
         sample = SampleStart(
             run_id="test_run_id",
@@ -196,6 +339,8 @@ class TestWeaveEvaluationHooks:
         # Then
         hooks.weave_client.create_call.assert_called_once_with(
             op="inspect-sample",
+            parent=hooks.weave_eval_loggers["test_eval_id"]._evaluate_call,
+            use_stack=True,
             inputs={"input": "test_input"},
             attributes={
                 "sample_id": 1, 
@@ -209,6 +354,95 @@ class TestWeaveEvaluationHooks:
         )
 
 
+class TestWeaveTraceSampling:
+    """
+    Tests for sample-level trace sampling when autopatching
+    """
+
+    def _hooks(self, test_settings: WeaveSettings) -> WeaveEvaluationHooks:
+        hooks = WeaveEvaluationHooks()
+        hooks.settings = test_settings
+        hooks.settings.autopatch = True
+        hooks.settings.trace_sample_rate = 0.0
+        hooks._hooks_enabled = True
+        hooks.weave_client = MagicMock(spec=WeaveClient)
+        hooks.task_mapping["test_eval_id"] = "test_task"
+        hooks.weave_eval_loggers["test_eval_id"] = MagicMock(spec=CustomEvaluationLogger)
+        hooks.weave_eval_loggers["test_eval_id"]._evaluate_call = MagicMock(spec=Call)
+        return hooks
+
+    def _sample_end(self, value: str) -> SampleEnd:
+        return SampleEnd(
+            run_id="test_run_id",
+            eval_id="test_eval_id",
+            sample_id="test_sample_id",
+            sample=EvalSample(
+                id=1,
+                epoch=1,
+                input="test_input",
+                target="test_output",
+                scores={"test_score": Score(value=value)},
+                output=ModelOutput(model="mockllm/model", choices=[ChatCompletionChoice(message=ChatMessageAssistant(content="test_output"))])
+            )
+        )
+
+    @pytest.mark.asyncio
+    async def test_untraced_sample_skips_sample_call(self, test_settings: WeaveSettings) -> None:
+        # Given
+        hooks = self._hooks(test_settings)
+        sample_start = SampleStart(
+            run_id="test_run_id",
+            eval_id="test_eval_id",
+            sample_id="test_sample_id",
+            summary=EvalSampleSummary(id=1, epoch=1, input="test_input", target="test_output", uuid="test_sample_id")
+        )
+
+        # When
+        await hooks.on_sample_start(sample_start)
+        await hooks.on_sample_end(self._sample_end("C"))
+
+        # Then
+        hooks.weave_client.create_call.assert_not_called()
+        hooks.weave_client.finish_call.assert_not_called()
+        hooks.weave_eval_loggers["test_eval_id"].log_prediction.assert_called_once_with(
+            inputs={"input": "test_input"},
+            output="test_output",
+            parent_call=None
+        )
+
+    @pytest.mark.asyncio
+    async def test_untraced_incorrect_sample_gets_sample_call(self, test_settings: WeaveSettings) -> None:
+        # Given
+        hooks = self._hooks(test_settings)
+
+        # When
+        await hooks.on_sample_end(self._sample_end("I"))
+
+        # Then
+        hooks.weave_client.create_call.assert_called_once()
+        assert hooks.weave_client.create_call.call_args.kwargs["display_name"] == "test_task-sample-1-epoch-1"
+        assert hooks.weave_client.create_call.call_args.kwargs["parent"] is hooks.weave_eval_loggers["test_eval_id"]._evaluate_call
+        assert hooks.weave_client.create_call.call_args.kwargs["use_stack"] is False
+        sample_call = hooks.weave_client.create_call.return_value
+        hooks.weave_client.finish_call.assert_called_once()
+        assert hooks.weave_client.finish_call.call_args.args[0] is sample_call
+        assert hooks.weave_eval_loggers["test_eval_id"].log_prediction.call_args.kwargs["parent_call"] is sample_call
+        assert "test_sample_id" not in hooks.sample_calls
+
+    @pytest.mark.asyncio
+    async def test_untraced_incorrect_sample_skipped_without_trace_failures(self, test_settings: WeaveSettings) -> None:
+        # Given
+        hooks = self._hooks(test_settings)
+        hooks.settings.trace_failures = False
+
+        # When
+        await hooks.on_sample_end(self._sample_end("I"))
+
+        # Then
+        hooks.weave_client.create_call.assert_not_called()
+        hooks.weave_eval_loggers["test_eval_id"].log_prediction.assert_called_once()
+
+
 class TestWeaveEnablementPriority:
     """
     Tests for the new enablement priority logic: script metadata > project config
@@ -349,3 +583,70 @@ class TestWeaveEnablementPriority:
 
         # Then
         assert task_end_eval_log.eval.metadata["weave_run_url"] == "test_url"
+
+
+class TestWeaveBackgroundInit:
+    """
+    Tests for preparing the Weave client in the background from on_run_start
+    """
+
+    @pytest.mark.asyncio
+    async def test_client_initialized_on_task_start_after_setup_started_on_run_start(
+        self, test_settings: WeaveSettings, create_task_start: Callable[[dict | None], TaskStart]
+    ) -> None:
+        # Given
+        hooks = WeaveEvaluationHooks()
+        hooks.settings = test_settings
+        weave_client = MagicMock(spec=WeaveClient)
+
+        with (
+            patch("inspect_wandb.weave.hooks.get_weave_client", MagicMock(return_value=None)),
+            patch("inspect_wandb.weave.hooks.weave_wandb_api_key", MagicMock(return_value="test-key")) as api_key,
+            patch("inspect_wandb.weave.hooks.init_weave_get_server") as get_server,
+            patch("inspect_wandb.weave.hooks.weave.init", MagicMock(return_value=weave_client)) as weave_init,
+            patch("inspect_wandb.weave.hooks.CustomEvaluationLogger", MagicMock()),
+        ):
+            # When
+            await hooks.on_run_start(RunStart(run_id="test_run_id", task_names=["test_task"]))
+
+            # Then
+            assert hooks._client_init is not None
+            weave_init.assert_not_called()
+
+            # When
+            await hooks.on_task_start(create_task_start(None))
+
+        # Then
+        api_key.assert_called_once()
+        get_server.assert_called_once_with("test-key")
+        get_server.return_value.server_info.assert_called_once()
+        weave_init.assert_called_once()
+        assert hooks.weave_client is weave_client
+        assert hooks._client_init is None
+        assert hooks._weave_initialized is True
+
+    @pytest.mark.asyncio
+    async def test_weave_not_initialized_when_task_metadata_disables_weave(
+        self, test_settings: WeaveSettings, create_task_start: Callable[[dict | None], TaskStart]
+    ) -> None:
+        # Given
+        hooks = WeaveEvaluationHooks()
+        hooks.settings = test_settings
+
+        with (
+            patch("inspect_wandb.weave.hooks.get_weave_client", MagicMock(return_value=None)),
+            patch("inspect_wandb.weave.hooks.weave_wandb_api_key", MagicMock(return_value="test-key")),
+            patch("inspect_wandb.weave.hooks.init_weave_get_server") as get_server,
+            patch("inspect_wandb.weave.hooks.weave.init", MagicMock()) as weave_init,
+        ):
+            # When
+            await hooks.on_run_start(RunStart(run_id="test_run_id", task_names=["test_task"]))
+            await hooks.on_task_start(create_task_start({"weave_enabled": False}))
+
+        # Then
+        # connecting to the trace server creates nothing in the project
+        get_server.return_value.server_info.assert_called_once()
+        get_server.return_value.ensure_project_exists.assert_not_called()
+        weave_init.assert_not_called()
+        assert hooks._client_init is None
+        assert hooks._weave_initialized is False
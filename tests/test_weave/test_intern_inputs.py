@@ -0,0 +1,106 @@
+from inspect_ai.hooks import SampleEnd, SampleStart
+from inspect_ai.log import EvalSample, EvalSampleSummary
+from inspect_ai.model import ChatCompletionChoice, ChatMessageAssistant, ModelOutput
+from inspect_ai.scorer import Score
+from inspect_wandb.config.settings import WeaveSettings
+from inspect_wandb.weave.custom_evaluation_logger import CustomEvaluationLogger
+from inspect_wandb.weave.hooks import WeaveEvaluationHooks
+from pytest import MonkeyPatch
+from weave.trace.weave_client import WeaveClient
+import pytest
+import uuid
+
+EPOCHS = 5
+
+
+def long_input() -> str:
+    # unique per run, since the test client caches object creation by content across tests
+    return f"Summarise the following document ({uuid.uuid4()}).\n" + "lorem ipsum dolor sit amet " * 1000
+
+
+def record_bytes_sent(client: WeaveClient, monkeypatch: MonkeyPatch) -> list[int]:
+    """
+    Records the size of every request that writes calls or objects to the trace server.
+    """
+    sent: list[int] = []
+    server = client.server.server
+    for name in ("call_start", "call_end", "obj_create"):
+        method = getattr(server, name)
+        def recording(req, method=method):
+            sent.append(len(req.model_dump_json()))
+            return method(req)
+        monkeypatch.setattr(server, name, recording)
+    return sent
+
+
+async def run_epochs(client: WeaveClient, intern_inputs: bool, sample_input: str) -> None:
+    hooks = WeaveEvaluationHooks()
+    hooks.settings = WeaveSettings(entity="test-entity", project="test-project", autopatch=True, intern_inputs=intern_inputs)
+    hooks._hooks_enabled = True
+    hooks.weave_client = client
+    hooks.task_mapping["test_eval_id"] = "test_task"
+    hooks.weave_eval_loggers["test_eval_id"] = CustomEvaluationLogger(name="test_task", dataset="test_dataset", model="mockllm__model")
+    for epoch in range(1, EPOCHS + 1):
+        sample_uuid = f"sample-{epoch}"
+        await hooks.on_sample_start(SampleStart(
+            run_id="test_run_id",
+            eval_id="test_eval_id",
+            sample_id=sample_uuid,
+            summary=EvalSampleSummary(id=1, epoch=epoch, input=sample_input, target="target", uuid=sample_uuid),
+        ))
+        await hooks.on_sample_end(SampleEnd(
+            run_id="test_run_id",
+            eval_id="test_eval_id",
+            sample_id=sample_uuid,
+            sample=EvalSample(
+                id=1,
+                epoch=epoch,
+                input=sample_input,
+                target="target",
+                scores={"match": Score(value="C")},
+                output=ModelOutput(model="mockllm/model", choices=[ChatCompletionChoice(message=ChatMessageAssistant(content="summary"))]),
+            ),
+        ))
+    # with interned inputs, sample ends are logged by the background worker
+    hooks._get_dispatcher().close()
+    hooks.weave_eval_loggers.pop("test_eval_id").finish()
+    client.flush()
+
+
+class TestInternInputs:
+    """
+    Tests for uploading each sample input once across epochs, measured against the SQLite trace server.
+    """
+
+    @pytest.mark.asyncio
+    async def test_interned_inputs_reduce_bytes_sent_across_epochs(self, client: WeaveClient, monkeypatch: MonkeyPatch) -> None:
+        # Given
+        sample_input = long_input()
+        sent = record_bytes_sent(client, monkeypatch)
+        await run_epochs(client, intern_inputs=False, sample_input=sample_input)
+        bytes_inline = sum(sent)
+        sent.clear()
+
+        # When
+        await run_epochs(client, intern_inputs=True, sample_input=sample_input)
+        bytes_interned = sum(sent)
+
+        # Then
+        # inline, the input is sent with the prediction, model and scorer calls of every epoch (and, truncated by Inspect,
+        # with every sample call); interned, the full and truncated inputs are each sent once.
+        # With a ~27KB input this is ~461KB inline against ~63KB interned.
+        assert bytes_inline > 3 * EPOCHS * len(sample_input)
+        assert bytes_interned < 3 * len(sample_input)
+
+    @pytest.mark.asyncio
+    async def test_interned_inputs_resolve_to_the_sample_input(self, client: WeaveClient) -> None:
+        # Given
+        sample_input = long_input()
+
+        # When
+        await run_epochs(client, intern_inputs=True, sample_input=sample_input)
+
+        # Then
+        predictions = [call for call in client.get_calls() if "predict_and_score" in call.op_name]
+        assert len(predictions) == EPOCHS
+        assert all(call.inputs["example"]["input"] == sample_input for call in predictions)
@@ -0,0 +1,114 @@
+from unittest.mock import MagicMock
+
+import weave
+from weave.trace.refs import ObjectRef
+from weave.trace.weave_client import WeaveClient
+
+from inspect_wandb.weave.payloads import PAYLOAD_OBJECT_NAME, PayloadBudget
+
+
+class TestPayloadBudget:
+    """
+    Tests for offloading call payload fields over the byte budget to Weave objects
+    """
+
+    def test_values_within_budget_pass_through(self, client: WeaveClient) -> None:
+        # Given
+        budget = PayloadBudget(100)
+
+        # When
+        limited = budget.limit_fields({"input": "short", "total_time": 1.5, "scores": None}, "eval")
+
+        # Then
+        assert limited == {"input": "short", "total_time": 1.5, "scores": None}
+        assert budget.pop_summary("eval") is None
+
+    def test_values_over_budget_are_offloaded(self, client: WeaveClient) -> None:
+        # Given
+        budget = PayloadBudget(100)
+        messages = [{"role": "user", "content": "x" * 200}]
+
+        # When
+        ref = budget.limit(messages, "eval")
+
+        # Then
+        assert isinstance(ref, ObjectRef)
+        assert ref.name == PAYLOAD_OBJECT_NAME
+        assert ref.get() == messages
+        summary = budget.pop_summary("eval")
+        assert summary is not None
+        assert summary["fields_offloaded"] == 1
+        assert summary["bytes_offloaded"] > 200
+
+    def test_identical_values_are_published_once(self, client: WeaveClient) -> None:
+        # Given
+        mock_publish = MagicMock(wraps=weave.publish)
+        budget = PayloadBudget(100, publish=mock_publish)
+        value = "y" * 500
+
+        # When
+        first = budget.limit(value, "eval")
+        second = budget.limit(value, "other_eval")
+
+        # Then
+        mock_publish.assert_called_once()
+        assert first is second
+        assert budget.pop_summary("eval") == {"fields_offloaded": 1, "bytes_offloaded": 502, "bytes_deduplicated": 0}
+        assert budget.pop_summary("other_eval") == {"fields_offloaded": 1, "bytes_offloaded": 0, "bytes_deduplicated": 502}
+
+    def test_offloaded_attributes_are_ref_uris(self, client: WeaveClient) -> None:
+        # Given
+        budget = PayloadBudget(100)
+
+        # When
+        limited = budget.limit_attribute({"document": "z" * 500}, "eval")
+
+        # Then
+        assert isinstance(limited, str)
+        assert limited.startswith(f"weave:///{client.entity}/{client.project}/object/{PAYLOAD_OBJECT_NAME}:")
+
+    def test_interned_inputs_offloaded_whatever_their_size(self, client: WeaveClient) -> None:
+        # Given
+        mock_publish = MagicMock(wraps=weave.publish)
+        budget = PayloadBudget(None, intern_inputs=True, publish=mock_publish)
+
+        # When
+        first = budget.limit_inputs({"input": "short input"}, "eval")
+        second = budget.limit_inputs({"input": "short input"}, "eval")
+
+        # Then
+        assert isinstance(first["input"], ObjectRef)
+        assert second["input"] is first["input"]
+        mock_publish.assert_called_once()
+        # outputs are only offloaded over the budget
+        assert budget.limit_fields({"output": "short output"}, "eval") == {"output": "short output"}
+
+    def test_no_budget_passes_everything_through(self) -> None:
+        # Given
+        budget = PayloadBudget(None)
+        value = "x" * 10_000
+
+        # When
+        limited = budget.limit(value, "eval")
+
+        # Then
+        assert limited is value
+        assert budget.pop_summary("eval") is None
+
+    def test_only_most_recently_used_refs_kept(self) -> None:
+        # Given
+        mock_publish = MagicMock(side_effect=lambda value, name: MagicMock(spec=ObjectRef))
+        budget = PayloadBudget(None, intern_inputs=True, publish=mock_publish, max_refs=2)
+
+        # When
+        budget.limit_inputs({"input": "a"}, "eval")
+        budget.limit_inputs({"input": "b"}, "eval")
+        budget.limit_inputs({"input": "a"}, "eval")
+        budget.limit_inputs({"input": "c"}, "eval")
+        budget.limit_inputs({"input": "a"}, "eval")
+        budget.limit_inputs({"input": "b"}, "eval")
+
+        # Then
+        # "b" was the least recently used when "c" was added, so it is published again
+        assert [call.args[0] for call in mock_publish.call_args_list] == ["a", "b", "c", "b"]
+        assert len(budget._refs) == 2
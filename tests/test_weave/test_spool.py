@@ -0,0 +1,162 @@
+from inspect_ai import Task, eval as inspect_eval
+from inspect_wandb.telemetry.spool import is_synced, read_journal
+from inspect_wandb.weave.custom_evaluation_logger import CustomEvaluationLogger
+from inspect_wandb.weave.spool import sync_weave_spool
+from weave.trace.refs import ObjectRef
+from weave.trace.weave_client import WeaveClient
+from pathlib import Path
+from pytest import MonkeyPatch
+from typing import Any, Callable
+from unittest.mock import MagicMock, patch
+
+
+class TestWeaveSpool:
+    """
+    Tests for recording Weave evaluations to a spool journal and replaying them with `inspect-wandb sync`.
+    """
+
+    def test_spooled_run_replayed_into_weave(
+        self,
+        client: WeaveClient,
+        hello_world_eval: Callable[[], Task],
+        reset_inspect_ai_hooks: None,
+        monkeypatch: MonkeyPatch,
+        tmp_path: Path
+    ) -> None:
+        # Given
+        monkeypatch.setenv("INSPECT_WANDB_MODELS_ENABLED", "false")
+        monkeypatch.setenv("INSPECT_WANDB_WEAVE_ENABLED", "true")
+        monkeypatch.setenv("INSPECT_WANDB_WEAVE_AUTOPATCH", "true")
+        monkeypatch.setenv("INSPECT_WANDB_WEAVE_SPOOL_DIR", str(tmp_path))
+        with patch("inspect_wandb.weave.hooks.weave.init", MagicMock()) as weave_init:
+            eval_logs = inspect_eval(hello_world_eval, model="mockllm/model")
+        weave_init.assert_not_called()
+        journal = tmp_path / "weave" / eval_logs[0].eval.run_id
+        assert [kind for kind, _ in read_journal(journal)] == [
+            "run_start", "evaluation_start", "call_start", "prediction", "call_finish", "summary", "finish"
+        ]
+
+        # When
+        with patch("inspect_wandb.weave.spool.weave.init", MagicMock(return_value=client)) as sync_init:
+            synced = sync_weave_spool(tmp_path, workers=2)
+
+        # Then
+        sync_init.assert_called_once()
+        assert sync_init.call_args.kwargs["project_name"] == "test-entity/test-project"
+        assert synced == [journal]
+        assert is_synced(journal)
+        op_names = [call._op_name for call in client.get_calls()]
+        assert any("Evaluation.evaluate" in name for name in op_names)
+        assert any("inspect-sample" in name for name in op_names)
+        assert any("Evaluation.predict_and_score" in name for name in op_names)
+        assert any("exact" in name for name in op_names)
+
+        # already synced journals are skipped
+        assert sync_weave_spool(tmp_path) == []
+
+    def test_payload_budget_applied_on_replay(
+        self,
+        client: WeaveClient,
+        hello_world_eval: Callable[[], Task],
+        reset_inspect_ai_hooks: None,
+        monkeypatch: MonkeyPatch,
+        tmp_path: Path
+    ) -> None:
+        # Given
+        monkeypatch.setenv("INSPECT_WANDB_MODELS_ENABLED", "false")
+        monkeypatch.setenv("INSPECT_WANDB_WEAVE_ENABLED", "true")
+        monkeypatch.setenv("INSPECT_WANDB_WEAVE_AUTOPATCH", "true")
+        monkeypatch.setenv("INSPECT_WANDB_WEAVE_SPOOL_DIR", str(tmp_path))
+        monkeypatch.setenv("INSPECT_WANDB_WEAVE_MAX_PAYLOAD_BYTES", "10")
+        inspect_eval(hello_world_eval, model="mockllm/model")
+
+        # When
+        with patch("inspect_wandb.weave.spool.weave.init", MagicMock(return_value=client)):
+            sync_weave_spool(tmp_path)
+
+        # Then
+        sample_call = next(call for call in client.get_calls() if "inspect-sample" in call._op_name)
+        # the stored input is a ref, which is resolved on access
+        assert isinstance(dict.__getitem__(sample_call.inputs, "input"), ObjectRef)
+        assert sample_call.inputs["input"] == "Just reply with Hello World"
+        evaluate_call = next(call for call in client.get_calls() if "Evaluation.evaluate" in call._op_name)
+        assert evaluate_call.output["output"]["payloads"]["fields_offloaded"] >= 2
+
+    def test_failed_sync_resumed_without_duplicating_replayed_evaluations(
+        self,
+        client: WeaveClient,
+        hello_world_eval: Callable[[], Task],
+        reset_inspect_ai_hooks: None,
+        monkeypatch: MonkeyPatch,
+        tmp_path: Path
+    ) -> None:
+        # Given a journal of two evaluations, the second of which fails to replay
+        monkeypatch.setenv("INSPECT_WANDB_MODELS_ENABLED", "false")
+        monkeypatch.setenv("INSPECT_WANDB_WEAVE_ENABLED", "true")
+        monkeypatch.setenv("INSPECT_WANDB_WEAVE_AUTOPATCH", "true")
+        monkeypatch.setenv("INSPECT_WANDB_WEAVE_SPOOL_DIR", str(tmp_path))
+        eval_logs = inspect_eval([hello_world_eval(), hello_world_eval()], model="mockllm/model")
+        journal = tmp_path / "weave" / eval_logs[0].eval.run_id
+        loggers: list[CustomEvaluationLogger] = []
+
+        def create_logger(*args: Any, **kwargs: Any) -> CustomEvaluationLogger:
+            if loggers:
+                raise RuntimeError("connection lost")
+            loggers.append(CustomEvaluationLogger(*args, **kwargs))
+            return loggers[-1]
+
+        with patch("inspect_wandb.weave.spool.weave.init", MagicMock(return_value=client)):
+            with patch("inspect_wandb.weave.spool.CustomEvaluationLogger", create_logger):
+                assert sync_weave_spool(tmp_path) == []
+        assert not is_synced(journal)
+
+        # When
+        with patch("inspect_wandb.weave.spool.weave.init", MagicMock(return_value=client)):
+            synced = sync_weave_spool(tmp_path)
+
+        # Then
+        assert synced == [journal]
+        evaluate_calls = [call for call in client.get_calls() if "Evaluation.evaluate" in call._op_name]
+        sample_calls = [call for call in client.get_calls() if "inspect-sample" in call._op_name]
+        assert len(evaluate_calls) == 2
+        assert len(sample_calls) == 2
+        assert all(call.ended_at is not None for call in evaluate_calls + sample_calls)
+
+    def test_evaluation_left_part_way_through_by_failed_sync_finished_as_failed(
+        self,
+        client: WeaveClient,
+        hello_world_eval: Callable[[], Task],
+        reset_inspect_ai_hooks: None,
+        monkeypatch: MonkeyPatch,
+        tmp_path: Path
+    ) -> None:
+        # Given a journal whose prediction fails to replay
+        monkeypatch.setenv("INSPECT_WANDB_MODELS_ENABLED", "false")
+        monkeypatch.setenv("INSPECT_WANDB_WEAVE_ENABLED", "true")
+        monkeypatch.setenv("INSPECT_WANDB_WEAVE_AUTOPATCH", "true")
+        monkeypatch.setenv("INSPECT_WANDB_WEAVE_SPOOL_DIR", str(tmp_path))
+        eval_logs = inspect_eval(hello_world_eval, model="mockllm/model")
+        journal = tmp_path / "weave" / eval_logs[0].eval.run_id
+
+        # When
+        with patch("inspect_wandb.weave.spool.weave.init", MagicMock(return_value=client)):
+            with patch("inspect_wandb.weave.spool.log_sample_prediction", MagicMock(side_effect=RuntimeError("connection lost"))):
+                assert sync_weave_spool(tmp_path) == []
+
+        # Then
+        # the partly replayed evaluation and its sample call are finished as failed, rather than left running
+        [evaluate_call] = [call for call in client.get_calls() if "Evaluation.evaluate" in call._op_name]
+        [sample_call] = [call for call in client.get_calls() if "inspect-sample" in call._op_name]
+        assert evaluate_call.ended_at is not None and evaluate_call.exception is not None
+        assert sample_call.ended_at is not None and "connection lost" in str(sample_call.exception)
+        assert not is_synced(journal)
+
+        # When
+        with patch("inspect_wandb.weave.spool.weave.init", MagicMock(return_value=client)):
+            synced = sync_weave_spool(tmp_path)
+
+        # Then
+        assert synced == [journal]
+        evaluate_calls = [call for call in client.get_calls() if "Evaluation.evaluate" in call._op_name]
+        assert len(evaluate_calls) == 2
+        assert [call.exception is None for call in evaluate_calls] == [False, True]
@@ -0,0 +1,69 @@
+from inspect_wandb.weave.streaming_summary import StreamingSummary
+from inspect_wandb.weave.custom_evaluation_logger import CustomEvaluationLogger
+from weave.flow.scorer import auto_summarize
+from weave.trace.weave_client import WeaveClient
+from typing import Any
+import pytest
+
+
+def streaming_summary(data: list[Any]) -> dict[str, Any] | None:
+    summary = StreamingSummary()
+    for value in data:
+        summary.update(value)
+    return summary.summary()
+
+
+class TestStreamingSummary:
+    """
+    Tests for the StreamingSummary class and the streaming mode of CustomEvaluationLogger.
+    """
+
+    @pytest.mark.parametrize("data", [
+        [],
+        [None, None],
+        [{"accuracy": 1.0}, {"accuracy": 0.0}, {"accuracy": 0.5}],
+        [{"correct": True}, {"correct": False}, {"correct": None}, {"correct": True}],
+        [{"match": {"score": "C"}}, {"match": {"score": "I"}}],
+        [{"f1": {"precision": 0.5, "recall": 1.0}}, {"f1": {"precision": 1.0}}, {"other": 3}],
+        [{"mean": {"mean": 2.0}}, {"mean": {"mean": 4.0}}],
+        [{"a": 1, "b": True}, None, {"a": 2, "b": False, "c": "text"}],
+    ])
+    def test_matches_auto_summarize(self, data: list[Any]) -> None:
+        assert streaming_summary(data) == auto_summarize(data)
+
+    def test_streaming_logger_releases_finished_predictions(self, client: WeaveClient) -> None:
+        # Given
+        streaming = CustomEvaluationLogger(name="test_task", dataset="test_dataset", model="mockllm__model", streaming=True)
+        accumulating = CustomEvaluationLogger(name="test_task", dataset="test_dataset", model="mockllm__model")
+
+        # When
+        for i in range(20):
+            for weave_eval_logger in (streaming, accumulating):
+                score_logger = weave_eval_logger.log_prediction(inputs={"input": i}, output=str(i))
+                score_logger.log_score(scorer="correct", score=i % 4 == 0)
+                score_logger.log_score(scorer="value", score=float(i))
+                score_logger.finish()
+
+        # Then
+        assert streaming._accumulated_predictions == []
+        assert len(accumulating._accumulated_predictions) == 20
+        streaming.log_summary({"inspect": 1.0})
+        accumulating.log_summary({"inspect": 1.0})
+        calls = {call.id: call for call in client.get_calls()}
+        assert streaming._evaluate_call is not None and accumulating._evaluate_call is not None
+        assert calls[streaming._evaluate_call.id].output == calls[accumulating._evaluate_call.id].output
+        assert calls[streaming._evaluate_call.id].output["correct"] == {"true_count": 5, "true_fraction": 0.25}
+
+    def test_unfinished_predictions_included_in_summary(self, client: WeaveClient) -> None:
+        # Given
+        weave_eval_logger = CustomEvaluationLogger(name="test_task", dataset="test_dataset", model="mockllm__model", streaming=True)
+        score_logger = weave_eval_logger.log_prediction(inputs={"input": 1}, output="1")
+        score_logger.log_score(scorer="value", score=3.0)
+
+        # When
+        weave_eval_logger.log_summary()
+
+        # Then
+        assert weave_eval_logger._accumulated_predictions == []
+        assert weave_eval_logger._is_finalized
+        assert weave_eval_logger._streaming_summary.summary() == {"value": {"mean": 3.0}}
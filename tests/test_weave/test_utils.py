@@ -1,4 +1,6 @@
-from inspect_wandb.weave.utils import format_model_name, format_score_types, format_sample_display_name
+from inspect_wandb.weave.utils import format_model_name, format_score_types, format_sample_display_name, sample_failed, sample_traced
+from inspect_ai.log import EvalError, EvalSample
+from inspect_ai.scorer import Score
 import pytest
 import re
 
@@ -159,4 +161,41 @@ class TestFormatSampleDisplayName:
     def test_template_variations(self, template, task_name, sample_id, epoch, expected):
         """Test various template patterns."""
         result = format_sample_display_name(template, task_name, sample_id, epoch)
-        assert result == expected
\ No newline at end of file
+        assert result == expected
+
+class TestSampleTraced:
+    """Test cases for the sample_traced trace sampling decision."""
+
+    def test_all_or_no_samples_at_bounds(self):
+        assert all(sample_traced(i, 1, 1.0) for i in range(100))
+        assert not any(sample_traced(i, 1, 0.0) for i in range(100))
+
+    def test_decision_is_deterministic(self):
+        first = [sample_traced(i, epoch, 0.3) for i in range(200) for epoch in (1, 2)]
+        second = [sample_traced(i, epoch, 0.3) for i in range(200) for epoch in (1, 2)]
+        assert first == second
+
+    def test_traces_approximately_the_rate(self):
+        traced = sum(sample_traced(i, 1, 0.1) for i in range(10000))
+        assert 800 < traced < 1200
+
+    def test_samples_traced_at_a_lower_rate_are_traced_at_a_higher_rate(self):
+        assert all(sample_traced(i, 1, 0.5) for i in range(1000) if sample_traced(i, 1, 0.1))
+
+
+class TestSampleFailed:
+    """Test cases for sample_failed."""
+
+    def _sample(self, value, error=None) -> EvalSample:
+        return EvalSample(id=1, epoch=1, input="input", target="target", scores={"scorer": Score(value=value)}, error=error)
+
+    @pytest.mark.parametrize("value", ["I", "N", 0, 0.0, False])
+    def test_incorrect_scores_fail(self, value):
+        assert sample_failed(self._sample(value))
+
+    @pytest.mark.parametrize("value", ["C", "P", 1, 0.5, True, {"accuracy": 0}])
+    def test_other_scores_do_not_fail(self, value):
+        assert not sample_failed(self._sample(value))
+
+    def test_errors_fail(self):
+        assert sample_failed(self._sample("C", error=EvalError(message="boom", traceback="", traceback_ansi="")))